@@ -1,18 +1,31 @@
 import tkinter as tk
 from tkinter import messagebox
-import random
+import argparse
 import time
+from collections import deque
+
+from engine_2048 import DIRECTIONS
+from sparse_2048 import DENSE_MAX_SIZE, MAX_SIZE, SparseEngine2048
+from ai_2048 import Expectimax2048
+from render_2048 import FRAME_MS, BoardRenderer, LabelBatch
+from animate_2048 import TileAnimator
+from replay_2048 import GameRecorder, append_archive
+from history_2048 import History
+from stats_store import StatsStore
+import instrument
 
 class game_2048:
-    def __init__(self, root):
+    def __init__(self, root, record_path=None, grid_count=6, stats=None):
         self.root = root
         self.root.title("2048")
         self.root.resizable(False, False)
         self.font = ('SimHei', 15, 'bold')
         self.small_font = ('SimHei', 10)
 
-        self.GRID_SIZE = 45
-        self.GRID_COUNT = 6
+        # 格子大小随棋盘尺寸缩放，画布边长不超过 720 像素
+        self.GRID_COUNT = grid_count
+        self.GRID_SIZE = max(10, min(45, 720 // grid_count))
+        self.cell_font = ('SimHei', max(5, 15 * self.GRID_SIZE // 45), 'bold')
         self.CELL_SIZE = 70
         
         self.game_over = False
@@ -20,11 +33,45 @@ class game_2048:
         self.start_time = None
         self.timer_id = None
         self.score = 0
-        self.best_score = 0
+        # 成绩记录（StatsStore），为 None 时不保存；最高分按棋盘尺寸分别记录
+        self.stats = stats
+        self.best_score = stats.best_score('2048', grid_count) if stats else 0
+        self.moves = 0
+        # 每局的编号，以及已经记录过成绩的那一局的编号；撤销回结束前的局面
+        # 仍是同一局，不会再记录一次
+        self.game_id = 0
+        self.recorded_game = None
         self.largestnum = 0
         
+        # 游戏规则与棋盘状态由无界面引擎负责，这里只负责显示；
+        # 每局都边下边录，record_path 不为空时结束后追加到录像档案
+        self.record_path = record_path
+        self.recorder = None
+        self.engine = None
+        # 撤销/重做历史（Z 撤销，Y 重做）
+        self.history = History()
+        # 按键先进入队列，每帧处理一次：依次作用到引擎上，最后只重绘一次；
+        # 结束弹窗等到队列处理完才显示。队列不设上限：每帧都会清空，
+        # 丢掉任何一次按键都会让局面与玩家的操作对不上
+        self.input_queue = deque()
+        self.frame_id = None
+        self.last_frame = 0.0
+        self.redraw = False
+        self.pending_dialog = None
+        # 本帧处理的有效移动数，以及最后一次移动的 (原棋盘, 方向, 新数字位置)；
+        # 一帧只有一次移动时播放动画，否则直接画出最终局面
+        self.frame_moves = 0
+        self.animation = None
+        # 大于 DENSE_MAX_SIZE 的棋盘使用稀疏引擎，不录像也不提供提示
+        self.sparse = grid_count > DENSE_MAX_SIZE
+        # 提示使用的搜索器，按 H 键显示建议方向
+        self.ai = None if self.sparse else Expectimax2048(self.GRID_COUNT)
+        
         self.create_widgets()
+        self.labels.set(self.best_value, str(self.best_score))
         self.reset_game()
+        # 中途关闭窗口时也保存本局已录下的部分
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
         
     def create_widgets(self):
         # 创建游戏标题
@@ -68,6 +115,10 @@ class game_2048:
         self.time_label = tk.Label(self.time_frame, text="时间: 00:00", font=self.small_font, bg="#faf8ef")
         self.time_label.pack()
         
+        # 创建提示显示
+        self.hint_label = tk.Label(self.control_frame, text="", font=self.small_font, bg="#faf8ef", fg="#776e65")
+        self.hint_label.pack(side=tk.LEFT, padx=10)
+        
         # 创建游戏网格背景
         self.grid_bg = tk.Canvas(self.root, width=self.GRID_SIZE*self.GRID_COUNT, height=self.GRID_SIZE*self.GRID_COUNT, bg="#bbada0", highlightthickness=0)
         self.grid_bg.pack(padx=10, pady=10)
@@ -89,12 +140,19 @@ class game_2048:
                 row_cells.append(cell_id)
                 
                 # 创建单元格标签
-                label_id = self.grid_bg.create_text(x1 + self.GRID_SIZE/2, y1 + self.GRID_SIZE/2, text="", font=self.font)
+                label_id = self.grid_bg.create_text(x1 + self.GRID_SIZE/2, y1 + self.GRID_SIZE/2, text="", font=self.cell_font)
                 row_labels.append(label_id)
                 
             self.cells.append(row_cells)
             self.cell_labels.append(row_labels)
             
+        # 只重绘变化的格子，分数标签每帧最多更新一次
+        self.renderer = BoardRenderer(self.grid_bg, self.cells, self.cell_labels, self.GRID_COUNT)
+        self.labels = LabelBatch(self.root)
+        # 移动动画使用预先创建的画布对象池，只用于打包引擎的棋盘
+        self.animator = None if self.sparse else TileAnimator(
+            self.grid_bg, self.renderer, self.GRID_COUNT, self.GRID_SIZE, self.cell_font)
+            
         # 绑定键盘事件
         self.root.bind("<Key>", self.key_press)
         
@@ -103,15 +161,24 @@ class game_2048:
         self.game_over = False
         self.victory = False
         self.score = 0
-        self.score_value.config(text="0")
+        self.labels.set(self.score_value, "0")
         self.largestnum = 0
+        self.pending_dialog = None
         
-        # 初始化游戏网格
-        self.grid = [[0 for _ in range(self.GRID_COUNT)] for _ in range(self.GRID_COUNT)]
-        
-        # 随机生成两个初始数字
-        self.add_new_tile()
-        self.add_new_tile()
+        # 保存上一局录像和未下完的成绩，然后开新局（引擎已随机生成两个初始数字）
+        self.save_replay()
+        if self.moves:
+            self.save_stats('abandoned')
+        self.moves = 0
+        self.game_id += 1
+        if self.sparse:
+            if self.engine is None:
+                self.engine = SparseEngine2048(self.GRID_COUNT)
+            self.engine.reset()
+        else:
+            self.recorder = GameRecorder(self.GRID_COUNT)
+            self.engine = self.recorder.engine
+        self.history.clear()
         
         # 更新显示
         self.update_grid_cells()
@@ -122,217 +189,171 @@ class game_2048:
         self.start_time = time.time()
         self.update_timer()
         
-    def add_new_tile(self):
-        # 查找所有空单元格
-        empty_cells = []
-        for i in range(self.GRID_COUNT):
-            for j in range(self.GRID_COUNT):
-                if self.grid[i][j] == 0:
-                    empty_cells.append((i, j))
+    @property
+    def grid(self):
+        return self.engine.grid
         
-        if empty_cells:
-            i, j = random.choice(empty_cells)
+    def update_grid_cells(self):
+        # 只更新与上次显示不同的单元格；正在播放的动画直接结束
+        if self.animator is not None:
+            self.animator.finish()
+        if self.sparse:
+            self.renderer.render_changes(self.engine.take_dirty())
+        else:
+            self.renderer.render(self.engine.board)
             
-            # 根据当前最大数字决定新方块的概率分布
-            rand = random.random()
+    def key_press(self, event):
+        self.input_queue.append(event.keysym)
+        self.schedule_frame()
             
-            if self.largestnum >= 256:
-                if rand < 0.2:
-                    value = 32
-                elif rand < 0.3:
-                    value = 16
-                elif rand < 0.35:
-                    value = 128
-                elif rand < 0.4:
-                    value = 2
-                else:
-                    # 剩下的概率均等分配给4和8
-                    value = 4 if random.random() < 0.5 else 8
-                    
-            elif self.largestnum >= 32:
-                if rand < 0.05:
-                    value = 32
-                elif rand < 0.15:
-                    value = 16
-                elif rand < 0.25:
-                    value = 8
-                elif rand < 0.3:
-                    value = 2
-                else:
-                    value = 4
-                    
-            elif self.largestnum >= 8:
-                if rand < 0.1:
-                    value = 8
-                elif rand < 0.3:
-                    value = 4
-                else:
-                    value = 2
-            else:
-                # 默认情况：90%概率生成2，10%概率生成4
-                value = 2 if rand < 0.9 else 4
+    def schedule_frame(self):
+        if self.frame_id is None:
+            # 距上一帧不足一帧时长时推迟到下一帧
+            delay = self.last_frame + FRAME_MS / 1000 - time.perf_counter()
+            self.frame_id = self.root.after(max(0, int(delay * 1000)), self.process_input)
             
-            self.grid[i][j] = value
-    
-    def update_grid_cells(self):
-        # 定义不同数字的颜色
-        colors = {
-            0: "#cdc1b4",
-            2: "#eee4da",
-            4: "#ede0c8",
-            8: "#f2b179",
-            16: "#f59563",
-            32: "#f67c5f",
-            64: "#f65e3b",
-            128: "#edcf72",
-            256: "#edcc61",
-            512: "#edc850",
-            1024: "#edc53f",
-            2048: "#edc22e",
-            4096: "#3c3a32",
-            8192: "#3c3a32"
-        }
-        
-        # 更新每个单元格的颜色和数字
-        for i in range(self.GRID_COUNT):
-            for j in range(self.GRID_COUNT):
-                value = self.grid[i][j]
-                # 更新单元格背景颜色
-                self.grid_bg.itemconfig(self.cells[i][j], fill=colors.get(value, "#3c3a32"))
-                
-                # 更新单元格文本
-                text = "" if value == 0 else str(value)
-                self.grid_bg.itemconfig(self.cell_labels[i][j], text=text, fill="#776e65" if value <= 4 else "white")
-                
-       
+    def process_input(self):
+        # 唯一的帧回调：处理排队的按键，推进动画
+        self.frame_id = None
+        self.last_frame = time.perf_counter()
+        queue = self.input_queue
+        animator = self.animator
+        if queue:
+            if animator is not None:
+                animator.finish()
+            self.frame_moves = 0
+            self.animation = None
+            while queue:
+                self.handle_key(queue.popleft())
+        if self.redraw:
+            self.redraw = False
+            if animator is not None and self.animation is not None and self.frame_moves == 1:
+                animator.start(*self.animation, board=self.engine.board)
+            else:
+                self.update_grid_cells()
+        elif animator is not None:
+            animator.step()
+        if self.pending_dialog is not None:
+            if animator is not None:
+                animator.finish()
+            title, message = self.pending_dialog
+            self.pending_dialog = None
+            messagebox.showinfo(title, message)
+        if animator is not None and animator.running:
+            self.schedule_frame()
             
-    def key_press(self, event):
+    def handle_key(self, key):
+        if key in ('z', 'Z', 'y', 'Y'):
+            self.undo_redo(key in ('z', 'Z'))
+            return
         if self.game_over or self.victory:
-            # 胜利/结束后仅响应"新游戏"按钮，键盘操作失效（按回车键可重新开始）
-            if event.keysym == 'Return':
+            # 胜利/结束后仅响应"新游戏"按钮和撤销，其他键盘操作失效（按回车键可重新开始）
+            if key == 'Return':
                 self.reset_game()
             return
             
-        key = event.keysym
-        
-        # 记录移动前的网格状态
-        old_grid = [row[:] for row in self.grid]
+        if key in ('h', 'H'):
+            self.show_hint()
+            return
+        if key not in DIRECTIONS:
+            return
         
-        # 根据按键方向移动网格
-        move_functions = {
-            'Up': self.move_up,
-            'Down': self.move_down,
-            'Left': self.move_left,
-            'Right': self.move_right
-        }
+        # 引擎返回本次得分以及网格是否发生变化
+        direction = DIRECTIONS[key]
+        state = self.engine.snapshot()
+        gained, changed = self.engine.move(direction)
         
-        if key in move_functions:
-            move_functions[key]()
-        else:
-            return
-            
         # 如果移动后网格发生变化，添加新数字并更新显示
-        if old_grid != self.grid:
-            # 更新最大数字
-            self.largestnum = max(max(row) for row in self.grid)
-            self.add_new_tile()
-            self.update_grid_cells()
+        if changed:
+            self.history.push(state)
+            self.moves += 1
+            self.score = self.engine.score
+            self.largestnum = self.engine.largestnum
+            if gained:
+                self.labels.set(self.score_value, str(self.score))
+                if self.score > self.best_score:
+                    self.best_score = self.score
+                    self.labels.set(self.best_value, str(self.best_score))
+            spawn = self.engine.add_new_tile()
+            self.frame_moves += 1
+            if not self.sparse:
+                self.animation = (state[0], direction,
+                                  None if spawn is None else spawn[0][0] * self.GRID_COUNT + spawn[0][1])
+            if self.recorder is not None:
+                self.recorder.record(direction)
+            self.labels.set(self.hint_label, "")
+            self.redraw = True
             self.check_game_state()
             
-    def move(self, get_cells):
-        """通用移动方法，get_cells是一个函数，用于获取需要处理的行或列"""
-        for cells in get_cells():
-            # 合并相同数字
-            for k in range(1, len(cells)):
-                i, j = cells[k]
-                if self.grid[i][j] != 0:
-                    # 移动直到遇到非空单元格或边界
-                    pos = k
-                    while pos > 0:
-                        prev_i, prev_j = cells[pos-1]
-                        if self.grid[prev_i][prev_j] == 0:
-                            # 移动
-                            self.grid[prev_i][prev_j] = self.grid[i][j]
-                            self.grid[i][j] = 0
-                            i, j = prev_i, prev_j
-                            pos -= 1
-                        else:
-                            break
-                    
-                    # 检查是否可以合并
-                    if pos > 0:
-                        prev_i, prev_j = cells[pos-1]
-                        if self.grid[prev_i][prev_j] == self.grid[i][j]:
-                            self.grid[prev_i][prev_j] *= 2
-                            self.score += self.grid[prev_i][prev_j]
-                            self.grid[i][j] = 0
-                            self.score_value.config(text=str(self.score))
-                            if self.score > self.best_score:
-                                self.best_score = self.score
-                                self.best_value.config(text=str(self.best_score))
-    
-    def move_up(self):
-        def get_cells():
-            return [
-                [(i, j) for i in range(self.GRID_COUNT)]
-                for j in range(self.GRID_COUNT)
-            ]
-        self.move(get_cells)
-    
-    def move_down(self):
-        def get_cells():
-            return [
-                [(i, j) for i in range(self.GRID_COUNT-1, -1, -1)]
-                for j in range(self.GRID_COUNT)
-            ]
-        self.move(get_cells)
-    
-    def move_left(self):
-        def get_cells():
-            return [
-                [(i, j) for j in range(self.GRID_COUNT)]
-                for i in range(self.GRID_COUNT)
-            ]
-        self.move(get_cells)
-    
-    def move_right(self):
-        def get_cells():
-            return [
-                [(i, j) for j in range(self.GRID_COUNT-1, -1, -1)]
-                for i in range(self.GRID_COUNT)
-            ]
-        self.move(get_cells)
-    
-    def check_game_state(self):
-        # 检查是否获胜
-        for i in range(self.GRID_COUNT):
-            for j in range(self.GRID_COUNT):
-                if self.grid[i][j] >= 2048:
-                    self.victory = True
-                    # 显示胜利弹窗
-                    messagebox.showinfo("恭喜！", "你成功合成了2048！")
-                    return
-        
-        # 检查是否还有空格子
-        for i in range(self.GRID_COUNT):
-            for j in range(self.GRID_COUNT):
-                if self.grid[i][j] == 0:
-                    return
-        
-        # 检查是否还能移动
-        for i in range(self.GRID_COUNT):
-            for j in range(self.GRID_COUNT-1):
-                if self.grid[i][j] == self.grid[i][j+1]:
-                    return
+    def undo_redo(self, undo):
+        if not (self.history.can_undo if undo else self.history.can_redo):
+            return
+        # 录像只能顺序记录，撤销后本局不再录像，撤销之前的部分照常保存
+        self.save_replay()
+        self.recorder = None
+        if undo:
+            self.history.undo(self.engine)
+        else:
+            self.history.redo(self.engine)
+        self.score = self.engine.score
+        self.largestnum = self.engine.largestnum
+        self.labels.set(self.score_value, str(self.score))
+        self.labels.set(self.hint_label, "")
+        self.redraw = True
+        self.animation = None
+        # 从结束的局面撤销回来后继续计时
+        if self.game_over or self.victory:
+            self.game_over = False
+            self.victory = False
+            self.pending_dialog = None
+            self.update_timer()
+        elif not undo:
+            self.check_game_state()
+
+    def save_stats(self, result):
+        # 每局只记录一次；只放入写入队列，不在界面线程上写盘
+        if self.recorded_game == self.game_id:
+            return
+        self.recorded_game = self.game_id
+        if self.stats is not None:
+            self.stats.record('2048', self.GRID_COUNT, result, self.engine.score,
+                              time.time() - self.start_time)
+
+    def on_close(self):
+        self.save_replay()
+        self.root.destroy()
+
+    def save_replay(self):
+        if self.recorder is None or not self.record_path or not self.recorder.replay.count:
+            return
+        append_archive(self.record_path, [self.recorder.finish()])
+        self.recorder = None
         
-        for j in range(self.GRID_COUNT):
-            for i in range(self.GRID_COUNT-1):
-                if self.grid[i][j] == self.grid[i+1][j]:
-                    return
+    def show_hint(self):
+        if self.ai is None:
+            return
+        hint = self.ai.hint(self.engine)
+        if hint.direction is None:
+            return
+        names = {direction: name for name, direction in DIRECTIONS.items()}
+        arrows = {'Up': '↑', 'Down': '↓', 'Left': '←', 'Right': '→'}
+        self.labels.set(self.hint_label,
+                        f"提示: {arrows[names[hint.direction]]}  预计得分 {hint.expected:.0f}")
         
-        # 如果都不满足，游戏结束
-        self.game_over = True
-        messagebox.showinfo("游戏结束", "没有可移动的格子了！")
+    def check_game_state(self):
+        # 弹窗由 process_input 在本帧的按键处理完之后显示
+        state = self.engine.check_game_state()
+        if state == 'victory':
+            self.victory = True
+            self.save_replay()
+            self.save_stats(state)
+            self.pending_dialog = ("恭喜！", "你成功合成了2048！")
+        elif state == 'game_over':
+            # 没有空格子也无法合并，游戏结束
+            self.game_over = True
+            self.save_replay()
+            self.save_stats(state)
+            self.pending_dialog = ("游戏结束", "没有可移动的格子了！")
     
     def update_timer(self):
         if not self.game_over and not self.victory:
@@ -342,6 +363,24 @@ class game_2048:
             self.timer_id = self.root.after(1000, self.update_timer)
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="2048")
+    parser.add_argument('--record', metavar='PATH', help="把每局录像追加到该档案文件")
+    parser.add_argument('--stats', metavar='PATH', help="成绩记录文件（默认 ~/.tiny_game/stats.sqlite3）")
+    parser.add_argument('--profile', metavar='JSON',
+                        help=f"开启性能埋点并在退出时写出结果（也可设置环境变量 {instrument.ENV_VAR}）")
+    parser.add_argument('--size', type=int, default=6,
+                        help=f"棋盘边长（2 到 {MAX_SIZE}，大于 {DENSE_MAX_SIZE} 时使用稀疏存储）")
+    args = parser.parse_args()
+    if not 2 <= args.size <= MAX_SIZE:
+        parser.error(f"--size 必须在 2 到 {MAX_SIZE} 之间")
+    profiler = instrument.from_env(args.profile)
+    if profiler:
+        instrument.instrument_2048(profiler, game_2048)
     root = tk.Tk()
-    game = game_2048(root)
+    if profiler:
+        profiler.install_tk(root)
+    game = game_2048(root, record_path=args.record, grid_count=args.size,
+                     stats=StatsStore(args.stats))
+    if profiler:
+        instrument.attach(root, profiler)
     root.mainloop()
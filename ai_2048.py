@@ -0,0 +1,235 @@
+"""2048 的 expectimax 搜索（提示与自动游戏）
+
+在 engine_2048 的打包棋盘上搜索：玩家节点取四个方向中期望值最大的，随机节点
+按本项目真实的新方块分布（engine_2048.SPAWN_TIERS，随 largestnum 分档）对每个
+空格、每种数字求期望。每个节点同时算出两个期望：局面评估（启发式的值，
+用来选方向）和沿着所选方向一路得到的分数（游戏得分）。
+
+搜索过的随机节点存入容量有限的置换表，超出容量时淘汰最久未使用的项。
+子树中没有因概率过低而截断的结果与到达时的概率无关，按 (棋盘, 剩余深度)
+存放；有截断的结果还与概率有关，键里再加上概率的数量级（以 2 为底的指数），
+只在同一数量级的概率下复用。
+
+搜索采用迭代加深：在时间预算内逐层加深，超时则返回上一个完整深度的结果。
+"""
+import math
+import time
+from collections import OrderedDict, namedtuple
+
+from engine_2048 import (UP, DOWN, LEFT, RIGHT, move_board, get_tables,
+                         legal_mask, max_exponent, spawn_distribution)
+
+# expected: 按这个方向走下去，搜索深度内的期望游戏得分（含当前得分）；
+# value: 局面评估函数的期望值（启发式的值，只用于比较方向）
+Hint = namedtuple('Hint', 'direction expected value depth')
+
+# 局面评估的权重（对每一行和每一列分别计算后求和）
+LOST_PENALTY = 200000.0
+MONOTONICITY_POWER = 4.0
+MONOTONICITY_WEIGHT = 47.0
+SUM_POWER = 3.5
+SUM_WEIGHT = 11.0
+MERGES_WEIGHT = 700.0
+EMPTY_WEIGHT = 270.0
+
+
+class _SearchTimeout(Exception):
+    pass
+
+
+def _line_heuristic(cells):
+    """对一条线（指数列表）打分：空格多、可合并多、单调、数字集中越好"""
+    empty = 0
+    merges = 0
+    total = 0.0
+    prev = 0
+    counter = 0
+    for value in cells:
+        total += value ** SUM_POWER
+        if value == 0:
+            empty += 1
+            continue
+        if prev == value:
+            counter += 1
+        elif counter > 0:
+            merges += 1 + counter
+            counter = 0
+        prev = value
+    if counter > 0:
+        merges += 1 + counter
+
+    monotonicity_left = 0.0
+    monotonicity_right = 0.0
+    for a, b in zip(cells, cells[1:]):
+        if a > b:
+            monotonicity_left += a ** MONOTONICITY_POWER - b ** MONOTONICITY_POWER
+        else:
+            monotonicity_right += b ** MONOTONICITY_POWER - a ** MONOTONICITY_POWER
+
+    return (LOST_PENALTY + EMPTY_WEIGHT * empty + MERGES_WEIGHT * merges
+            - MONOTONICITY_WEIGHT * min(monotonicity_left, monotonicity_right)
+            - SUM_WEIGHT * total)
+
+
+class Expectimax2048:
+    """expectimax 搜索器
+
+    max_depth 为最大搜索深度（一次移动加一次生成算一层），time_budget 为每次
+    搜索的时间预算（秒，默认留出余量保证交互提示在 50 毫秒内返回），cache_size 为置换表容量，min_probability 为随机节点
+    的累计概率下限，低于它的分支直接用局面评估代替。
+    """
+
+    def __init__(self, size=6, max_depth=3, time_budget=0.04, cache_size=100000,
+                 min_probability=1e-4):
+        self.size = size
+        self.max_depth = max_depth
+        self.time_budget = time_budget
+        self.cache_size = cache_size
+        self.min_probability = min_probability
+        self.tables = get_tables(size)
+        self.cache = OrderedDict()
+        self.line_scores = {}
+        self.deadline = None
+        self.nodes = 0
+        # 因概率过低截断的次数，用来判断一棵子树的结果是否与概率无关
+        self.cutoffs = 0
+
+    def clear(self):
+        self.cache.clear()
+
+    def _line_score(self, line):
+        score = self.line_scores.get(line)
+        if score is None:
+            cells = [(line >> (4 * j)) & 0xF for j in range(self.size)]
+            score = self.line_scores[line] = _line_heuristic(cells)
+        return score
+
+    def evaluate(self, board):
+        """局面评估：所有行与所有列的线评分之和"""
+        tables = self.tables
+        row_bits = tables.row_bits
+        row_mask = tables.row_mask
+        line_score = self._line_score
+        total = 0.0
+        columns = tables.transpose(board)
+        for _ in range(self.size):
+            total += line_score(board & row_mask) + line_score(columns & row_mask)
+            board >>= row_bits
+            columns >>= row_bits
+        return total
+
+    def _cache_get(self, key):
+        value = self.cache.get(key)
+        if value is not None:
+            self.cache.move_to_end(key)
+        return value
+
+    def _cache_put(self, key, value):
+        self.cache[key] = value
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+    def _check_deadline(self):
+        if self.deadline is not None and time.perf_counter() > self.deadline:
+            raise _SearchTimeout()
+
+    def _max_node(self, board, depth, probability):
+        """返回 (评估的期望值, 得分的期望值)；得分沿评估最高的方向累计"""
+        self.nodes += 1
+        self._check_deadline()
+        best = (0.0, 0.0)
+        legal = legal_mask(board, self.size)
+        for direction in (UP, DOWN, LEFT, RIGHT):
+            # 不能移动的方向直接跳过，不必试走
+            if legal >> direction & 1:
+                moved, gained = move_board(board, direction, self.size)
+                value, score = self._chance_node(moved, depth, probability)
+                if value > best[0]:
+                    best = (value, score + gained)
+        return best
+
+    def _chance_node(self, board, depth, probability):
+        """board 为移动后、生成新数字前的局面，返回值同 _max_node"""
+        if depth <= 0:
+            return self.evaluate(board), 0.0
+        if probability < self.min_probability:
+            self.cutoffs += 1
+            return self.evaluate(board), 0.0
+        key = (board, depth)
+        cached = self._cache_get(key)
+        if cached is not None:
+            return cached
+        bucket_key = (board, depth, math.frexp(probability)[1])
+        cached = self._cache_get(bucket_key)
+        if cached is not None:
+            return cached
+
+        empty = [4 * k for k in range(self.size * self.size) if not (board >> (4 * k)) & 0xF]
+        if not empty:
+            return self.evaluate(board), 0.0
+        # 与 key_press 一致，分档依据是移动后的最大数字
+        distribution = [(value.bit_length() - 1, p)
+                        for value, p in spawn_distribution(1 << max_exponent(board))]
+        cell_probability = probability / len(empty)
+        cutoffs = self.cutoffs
+        total = 0.0
+        total_score = 0.0
+        for shift in empty:
+            self._check_deadline()
+            for exponent, p in distribution:
+                value, score = self._max_node(board | (exponent << shift), depth - 1,
+                                              cell_probability * p)
+                total += p * value
+                total_score += p * score
+        result = (total / len(empty), total_score / len(empty))
+        self._cache_put(key if self.cutoffs == cutoffs else bucket_key, result)
+        return result
+
+    def _search_depth(self, board, depth):
+        """返回 (方向, 评估的期望值, 得分的期望值)，没有可走的方向时返回 None"""
+        best = None
+        legal = legal_mask(board, self.size)
+        for direction in (UP, DOWN, LEFT, RIGHT):
+            if not legal >> direction & 1:
+                continue
+            moved, gained = move_board(board, direction, self.size)
+            value, score = self._chance_node(moved, depth, 1.0)
+            if best is None or value > best[1]:
+                best = (direction, value, score + gained)
+        return best
+
+    def search(self, board, max_depth=None, time_budget=None, score=0):
+        """对打包棋盘搜索最佳方向，返回 Hint(direction, expected, value, depth)
+
+        expected 为当前得分 score 加上按所选方向走 depth 步的期望得分；value 是
+        评估函数的期望值，只用于比较方向的优劣。没有可走的方向时 direction 为
+        None。time_budget 为 None 时使用构造参数，为 0 或负数时不限时。
+        """
+        max_depth = self.max_depth if max_depth is None else max_depth
+        time_budget = self.time_budget if time_budget is None else time_budget
+        self.deadline = time.perf_counter() + time_budget if time_budget and time_budget > 0 else None
+        self.nodes = 0
+        result = Hint(None, float(score), 0.0, 0)
+        try:
+            for depth in range(1, max_depth + 1):
+                best = self._search_depth(board, depth)
+                if best is None:
+                    break
+                result = Hint(best[0], score + best[2], best[1], depth)
+        except _SearchTimeout:
+            pass
+        finally:
+            self.deadline = None
+        # 第一层就超时时，退回到只看移动后局面评估的贪心选择
+        if result.direction is None:
+            for direction in (UP, DOWN, LEFT, RIGHT):
+                moved, gained = move_board(board, direction, self.size)
+                if moved != board:
+                    value = self.evaluate(moved)
+                    if result.direction is None or value > result.value:
+                        result = Hint(direction, float(score + gained), value, 0)
+        return result
+
+    def hint(self, engine):
+        """对 Engine2048 的当前局面给出提示，expected 为预计的得分"""
+        return self.search(engine.board, score=engine.score)
@@ -0,0 +1,184 @@
+"""2048 的移动动画
+
+一次移动分两段：先把移动的数字从起点滑到终点，再让合并出的数字和新生成的
+数字从小放大。动画不使用自己的定时器，而是由游戏的帧回调每帧调用 step()；
+新的按键到来时调用 finish() 立即跳到最终局面，所以动画不会限制输入速度。
+
+移动中的数字画在一组预先创建、平时隐藏的画布对象上（对象池，每个格子一组
+矩形 + 文字），底下固定的格子只画不参与动画的部分，动画结束后由
+BoardRenderer 画出最终局面。每次移动不创建也不删除画布对象。
+"""
+import time
+
+from engine_2048 import UP, DOWN, LEFT, RIGHT, MAX_EXPONENT
+from render_2048 import TILE_STYLES
+
+SLIDE_MS = 80
+POP_MS = 80
+# 单帧的动画工作超过这个时间就直接跳到最终局面（远程显示等较慢的环境）
+FRAME_BUDGET_MS = 12
+
+
+def line_order(direction, size, line):
+    """第 line 条线上按移动方向从前到后排列的格子编号"""
+    if direction == LEFT:
+        return [line * size + j for j in range(size)]
+    if direction == RIGHT:
+        return [line * size + j for j in range(size - 1, -1, -1)]
+    if direction == UP:
+        return [i * size + line for i in range(size)]
+    return [i * size + line for i in range(size - 1, -1, -1)]
+
+
+def slide_paths(board, direction, size):
+    """返回一次移动中每个数字的轨迹
+
+    结果为 ([(起点编号, 终点编号, 指数), ...], {合并格子编号: 合并后的指数})，
+    合并规则与 engine_2048 相同（允许连续合并）。
+    """
+    paths = []
+    merged = {}
+    for line in range(size):
+        order = line_order(direction, size, line)
+        stack = []
+        for k in order:
+            exponent = (board >> (4 * k)) & 0xF
+            if not exponent:
+                continue
+            if stack and stack[-1][0] == exponent and exponent < MAX_EXPONENT:
+                top = stack[-1]
+                top[0] += 1
+                merged[top[1]] = top[0]
+                paths.append((k, top[1], exponent))
+            else:
+                destination = order[len(stack)]
+                stack.append([exponent, destination])
+                paths.append((k, destination, exponent))
+    return paths, merged
+
+
+def _clear(board, cells):
+    for k in cells:
+        board &= ~(0xF << (4 * k))
+    return board
+
+
+def _ease(t):
+    # 先快后慢
+    return 1 - (1 - t) * (1 - t)
+
+
+class TileAnimator:
+    """用对象池播放移动动画"""
+
+    def __init__(self, canvas, renderer, size, cell_size, font):
+        self.canvas = canvas
+        self.renderer = renderer
+        self.size = size
+        self.cell_size = cell_size
+        self.pool = []
+        for _ in range(size * size):
+            rect = canvas.create_rectangle(0, 0, cell_size, cell_size, outline="", state='hidden')
+            text = canvas.create_text(cell_size / 2, cell_size / 2, text="", font=font, state='hidden')
+            self.pool.append((rect, text))
+        self.running = False
+        self.board = 0
+        self.moved_board = 0
+        self.sliding = []
+        self.popping = []
+        self.shown = 0
+        self.phase = 0
+        self.start_time = 0.0
+
+    def _origin(self, k):
+        i, j = divmod(k, self.size)
+        return j * self.cell_size, i * self.cell_size
+
+    def _show(self, index, exponent):
+        rect, text = self.pool[index]
+        fill, label, text_fill = TILE_STYLES[exponent]
+        itemconfig = self.canvas.itemconfig
+        itemconfig(rect, fill=fill, state='normal')
+        itemconfig(text, text=label, fill=text_fill, state='normal')
+
+    def _place(self, index, x, y, scale=1.0):
+        rect, text = self.pool[index]
+        half = self.cell_size / 2
+        cx = x + half
+        cy = y + half
+        radius = half * scale
+        self.canvas.coords(rect, cx - radius, cy - radius, cx + radius, cy + radius)
+        self.canvas.coords(text, cx, cy)
+
+    def _hide_all(self):
+        itemconfig = self.canvas.itemconfig
+        for index in range(self.shown):
+            rect, text = self.pool[index]
+            itemconfig(rect, state='hidden')
+            itemconfig(text, state='hidden')
+        self.shown = 0
+
+    def start(self, old_board, direction, spawn, board):
+        """播放从 old_board 向 direction 移动、再在格子 spawn（可为 None）生成新数字得到 board 的动画"""
+        self.finish()
+        paths, merged = slide_paths(old_board, direction, self.size)
+        self.board = board
+        self.moved_board = _clear(board, () if spawn is None else (spawn,))
+        # 合并的格子即使起点等于终点也要参与滑动，因为底层格子要先清空
+        sliding = [(source, target, exponent) for source, target, exponent in paths
+                   if source != target or target in merged]
+        if not sliding and spawn is None:
+            self.renderer.render(board)
+            return
+        self.sliding = []
+        for index, (source, target, exponent) in enumerate(sliding):
+            self._show(index, exponent)
+            self.sliding.append((index, self._origin(source), self._origin(target)))
+        self.shown = len(sliding)
+        self.popping = [(target, exponent, 1.25) for target, exponent in merged.items()]
+        if spawn is not None:
+            self.popping.append((spawn, (board >> (4 * spawn)) & 0xF, 0.0))
+        self.renderer.render(_clear(self.moved_board, [target for _s, target, _e in sliding]))
+        self.phase = 0
+        self.running = True
+        self.start_time = time.perf_counter()
+        self.step()
+
+    def step(self):
+        """按当前时间推进一帧，返回动画是否仍在进行"""
+        if not self.running:
+            return False
+        started = time.perf_counter()
+        elapsed = (started - self.start_time) * 1000
+        if elapsed >= SLIDE_MS + POP_MS:
+            self.finish()
+            return False
+        if elapsed < SLIDE_MS:
+            t = _ease(elapsed / SLIDE_MS)
+            for index, (x0, y0), (x1, y1) in self.sliding:
+                self._place(index, x0 + (x1 - x0) * t, y0 + (y1 - y0) * t)
+        else:
+            if self.phase == 0:
+                # 滑动结束：底层画出移动后的局面（不含合并与新数字），池中对象改放弹出的数字
+                self.phase = 1
+                self._hide_all()
+                self.renderer.render(_clear(self.moved_board, [k for k, _e, _s in self.popping]))
+                for index, (k, exponent, _scale) in enumerate(self.popping):
+                    self._show(index, exponent)
+                self.shown = len(self.popping)
+            t = _ease((elapsed - SLIDE_MS) / POP_MS)
+            for index, (k, _exponent, scale) in enumerate(self.popping):
+                x, y = self._origin(k)
+                self._place(index, x, y, scale + (1.0 - scale) * t)
+        if (time.perf_counter() - started) * 1000 > FRAME_BUDGET_MS:
+            self.finish()
+            return False
+        return True
+
+    def finish(self):
+        """立即跳到最终局面"""
+        if not self.running:
+            return
+        self.running = False
+        self._hide_all()
+        self.renderer.render(self.board)
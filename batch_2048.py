@@ -0,0 +1,185 @@
+"""2048 批量模拟器（依赖 NumPy）
+
+N 个棋盘保存在一个 (N, GRID_COUNT, GRID_COUNT) 的 uint8 数组中，元素是数字的
+指数（0 表示空）。每一步对所有棋盘同时执行各自的方向，移动、合并、得分和
+新方块的生成都是整体的数组运算，规则与 engine_2048 完全一致。
+"""
+import numpy as np
+
+from engine_2048 import (UP, DOWN, LEFT, RIGHT, MAX_EXPONENT, VICTORY_EXPONENT,
+                         SPAWN_TIERS)
+
+
+def _build_spawn_table():
+    """把 SPAWN_TIERS 转换成 (档位下限指数, 累积概率, 数字指数) 三个数组"""
+    tiers = SPAWN_TIERS[::-1]
+    width = max(len(distribution) for _, distribution in tiers)
+    thresholds = np.zeros(len(tiers), dtype=np.uint8)
+    cumulative = np.ones((len(tiers), width))
+    exponents = np.zeros((len(tiers), width), dtype=np.uint8)
+    for t, (threshold, distribution) in enumerate(tiers):
+        thresholds[t] = max(threshold, 1).bit_length() - 1
+        total = 0.0
+        for k, (value, probability) in enumerate(distribution):
+            total += probability
+            cumulative[t, k] = total
+            exponents[t, k] = value.bit_length() - 1
+        # 末项补齐到 1，避免浮点误差落在表外
+        cumulative[t, len(distribution) - 1:] = 1.0
+        exponents[t, len(distribution):] = exponents[t, len(distribution) - 1]
+    return thresholds, cumulative, exponents
+
+
+# 档位按最大数字的指数从低到高排列
+_TIER_EXPONENTS, _SPAWN_CUMULATIVE, _SPAWN_EXPONENTS = _build_spawn_table()
+
+
+def _oriented(boards, direction):
+    """返回把指定方向变换成“向左”的视图（可写）"""
+    if direction == LEFT:
+        return boards
+    if direction == RIGHT:
+        return boards[:, :, ::-1]
+    if direction == UP:
+        return boards.transpose(0, 2, 1)
+    return boards.transpose(0, 2, 1)[:, :, ::-1]
+
+
+def slide_left(rows):
+    """把 (R, n) 的指数行全部向左移动合并，返回 (新行, 每行得分)
+
+    逐列扫描、每列对所有行同时处理，规则与 engine_2048._slide_row 一致：
+    已压紧的前缀末尾与当前数字相同就合并（允许连续合并），否则接在末尾。
+    """
+    count, width = rows.shape
+    out = np.zeros_like(rows)
+    scores = np.zeros(count, dtype=np.int64)
+    filled = np.zeros(count, dtype=np.intp)
+    last = np.zeros(count, dtype=rows.dtype)
+    index = np.arange(count)
+    for k in range(width):
+        value = rows[:, k]
+        occupied = value != 0
+        merge = occupied & (filled > 0) & (last == value) & (value < MAX_EXPONENT)
+        place = occupied & ~merge
+
+        merged = index[merge]
+        out[merged, filled[merge] - 1] += 1
+        scores[merge] += np.left_shift(1, value[merge].astype(np.int64) + 1)
+        last[merge] += 1
+
+        placed = index[place]
+        out[placed, filled[place]] = value[place]
+        last[place] = value[place]
+        filled[place] += 1
+    return out, scores
+
+
+class Batch2048:
+    """同时推进 N 局 2048
+
+    boards 为 (N, size, size) 的指数数组，scores 为各局得分，largest 为各局
+    最大数字的指数（与 game_2048.largestnum 相同，只在有效移动后更新，
+    开局时为 0）。
+    """
+
+    def __init__(self, count, size=6, seed=None, rng=None):
+        self.count = count
+        self.size = size
+        self.rng = rng if rng is not None else np.random.default_rng(seed)
+        self.boards = np.zeros((count, size, size), dtype=np.uint8)
+        self.scores = np.zeros(count, dtype=np.int64)
+        self.largest = np.zeros(count, dtype=np.uint8)
+        self.moves = np.zeros(count, dtype=np.int64)
+
+    def reset(self, mask=None):
+        """重新开局；mask 为布尔数组时只重置选中的棋盘"""
+        if mask is None:
+            mask = np.ones(self.count, dtype=bool)
+        self.boards[mask] = 0
+        self.scores[mask] = 0
+        self.largest[mask] = 0
+        self.moves[mask] = 0
+        # 随机生成两个初始数字
+        self.add_new_tiles(mask)
+        self.add_new_tiles(mask)
+
+    def move(self, directions):
+        """按 directions 中各自的方向移动，不生成新数字
+
+        directions 为长度 N 的整数数组，取值 UP/DOWN/LEFT/RIGHT，负数表示该局
+        本步不动。返回 (每局得分, 每局是否变化)。
+        """
+        directions = np.asarray(directions)
+        gained = np.zeros(self.count, dtype=np.int64)
+        changed = np.zeros(self.count, dtype=bool)
+        size = self.size
+        for direction in (UP, DOWN, LEFT, RIGHT):
+            selected = np.flatnonzero(directions == direction)
+            if not len(selected):
+                continue
+            before = self.boards[selected]
+            rows = np.ascontiguousarray(_oriented(before, direction)).reshape(-1, size)
+            moved, scores = slide_left(rows)
+            after = np.empty_like(before)
+            _oriented(after, direction)[...] = moved.reshape(-1, size, size)
+            gained[selected] = scores.reshape(-1, size).sum(axis=1)
+            changed[selected] = (after != before).any(axis=(1, 2))
+            self.boards[selected] = after
+
+        self.scores += gained
+        self.moves += changed
+        # 与 key_press 一致：有效移动后、生成新数字前更新最大数字
+        if changed.any():
+            self.largest[changed] = self.boards[changed].max(axis=(1, 2))
+        return gained, changed
+
+    def add_new_tiles(self, mask):
+        """在 mask 选中的每个棋盘上随机选一个空格生成新数字"""
+        selected = np.flatnonzero(mask)
+        if not len(selected):
+            return
+        flat = self.boards[selected].reshape(len(selected), -1)
+        empty = flat == 0
+        has_empty = empty.any(axis=1)
+        # 对空格取随机键再取最大值，相当于在空格中均匀选择
+        keys = self.rng.random(flat.shape)
+        keys[~empty] = -1.0
+        cells = keys.argmax(axis=1)
+
+        tiers = np.searchsorted(_TIER_EXPONENTS, self.largest[selected], side='right') - 1
+        draws = self.rng.random(len(selected))
+        picks = (draws[:, None] >= _SPAWN_CUMULATIVE[tiers]).sum(axis=1)
+        values = _SPAWN_EXPONENTS[tiers, picks]
+
+        rows = np.flatnonzero(has_empty)
+        flat[rows, cells[rows]] = values[rows]
+        self.boards[selected] = flat.reshape(-1, self.size, self.size)
+
+    def step(self, directions):
+        """移动并在变化的棋盘上生成新数字，返回 (每局得分, 每局是否变化)"""
+        gained, changed = self.move(directions)
+        self.add_new_tiles(changed)
+        return gained, changed
+
+    def victory(self):
+        """返回每局是否已合成 2048"""
+        return self.boards.max(axis=(1, 2)) >= VICTORY_EXPONENT
+
+    def can_move(self):
+        """返回每局是否还有空格或可以合并的相邻数字"""
+        boards = self.boards
+        mergeable = boards < MAX_EXPONENT
+        empty = (boards == 0).any(axis=(1, 2))
+        horizontal = ((boards[:, :, 1:] == boards[:, :, :-1]) & mergeable[:, :, 1:]).any(axis=(1, 2))
+        vertical = ((boards[:, 1:, :] == boards[:, :-1, :]) & mergeable[:, 1:, :]).any(axis=(1, 2))
+        return empty | horizontal | vertical
+
+    def game_over(self):
+        return ~self.can_move()
+
+    def values(self):
+        """返回数字形式的棋盘 (N, size, size)，空格为 0"""
+        values = np.left_shift(1, self.boards.astype(np.int64))
+        values[self.boards == 0] = 0
+        return values
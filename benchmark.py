@@ -0,0 +1,307 @@
+"""两个游戏热点路径的基准测试
+
+覆盖 2048 的移动（move、add_new_tile、check_game_state）与画布刷新
+（update_grid_cells），以及扫雷的地雷生成（place_mines +
+MineBoard.load）、连锁翻开（reveal_cell）和整盘重置（reset_game）。每项在若干棋盘尺寸上运行，结果以 JSON 输出，可以用
+--compare 与另一次提交的结果对比。
+
+需要界面的项目在虚拟显示上运行：已有 DISPLAY 时直接使用，否则尝试启动
+Xvfb；两者都没有时这些项目记为跳过。
+
+用法：python benchmark.py --out bench.json
+      python benchmark.py --quick --compare old.json
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import time
+
+from sparse_2048 import create_engine
+
+# 16 和 64 走稀疏引擎
+SIZES_2048 = (4, 6, 8, 16, 64)
+# 扫雷尺寸与地雷数，密度与默认的 15x15/40 相同
+SIZES_MINESWEEPER = (15, 30, 60)
+MINE_DENSITY = 40 / 225
+
+
+def measure(func, min_time=0.2, min_runs=3, setup=None):
+    """反复调用 func 直到计时累计超过 min_time，返回统计结果
+
+    func 返回本次调用完成的操作数（None 视为 1）；setup 在每次调用前执行，
+    不计入时间。
+    """
+    runs = []
+    total_ops = 0
+    total = 0.0
+    while len(runs) < min_runs or total < min_time:
+        if setup is not None:
+            setup()
+        t0 = time.perf_counter()
+        ops = func()
+        elapsed = time.perf_counter() - t0
+        ops = 1 if ops is None else ops
+        total += elapsed
+        total_ops += ops
+        runs.append(elapsed / ops if ops else elapsed)
+    return {
+        'runs': len(runs),
+        'ops_per_sec': total_ops / total if total else 0.0,
+        'best_us': min(runs) * 1e6,
+        'mean_us': sum(runs) / len(runs) * 1e6,
+    }
+
+
+# ---------------------------------------------------------------- 2048
+
+def bench_2048_moves(size, min_time):
+    """引擎的完整一步：move + add_new_tile + check_game_state"""
+    rng = random.Random(size)
+    engine = create_engine(size, random.Random(size))
+    engine.reset()
+
+    def run():
+        for _ in range(1000):
+            direction = rng.randrange(4)
+            _gained, changed = engine.move(direction)
+            if changed:
+                engine.add_new_tile()
+            if engine.check_game_state():
+                engine.reset()
+        return 1000
+    return measure(run, min_time)
+
+
+def bench_2048_update_grid_cells(root, size, min_time):
+    """每帧画布刷新：走一步后调用 update_grid_cells"""
+    from importlib import util
+    spec = util.spec_from_file_location('game_2048_gui', os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), '2048_game.py'))
+    module = util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    frame_root = _toplevel(root)
+    game = module.game_2048(frame_root, grid_count=size)
+    root.after_cancel(game.timer_id)
+    rng = random.Random(size)
+
+    def run():
+        for _ in range(100):
+            if game.engine.check_game_state():
+                game.engine.reset()
+            game.engine.step(rng.randrange(4))
+            game.update_grid_cells()
+        root.update_idletasks()
+        return 100
+    try:
+        return measure(run, min_time)
+    finally:
+        frame_root.destroy()
+
+
+# ---------------------------------------------------------------- 扫雷
+
+def bench_generate_mines(size, min_time):
+    """地雷生成的纯数据部分（Minesweeper.generate_mines 的主体）：布雷并计算数字"""
+    from board_minesweeper import MineBoard
+    from minefield import place_mines
+    mines = int(size * size * MINE_DENSITY)
+    rng = random.Random(size)
+    board = MineBoard(size)
+
+    def run():
+        board.load(place_mines(size, mines, rng.randrange(size), rng.randrange(size), rng))
+    return measure(run, min_time, setup=board.reset)
+
+
+@contextlib.contextmanager
+def _quiet_messageboxes():
+    """测量时屏蔽游戏结束等弹窗"""
+    import minesweeper
+    original = minesweeper.messagebox.showinfo
+    minesweeper.messagebox.showinfo = lambda *args, **kwargs: None
+    try:
+        yield
+    finally:
+        minesweeper.messagebox.showinfo = original
+
+
+def _minesweeper_gui(root, size, rng):
+    from minesweeper import Minesweeper
+    mines = int(size * size * MINE_DENSITY)
+    return Minesweeper(_toplevel(root), rng=rng, grid_count=size, mine_count=mines)
+
+
+def bench_reveal_cell(root, size, min_time):
+    """连锁翻开：低密度地雷下从角落翻开一大片，操作数为翻开的格子数"""
+    rng = random.Random(size)
+    game = _minesweeper_gui(root, size, rng)
+    game.MINE_COUNT = max(1, size * size // 50)
+
+    def setup():
+        game.reset_game()
+        game.first_click = False
+        game.generate_mines(0, 0)
+
+    def run():
+        game.reveal_cell(0, 0)
+        root.update_idletasks()
+        return game.board.revealed_count()
+    try:
+        with _quiet_messageboxes():
+            return measure(run, min_time, setup=setup)
+    finally:
+        game.root.destroy()
+
+
+def bench_minesweeper_reset(root, size, min_time):
+    """整盘重置：reset_game 重新配置每个按钮"""
+    game = _minesweeper_gui(root, size, random.Random(size))
+
+    def run():
+        game.reset_game()
+        root.update_idletasks()
+    try:
+        return measure(run, min_time)
+    finally:
+        game.root.destroy()
+
+
+# ---------------------------------------------------------------- 运行
+
+def _toplevel(root):
+    import tkinter as tk
+    return tk.Toplevel(root)
+
+
+@contextlib.contextmanager
+def virtual_display():
+    """保证有可用的显示，返回其名字；无法提供时返回 None"""
+    if os.environ.get('DISPLAY'):
+        yield os.environ['DISPLAY']
+        return
+    xvfb = shutil.which('Xvfb')
+    if not xvfb:
+        yield None
+        return
+    display = ':%d' % (90 + os.getpid() % 100)
+    process = subprocess.Popen([xvfb, display, '-screen', '0', '1920x1080x24', '-nolisten', 'tcp'],
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    os.environ['DISPLAY'] = display
+    try:
+        time.sleep(0.5)
+        yield display if process.poll() is None else None
+    finally:
+        del os.environ['DISPLAY']
+        process.terminate()
+        process.wait()
+
+
+def _run_one(results, name, size, func, *args):
+    entry = {'name': name, 'size': size}
+    try:
+        entry.update(func(*args))
+    except RecursionError:
+        entry['error'] = 'RecursionError'
+    except Exception as error:
+        entry['error'] = f"{type(error).__name__}: {error}"
+    results.append(entry)
+    print(f"  {name:<28} {size:>4}  " + (
+        f"{entry['ops_per_sec']:>12.1f} ops/s" if 'ops_per_sec' in entry else entry['error']),
+        file=sys.stderr)
+
+
+def run_all(min_time=0.2):
+    results = []
+    for size in SIZES_2048:
+        _run_one(results, '2048.move', size, bench_2048_moves, size, min_time)
+    for size in SIZES_MINESWEEPER:
+        _run_one(results, 'minesweeper.generate_mines', size, bench_generate_mines, size, min_time)
+
+    with virtual_display() as display:
+        if display is None:
+            for name, sizes in (('2048.update_grid_cells', SIZES_2048),
+                                ('minesweeper.reveal_cell', SIZES_MINESWEEPER),
+                                ('minesweeper.reset_game', SIZES_MINESWEEPER)):
+                for size in sizes:
+                    results.append({'name': name, 'size': size, 'skipped': "没有可用的显示"})
+        else:
+            import tkinter as tk
+            root = tk.Tk()
+            root.withdraw()
+            try:
+                for size in SIZES_2048:
+                    _run_one(results, '2048.update_grid_cells', size,
+                             bench_2048_update_grid_cells, root, size, min_time)
+                for size in SIZES_MINESWEEPER:
+                    _run_one(results, 'minesweeper.reveal_cell', size,
+                             bench_reveal_cell, root, size, min_time)
+                for size in SIZES_MINESWEEPER:
+                    _run_one(results, 'minesweeper.reset_game', size,
+                             bench_minesweeper_reset, root, size, min_time)
+            finally:
+                root.destroy()
+
+    return {'meta': _metadata(), 'results': results}
+
+
+def _metadata():
+    commit = None
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'],
+                                cwd=os.path.dirname(os.path.abspath(__file__)),
+                                capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        pass
+    return {
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+
+
+def compare(current, baseline):
+    """按 (名称, 尺寸) 对比两次结果的吞吐量，返回 [(名称, 尺寸, 旧, 新, 倍数)]"""
+    old = {(r['name'], r['size']): r for r in baseline['results'] if 'ops_per_sec' in r}
+    rows = []
+    for result in current['results']:
+        key = (result['name'], result['size'])
+        if 'ops_per_sec' in result and key in old:
+            before = old[key]['ops_per_sec']
+            after = result['ops_per_sec']
+            rows.append((key[0], key[1], before, after, after / before if before else float('inf')))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="2048 与扫雷的基准测试")
+    parser.add_argument('--out', help="把 JSON 结果写入文件（默认输出到标准输出）")
+    parser.add_argument('--quick', action='store_true', help="缩短每项的测量时间")
+    parser.add_argument('--compare', metavar='JSON', help="与之前保存的结果对比")
+    args = parser.parse_args(argv)
+
+    report = run_all(min_time=0.05 if args.quick else 0.5)
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            f.write(text)
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        print(f"\n与 {baseline['meta'].get('commit')} 对比：", file=sys.stderr)
+        for name, size, before, after, ratio in compare(report, baseline):
+            print(f"  {name:<28} {size:>4}  {before:>12.1f} -> {after:>12.1f}  x{ratio:.2f}",
+                  file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+"""扫雷棋盘状态的紧凑表示
+
+每个格子占一个字节，整盘存放在一个 bytearray 中，编号与 minefield 相同
+（k = x * size + y）：
+
+    位 0~3  周围地雷数
+    位 4    地雷
+    位 5    已翻开
+    位 6    已插旗
+
+百万格的棋盘只占 1 MB，重置时原地清零，不重新分配内存。有 NumPy 时清零、
+布雷和“所有未翻开的安全格子”之类的整体查询直接在同一块内存的数组视图上
+计算，查询结果为 NumPy 数组；没有时退回逐格的纯 Python 实现，结果为列表。
+
+grid / revealed / flagged 是兼容旧代码的只读视图，支持 view[x][y]。
+"""
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from minefield import neighbor_count_array, neighbor_count_list
+
+COUNT_MASK = 0x0F
+MINE = 0x10
+REVEALED = 0x20
+FLAGGED = 0x40
+
+
+class _Column:
+    __slots__ = ('cells', 'base', 'size', 'read')
+
+    def __init__(self, cells, base, size, read):
+        self.cells = cells
+        self.base = base
+        self.size = size
+        self.read = read
+
+    def __getitem__(self, y):
+        if not 0 <= y < self.size:
+            raise IndexError(y)
+        return self.read(self.cells[self.base + y])
+
+    def __len__(self):
+        return self.size
+
+    def __iter__(self):
+        read = self.read
+        return (read(value) for value in self.cells[self.base:self.base + self.size])
+
+
+class _View:
+    """按 [x][y] 读取某一种状态的只读视图"""
+    __slots__ = ('board', 'read')
+
+    def __init__(self, board, read):
+        self.board = board
+        self.read = read
+
+    def __getitem__(self, x):
+        size = self.board.size
+        if not 0 <= x < size:
+            raise IndexError(x)
+        return _Column(self.board.cells, x * size, size, self.read)
+
+    def __len__(self):
+        return self.board.size
+
+    def __iter__(self):
+        return (self[x] for x in range(self.board.size))
+
+
+# 把状态字节映射为 0/1，用于按块统计
+REVEALED_TABLE = bytes(1 if value & REVEALED else 0 for value in range(256))
+FLAGGED_TABLE = bytes(1 if value & FLAGGED else 0 for value in range(256))
+
+
+def _read_count(value):
+    return -1 if value & MINE else value & COUNT_MASK
+
+
+def _read_revealed(value):
+    return bool(value & REVEALED)
+
+
+def _read_flagged(value):
+    return bool(value & FLAGGED)
+
+
+class MineBoard:
+    """一盘扫雷的地雷、数字、翻开和旗子状态"""
+
+    def __init__(self, size):
+        self.size = size
+        self.cells = bytearray(size * size)
+        # 与 cells 共享内存的数组视图，用于整体运算；没有 NumPy 时用全零缓冲区覆盖来清空
+        self.array = np.frombuffer(self.cells, dtype=np.uint8) if np is not None else None
+        self._zero = bytes(size * size) if np is None else None
+        self.grid = _View(self, _read_count)
+        self.revealed = _View(self, _read_revealed)
+        self.flagged = _View(self, _read_flagged)
+
+    def reset(self):
+        """原地清空全部状态"""
+        if self.array is not None:
+            self.array.fill(0)
+        else:
+            self.cells[:] = self._zero
+
+    def load(self, mines):
+        """放置地雷（格子编号序列）并计算每个格子周围的地雷数，保留翻开和旗子状态"""
+        cells = self.cells
+        if self.array is not None:
+            field, counts = neighbor_count_array(mines, self.size)
+            array = self.array
+            array &= REVEALED | FLAGGED
+            array |= counts.reshape(-1) | (field.reshape(-1) << 4)
+            return
+        for k, count in enumerate(neighbor_count_list(mines, self.size)):
+            cells[k] = (cells[k] & (REVEALED | FLAGGED)) | count
+        for k in mines:
+            cells[k] |= MINE
+
+    def cell(self, x, y):
+        """(x, y) 的状态字节"""
+        return self.cells[x * self.size + y]
+
+    def block_summary(self, x0, y0, scale):
+        """从 (x0, y0) 开始 scale x scale 区域内 (已翻开的格子数, 插旗的格子数)，超出棋盘的部分不计"""
+        size = self.size
+        cells = self.cells
+        y1 = min(y0 + scale, size)
+        revealed = flagged = 0
+        for x in range(x0, min(x0 + scale, size)):
+            column = cells[x * size + y0:x * size + y1]
+            revealed += column.translate(REVEALED_TABLE).count(1)
+            flagged += column.translate(FLAGGED_TABLE).count(1)
+        return revealed, flagged
+
+    def is_mine(self, k):
+        return bool(self.cells[k] & MINE)
+
+    def count(self, k):
+        return self.cells[k] & COUNT_MASK
+
+    def is_revealed(self, k):
+        return bool(self.cells[k] & REVEALED)
+
+    def is_flagged(self, k):
+        return bool(self.cells[k] & FLAGGED)
+
+    def set_revealed(self, k):
+        self.cells[k] |= REVEALED
+
+    def toggle_flag(self, k):
+        """切换旗子，返回切换后是否插着旗"""
+        self.cells[k] ^= FLAGGED
+        return bool(self.cells[k] & FLAGGED)
+
+    def flood(self, k):
+        """翻开 k 及连锁翻开的格子（跳过插旗的），返回这些格子的编号列表
+
+        k 本身不检查是否为地雷或已翻开，由调用方负责。
+        """
+        cells = self.cells
+        size = self.size
+        last = size - 1
+        cells[k] |= REVEALED
+        opened = [k]
+        # 栈中只放空白格子（不是地雷、周围也没有地雷），数字格子翻开后不再展开
+        stack = [k] if not cells[k] & (MINE | COUNT_MASK) else []
+        blocked = REVEALED | FLAGGED
+        while stack:
+            c = stack.pop()
+            x, y = divmod(c, size)
+            min_y = y - 1 if y > 0 else 0
+            max_y = y + 2 if y < last else size
+            for nx in range(x - 1 if x > 0 else 0, x + 2 if x < last else size):
+                base = nx * size
+                for n in range(base + min_y, base + max_y):
+                    value = cells[n]
+                    if not value & blocked:
+                        cells[n] = value | REVEALED
+                        opened.append(n)
+                        if not value & COUNT_MASK:
+                            stack.append(n)
+        return opened
+
+    def _select(self, mask, value):
+        """(格子状态 & mask) == value 的全部格子编号"""
+        if self.array is not None:
+            return np.flatnonzero((self.array & mask) == value)
+        return [k for k, state in enumerate(self.cells) if state & mask == value]
+
+    def _tally(self, mask, value):
+        if self.array is not None:
+            return int(np.count_nonzero((self.array & mask) == value))
+        return sum(1 for state in self.cells if state & mask == value)
+
+    def mine_cells(self):
+        return self._select(MINE, MINE)
+
+    def flagged_cells(self):
+        return self._select(FLAGGED, FLAGGED)
+
+    def revealed_cells(self):
+        return self._select(REVEALED, REVEALED)
+
+    def unrevealed_safe_cells(self):
+        """所有未翻开的安全格子"""
+        return self._select(MINE | REVEALED, 0)
+
+    def revealed_count(self):
+        return self._tally(REVEALED, REVEALED)
+
+    def wrong_flag_count(self):
+        """插在安全格子上的旗子数"""
+        return self._tally(MINE | FLAGGED, FLAGGED)
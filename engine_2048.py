@@ -0,0 +1,500 @@
+"""2048 无界面引擎
+
+棋盘按位打包成一个整数：每个格子占 4 位，保存数字的指数（0 表示空，1 表示 2，
+11 表示 2048）。格子 (i, j) 位于第 4*(i*n + j) 位，因此每一行是一段连续的
+4*n 位，向左移动即是把每行的低位方向压紧。
+
+每条线（行或列）的移动结果按线值缓存在转移表中，表项同时记录得分和是否
+变化。列的移动先转置棋盘，再查列表，列表的结果直接落在列的位置上，所以只
+需要转置一次。转置使用按字节预先计算好的散布表。
+"""
+import random
+
+# 方向常量
+UP, DOWN, LEFT, RIGHT = 0, 1, 2, 3
+DIRECTIONS = {'Up': UP, 'Down': DOWN, 'Left': LEFT, 'Right': RIGHT}
+
+# 单个格子能表示的最大指数（4 位），即 32768
+MAX_EXPONENT = 15
+VICTORY_EXPONENT = 11
+
+# 新方块的概率分布：(最大数字下限, ((数字, 概率), ...))，从高档位到低档位排列，
+# 与 Engine2048.spawn_value 中的分支一一对应
+SPAWN_TIERS = (
+    (256, ((32, 0.2), (16, 0.1), (128, 0.05), (2, 0.05), (4, 0.3), (8, 0.3))),
+    (32, ((32, 0.05), (16, 0.1), (8, 0.1), (2, 0.05), (4, 0.7))),
+    (8, ((8, 0.1), (4, 0.2), (2, 0.7))),
+    (0, ((2, 0.9), (4, 0.1))),
+)
+
+
+def spawn_distribution(largestnum):
+    """返回当前最大数字对应的新方块分布 ((数字, 概率), ...)"""
+    for threshold, distribution in SPAWN_TIERS:
+        if largestnum >= threshold:
+            return distribution
+    return SPAWN_TIERS[-1][1]
+
+
+def build_alias_table(distribution):
+    """按 Vose 别名法把 ((数字, 概率), ...) 转换成 [(接受概率, 数字, 别名数字), ...]
+
+    采样时取一个均匀随机数 u，槽位为 int(u*n)，小数部分小于接受概率取本槽的
+    数字，否则取别名，整个过程与分布的项数无关。
+    """
+    n = len(distribution)
+    total = sum(p for _, p in distribution)
+    scaled = [p * n / total for _, p in distribution]
+    accept = [1.0] * n
+    alias = list(range(n))
+    small = [k for k, p in enumerate(scaled) if p < 1.0]
+    large = [k for k, p in enumerate(scaled) if p >= 1.0]
+    while small and large:
+        s = small.pop()
+        l = large.pop()
+        accept[s] = scaled[s]
+        alias[s] = l
+        scaled[l] -= 1.0 - scaled[s]
+        (small if scaled[l] < 1.0 else large).append(l)
+    values = [value for value, _ in distribution]
+    return [(accept[k], values[k], values[alias[k]]) for k in range(n)]
+
+
+# 每个档位对应的别名表，与 SPAWN_TIERS 同序
+SPAWN_ALIAS = tuple((threshold, build_alias_table(distribution))
+                    for threshold, distribution in SPAWN_TIERS)
+
+
+def spawn_alias(largestnum):
+    """返回当前最大数字对应档位的别名表"""
+    for threshold, table in SPAWN_ALIAS:
+        if largestnum >= threshold:
+            return table
+    return SPAWN_ALIAS[-1][1]
+
+
+def sample_alias(table, rand):
+    """用一个 [0, 1) 的均匀随机数从别名表中取一个数字"""
+    x = rand * len(table)
+    slot = int(x)
+    accept, value, alias = table[slot]
+    return value if x - slot < accept else alias
+
+
+def _slide_row(cells):
+    """把一行指数向左移动合并，返回 (新的一行, 得分)
+
+    与原先 game_2048.move 的逐格移动逻辑保持一致：每个格子依次向左滑到底，
+    再与相邻的相同数字合并，所以同一次移动中允许连续合并。
+    达到 MAX_EXPONENT 的格子不再合并，避免超出 4 位。
+    """
+    cells = list(cells)
+    score = 0
+    for k in range(1, len(cells)):
+        if cells[k] == 0:
+            continue
+        pos = k
+        while pos > 0 and cells[pos - 1] == 0:
+            cells[pos - 1] = cells[pos]
+            cells[pos] = 0
+            pos -= 1
+        if pos > 0 and cells[pos - 1] == cells[pos] and cells[pos] < MAX_EXPONENT:
+            cells[pos - 1] += 1
+            score += 1 << cells[pos - 1]
+            cells[pos] = 0
+    return cells, score
+
+
+class _Tables:
+    """某一棋盘尺寸下的行/列转移表与转置表
+
+    lines[direction] 把一条线（行或转置后的列）的值映射为
+    (移动后的值, 得分, 是否变化, 移动后的最大指数)，按需填充。左右移动的结果是行值；
+    上下移动的结果已经散布到第 0 列的位置上，按列号左移即可拼回棋盘，
+    因此列移动只需要转置一次。
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.row_bits = 4 * size
+        self.row_mask = (1 << self.row_bits) - 1
+        self.lines = ({}, {}, {}, {})
+        self._build_masks()
+        self.transpose_table = self._build_transpose()
+
+    def _build_masks(self):
+        """按格子的最低位构造的掩码，用于整盘并行的位运算"""
+        n = self.size
+        self.low_bits = 0
+        self.has_right = 0
+        for i in range(n):
+            for j in range(n):
+                bit = 1 << (4 * (i * n + j))
+                self.low_bits |= bit
+                if j < n - 1:
+                    self.has_right |= bit
+        # 除最后一行外的格子都有下方相邻格
+        self.has_below = self.low_bits & ((1 << (4 * n * (n - 1))) - 1)
+
+    def _unpack(self, row):
+        return [(row >> (4 * j)) & 0xF for j in range(self.size)]
+
+    def line_entry(self, direction, line):
+        """计算并缓存一条线的移动结果"""
+        cells = self._unpack(line)
+        if direction in (RIGHT, DOWN):
+            cells, score = _slide_row(cells[::-1])
+            cells.reverse()
+        else:
+            cells, score = _slide_row(cells)
+        # 左右移动按行内偏移打包，上下移动按列内偏移（每格相隔一整行）打包
+        step = 4 if direction in (LEFT, RIGHT) else self.row_bits
+        result = 0
+        for j, value in enumerate(cells):
+            result |= value << (step * j)
+        unchanged = cells == self._unpack(line)
+        entry = (result, score, not unchanged, max(cells))
+        self.lines[direction][line] = entry
+        return entry
+
+    def _build_transpose(self):
+        """table[i][k][byte]：第 i 行第 k 个字节（两格）转置后在棋盘中的位置"""
+        n = self.size
+        table = []
+        for i in range(n):
+            row_tables = []
+            for k in range((n + 1) // 2):
+                entries = []
+                for byte in range(256):
+                    spread = 0
+                    for half in range(2):
+                        j = 2 * k + half
+                        if j >= n:
+                            break
+                        value = (byte >> (4 * half)) & 0xF
+                        spread |= value << (4 * (j * n + i))
+                    entries.append(spread)
+                row_tables.append(entries)
+            table.append(row_tables)
+        return table
+
+    def transpose(self, board):
+        result = 0
+        row_bits = self.row_bits
+        row_mask = self.row_mask
+        for row_tables in self.transpose_table:
+            row = board & row_mask
+            board >>= row_bits
+            for entries in row_tables:
+                result |= entries[row & 0xFF]
+                row >>= 8
+        return result
+
+
+_TABLES = {}
+
+
+def get_tables(size):
+    tables = _TABLES.get(size)
+    if tables is None:
+        tables = _TABLES[size] = _Tables(size)
+    return tables
+
+
+def move_board_with_max(board, direction, size):
+    """对打包后的棋盘执行一次移动，返回 (新棋盘, 得分, 新棋盘的最大指数)"""
+    tables = get_tables(size)
+    table = tables.lines[direction]
+    row_bits = tables.row_bits
+    row_mask = tables.row_mask
+    if direction == LEFT or direction == RIGHT:
+        source = board
+        out_step = row_bits
+    else:
+        # 转置后每一行就是原棋盘的一列
+        source = tables.transpose(board)
+        out_step = 4
+    new_board = 0
+    score = 0
+    top = 0
+    shift = 0
+    for i in range(size):
+        line = source & row_mask
+        source >>= row_bits
+        entry = table.get(line) or tables.line_entry(direction, line)
+        new_board |= entry[0] << shift
+        score += entry[1]
+        if entry[3] > top:
+            top = entry[3]
+        shift += out_step
+    return new_board, score, top
+
+
+def move_board(board, direction, size):
+    """对打包后的棋盘执行一次移动，返回 (新棋盘, 得分)"""
+    new_board, score, _top = move_board_with_max(board, direction, size)
+    return new_board, score
+
+
+def legal_mask(board, size):
+    """返回可移动方向的位掩码，第 d 位对应方向 d
+
+    对整块棋盘做固定次数的位运算：每个格子的最低位表示“有数字”“为空”
+    “与右侧/下方相同”等，再按方向组合，与棋盘上的数字个数无关。
+    """
+    tables = get_tables(size)
+    low = tables.low_bits
+    right = tables.has_right
+    below = tables.has_below
+    vertical = tables.row_bits
+
+    occupied = (board | board >> 1 | board >> 2 | board >> 3) & low
+    empty = low ^ occupied
+    # 达到最大指数的格子不能再合并
+    saturated = board & board >> 1 & board >> 2 & board >> 3 & low
+    mergeable = occupied & ~saturated
+
+    mask = 0
+    diff = board ^ (board >> 4)
+    same_right = ~(diff | diff >> 1 | diff >> 2 | diff >> 3) & right & mergeable
+    if same_right or empty & (occupied >> 4) & right:
+        mask |= 1 << LEFT
+    if same_right or occupied & (empty >> 4) & right:
+        mask |= 1 << RIGHT
+    diff = board ^ (board >> vertical)
+    same_below = ~(diff | diff >> 1 | diff >> 2 | diff >> 3) & below & mergeable
+    if same_below or empty & (occupied >> vertical) & below:
+        mask |= 1 << UP
+    if same_below or occupied & (empty >> vertical) & below:
+        mask |= 1 << DOWN
+    return mask
+
+
+def get_cell(board, i, j, size):
+    """返回格子 (i, j) 的指数"""
+    return (board >> (4 * (i * size + j))) & 0xF
+
+
+def board_to_grid(board, size):
+    """把打包棋盘转换成数字二维列表（0 表示空）"""
+    grid = []
+    for _ in range(size):
+        row = []
+        for _ in range(size):
+            exponent = board & 0xF
+            row.append(1 << exponent if exponent else 0)
+            board >>= 4
+        grid.append(row)
+    return grid
+
+
+def grid_to_board(grid):
+    """把数字二维列表打包成棋盘整数"""
+    size = len(grid)
+    board = 0
+    for i, row in enumerate(grid):
+        for j, value in enumerate(row):
+            if value:
+                board |= (value.bit_length() - 1) << (4 * (i * size + j))
+    return board
+
+
+def empty_cells(board, size):
+    """返回所有空格子的位置编号 i*size + j"""
+    return [k for k in range(size * size) if not (board >> (4 * k)) & 0xF]
+
+
+def max_exponent(board):
+    result = 0
+    while board:
+        exponent = board & 0xF
+        if exponent > result:
+            result = exponent
+        board >>= 4
+    return result
+
+
+class FreeCells:
+    """空格子的索引集合，支持 O(1) 的加入、删除和均匀随机选取
+
+    cells 保存所有空格子的编号，position[k] 为编号 k 在 cells 中的下标，
+    不是空格时为 -1。删除时把末尾元素换到被删位置。
+    """
+
+    def __init__(self, count):
+        self.cells = []
+        self.position = [-1] * count
+
+    def rebuild(self, board):
+        self.cells = []
+        position = self.position
+        for k in range(len(position)):
+            if (board >> (4 * k)) & 0xF:
+                position[k] = -1
+            else:
+                position[k] = len(self.cells)
+                self.cells.append(k)
+
+    def restore(self, cells):
+        """按给定顺序恢复集合（用于从快照恢复，保证之后的随机抽取一致）"""
+        position = self.position
+        for k in self.cells:
+            position[k] = -1
+        self.cells = list(cells)
+        for index, k in enumerate(self.cells):
+            position[k] = index
+
+    def add(self, k):
+        if self.position[k] < 0:
+            self.position[k] = len(self.cells)
+            self.cells.append(k)
+
+    def remove(self, k):
+        index = self.position[k]
+        if index < 0:
+            return
+        last = self.cells.pop()
+        if last != k:
+            self.cells[index] = last
+            self.position[last] = index
+        self.position[k] = -1
+
+    def choice(self, rng):
+        cells = self.cells
+        return cells[int(rng.random() * len(cells))]
+
+    def __len__(self):
+        return len(self.cells)
+
+
+class Engine2048:
+    """一局 2048 的状态与规则，不依赖 tkinter"""
+
+    def __init__(self, size=6, rng=None):
+        self.size = size
+        self.rng = rng if rng is not None else random
+        self.tables = get_tables(size)
+        # 空格子集合随着移动和生成增量维护
+        self.free = FreeCells(size * size)
+        # 可移动方向的位掩码与最大指数，随棋盘变化一起更新
+        self.legal_moves = 0
+        self.max_exp = 0
+        self.board = 0
+        self.score = 0
+        self.largestnum = 0
+
+    @property
+    def board(self):
+        return self._board
+
+    @board.setter
+    def board(self, board):
+        # 从外部直接设置棋盘时重建索引
+        self._board = board
+        self.free.rebuild(board)
+        self.max_exp = max_exponent(board)
+        self.legal_moves = legal_mask(board, self.size)
+
+    def _apply_diff(self, old_board, new_board):
+        """按两块棋盘的差异更新空格集合与可移动方向"""
+        free = self.free
+        diff = old_board ^ new_board
+        while diff:
+            k = ((diff & -diff).bit_length() - 1) >> 2
+            shift = 4 * k
+            diff &= ~(0xF << shift)
+            if (new_board >> shift) & 0xF:
+                free.remove(k)
+            else:
+                free.add(k)
+        self.legal_moves = legal_mask(new_board, self.size)
+
+    def reset(self):
+        self.board = 0
+        self.score = 0
+        self.largestnum = 0
+        # 随机生成两个初始数字
+        self.add_new_tile()
+        self.add_new_tile()
+
+    def snapshot(self):
+        """返回当前局面 (棋盘, 得分, largestnum)；棋盘是不可变整数，直接共享"""
+        return self._board, self.score, self.largestnum
+
+    def restore(self, state):
+        """恢复 snapshot() 返回的局面，只更新与当前棋盘不同的格子"""
+        board, self.score, self.largestnum = state
+        old_board = self._board
+        self._board = board
+        self._apply_diff(old_board, board)
+        self.max_exp = max_exponent(board)
+
+    def move(self, direction):
+        """执行一次移动，返回 (得分, 是否变化)；不生成新数字"""
+        # 不能移动的方向直接跳过
+        if not self.legal_moves >> direction & 1:
+            return 0, False
+        old_board = self._board
+        new_board, gained, top = move_board_with_max(old_board, direction, self.size)
+        self._board = new_board
+        self._apply_diff(old_board, new_board)
+        self.score += gained
+        # 最大数字只会因合并而变大
+        if top > self.max_exp:
+            self.max_exp = top
+        self.largestnum = 1 << self.max_exp
+        return gained, True
+
+    def step(self, direction):
+        """移动并在棋盘变化时生成新数字，与按键处理的流程一致"""
+        gained, changed = self.move(direction)
+        if changed:
+            self.add_new_tile()
+        return gained, changed
+
+    def spawn_value(self):
+        # 根据当前最大数字所在档位的别名表决定新方块
+        return sample_alias(spawn_alias(self.largestnum), self.rng.random())
+
+    def add_new_tile(self):
+        if not self.free:
+            return None
+        k = self.free.choice(self.rng)
+        value = self.spawn_value()
+        exponent = value.bit_length() - 1
+        old_board = self._board
+        self._board = old_board | (exponent << (4 * k))
+        self._apply_diff(old_board, self._board)
+        if exponent > self.max_exp:
+            self.max_exp = exponent
+        return divmod(k, self.size), value
+
+    def get(self, i, j):
+        """返回格子 (i, j) 上的数字，空格为 0"""
+        exponent = get_cell(self.board, i, j, self.size)
+        return 1 << exponent if exponent else 0
+
+    @property
+    def grid(self):
+        return board_to_grid(self.board, self.size)
+
+    @property
+    def empty_count(self):
+        return len(self.free)
+
+    def legal_directions(self):
+        return [d for d in (UP, DOWN, LEFT, RIGHT) if self.legal_moves >> d & 1]
+
+    def is_victory(self):
+        return self.max_exp >= VICTORY_EXPONENT
+
+    def can_move(self):
+        return self.legal_moves != 0
+
+    def check_game_state(self):
+        """返回 'victory'、'game_over' 或 None"""
+        if self.is_victory():
+            return 'victory'
+        if not self.can_move():
+            return 'game_over'
+        return None
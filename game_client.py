@@ -0,0 +1,191 @@
+"""game_server 的异步客户端与压力测试
+
+GameClient 在一个连接上流水线发送请求：request() 立即写出一行并返回等待
+对应响应的 future，不必等前一个请求返回。
+
+压力测试开若干个连接，每个连接上建立若干个会话，然后每个连接保持最多
+window 个未完成的请求，随机地对自己的会话发 move（2048）或 reveal / flag
+（扫雷）请求，结束时报告吞吐量和延迟分位数：
+
+    python game_client.py --spawn --connections 16 --sessions 2000 --requests 100000
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+
+from engine_2048 import DIRECTIONS
+from game_server import DEFAULT_PORT
+
+
+class GameClient:
+    """一个到服务器的连接，响应按 id 交给等待的 future"""
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.ids = itertools.count()
+        self.waiting = {}
+        self.receiver = asyncio.ensure_future(self._receive())
+
+    @classmethod
+    async def connect(cls, host='127.0.0.1', port=DEFAULT_PORT, unix=None):
+        if unix:
+            reader, writer = await asyncio.open_unix_connection(unix)
+        else:
+            reader, writer = await asyncio.open_connection(host, port)
+        return cls(reader, writer)
+
+    async def _receive(self):
+        try:
+            async for line in self.reader:
+                response = json.loads(line)
+                future = self.waiting.pop(response.get('id'), None)
+                if future is not None and not future.done():
+                    future.set_result(response)
+        finally:
+            for future in self.waiting.values():
+                if not future.done():
+                    future.set_exception(ConnectionError("连接已断开"))
+            self.waiting.clear()
+
+    def request(self, op, **fields):
+        """发送一个请求，返回得到响应对象的 future"""
+        rid = next(self.ids)
+        fields['op'] = op
+        fields['id'] = rid
+        future = asyncio.get_running_loop().create_future()
+        self.waiting[rid] = future
+        self.writer.write(json.dumps(fields, separators=(',', ':')).encode() + b'\n')
+        return future
+
+    async def call(self, op, **fields):
+        """发送请求并等待响应，出错时抛出 RuntimeError"""
+        response = await self.request(op, **fields)
+        if not response['ok']:
+            raise RuntimeError(response['error'])
+        return response
+
+    async def close(self):
+        self.writer.close()
+        self.receiver.cancel()
+
+
+async def _load_connection(args, sessions, quota, latencies, rng):
+    client = await GameClient.connect(args.host, args.port, args.unix)
+    try:
+        ids = []
+        for _ in range(sessions):
+            game = args.game if args.game != 'mixed' else rng.choice(('2048', 'minesweeper'))
+            if game == '2048':
+                fields = {'game': '2048', 'size': 4}
+            else:
+                fields = {'game': 'minesweeper', 'size': 16, 'mines': 40}
+            ids.append((game, client.request('new', seed=rng.getrandbits(32), **fields)))
+        sessions = [(game, (await future)['session']) for game, future in ids]
+
+        directions = list(DIRECTIONS)
+        in_flight = set()
+        for _ in range(quota):
+            if len(in_flight) >= args.window:
+                # 窗口满了，先让已写出的请求发出去，写缓冲不会无限增长
+                await client.writer.drain()
+                _done, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+            game, sid = rng.choice(sessions)
+            started = time.perf_counter()
+            if game == '2048':
+                future = client.request('move', session=sid, direction=rng.choice(directions))
+            else:
+                op = 'flag' if rng.random() < 0.1 else 'reveal'
+                future = client.request(op, session=sid, x=rng.randrange(16), y=rng.randrange(16))
+            future.add_done_callback(lambda _f, started=started:
+                                     latencies.append(time.perf_counter() - started))
+            in_flight.add(future)
+        if in_flight:
+            await asyncio.wait(in_flight)
+        return (await client.call('stats'))['sessions']
+    finally:
+        await client.close()
+
+
+async def load_test(args):
+    rng = random.Random(args.seed)
+    latencies = []
+    per_sessions, extra_sessions = divmod(args.sessions, args.connections)
+    per_requests, extra_requests = divmod(args.requests, args.connections)
+    started = time.perf_counter()
+    results = await asyncio.gather(*(
+        _load_connection(args, per_sessions + (i < extra_sessions), per_requests + (i < extra_requests),
+                         latencies, random.Random(rng.getrandbits(64)))
+        for i in range(args.connections)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+
+    def percentile(p):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000
+
+    print(f"连接 {args.connections}，会话 {args.sessions}（服务器上共 {max(results)} 个），"
+          f"请求 {len(latencies)}，用时 {elapsed:.2f} 秒")
+    print(f"吞吐量 {len(latencies) / elapsed:.0f} 请求/秒，延迟 p50 {percentile(0.5):.2f} ms，"
+          f"p99 {percentile(0.99):.2f} ms，最大 {latencies[-1] * 1000:.2f} ms")
+
+
+async def _wait_for_server(args, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            client = await GameClient.connect(args.host, args.port, args.unix)
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.05)
+        else:
+            await client.call('ping')
+            await client.close()
+            return
+
+
+async def _main(args):
+    server = None
+    if args.spawn:
+        server_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'game_server.py')
+        command = [sys.executable, server_path]
+        command += ['--unix', args.unix] if args.unix else ['--host', args.host, '--port', str(args.port)]
+        server = subprocess.Popen(command)
+    try:
+        await _wait_for_server(args)
+        await load_test(args)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="game_server 的压力测试")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--unix', default=None, help="通过 Unix 套接字连接")
+    parser.add_argument('--spawn', action='store_true', help="先启动一个服务器进程，测试完关闭")
+    parser.add_argument('--connections', type=int, default=16)
+    parser.add_argument('--sessions', type=int, default=1000, help="总会话数，平均分给各连接")
+    parser.add_argument('--requests', type=int, default=100000, help="总请求数（不含建立会话）")
+    parser.add_argument('--game', choices=('2048', 'minesweeper', 'mixed'), default='mixed')
+    parser.add_argument('--window', type=int, default=64, help="每个连接最多同时未完成的请求数")
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args(argv)
+    if args.connections < 1 or args.window < 1:
+        parser.error("--connections 和 --window 至少为 1")
+    # 每个连接只对自己的会话发请求，至少要分到一个
+    if args.sessions < args.connections:
+        parser.error("--sessions 不能少于 --connections")
+    asyncio.run(_main(args))
+
+
+if __name__ == "__main__":
+    main()
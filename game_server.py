@@ -0,0 +1,413 @@
+"""两个游戏的无界面多会话服务器（asyncio）
+
+协议：TCP 或 Unix 套接字上每行一个 JSON 对象。请求带 "id"（原样返回）和
+"op"，响应为 {"id": ..., "ok": true, ...} 或 {"id": ..., "ok": false,
+"error": "..."}：
+
+    {"op": "new", "game": "2048", "size": 4, "seed": 1}
+        -> {"session": "...", "board": "十六进制打包棋盘", "score": 0}
+    {"op": "move", "session": "...", "direction": "Left"}
+        -> {"changed": true, "gained": 4, "score": 4, "board": "...",
+            "spawn": [i, j, 数字] 或 null, "state": null/"victory"/"game_over"}
+    {"op": "new", "game": "minesweeper", "size": 16, "mines": 40, "seed": 1}
+        -> {"session": "..."}
+    {"op": "reveal", "session": "...", "x": 3, "y": 4}
+        -> {"opened": [[x, y, 周围地雷数], ...], "state": null/"victory"/"loss"}
+    {"op": "flag", "session": "...", "x": 3, "y": 4} -> {"flagged": true}
+    {"op": "state", "session": "..."}、{"op": "close", "session": "..."}
+    {"op": "ping"}、{"op": "stats"}
+
+2048 的棋盘是 engine_2048 的打包整数（十六进制字符串），第 i 行第 j 列的
+指数在第 4*(i*n + j) 位。
+
+每个会话只保存紧凑的状态：2048 为棋盘整数、得分和 64 位的随机数状态，处理
+请求时装入按尺寸共享的 Engine2048；扫雷为 board_minesweeper.MineBoard
+（每格一个字节）和几个计数。会话按最近使用的顺序排列，超过 idle_timeout
+秒没有请求的由后台任务从最旧的一端清理。
+
+每次从连接读到一批数据，就依次处理其中所有完整的行，把全部响应合并成
+一次写入，客户端流水线发送请求时写入次数远少于请求数。
+
+用法：python game_server.py --port 8765 或 --unix /tmp/tiny_game.sock；
+压力测试见 game_client.py。
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from collections import OrderedDict
+
+from board_minesweeper import MineBoard
+from engine_2048 import Engine2048, DIRECTIONS
+from minefield import place_mines
+from sparse_2048 import DENSE_MAX_SIZE
+
+DEFAULT_PORT = 8765
+IDLE_TIMEOUT = 300.0
+# 扫雷会话的最大边长
+MAX_MINES_SIZE = 256
+# 单行请求的最大长度
+MAX_LINE = 64 * 1024
+
+_MASK64 = (1 << 64) - 1
+_encode = json.JSONEncoder(separators=(',', ':'), ensure_ascii=False).encode
+
+
+class SplitMix64:
+    """只有一个 64 位整数状态的随机数生成器，提供引擎和布雷用到的接口"""
+    __slots__ = ('state',)
+
+    def __init__(self, seed):
+        self.state = seed & _MASK64
+
+    def next(self):
+        self.state = z = (self.state + 0x9E3779B97F4A7C15) & _MASK64
+        z = (z ^ (z >> 30)) * 0xBF58476D1CE4E5B9 & _MASK64
+        z = (z ^ (z >> 27)) * 0x94D049BB133111EB & _MASK64
+        return z ^ (z >> 31)
+
+    def random(self):
+        return (self.next() >> 11) * (1.0 / (1 << 53))
+
+    def getrandbits(self, k):
+        return self.next() >> (64 - k)
+
+    def randrange(self, n):
+        return int(self.random() * n)
+
+
+class ProtocolError(Exception):
+    pass
+
+
+class Session2048:
+    __slots__ = ('size', 'board', 'score', 'largestnum', 'rng')
+    game = '2048'
+
+
+class SessionMines:
+    __slots__ = ('size', 'mines', 'board', 'rng', 'started', 'over', 'revealed_safe',
+                 'wrong_flags', 'flags_used')
+    game = 'minesweeper'
+
+
+def _int(request, name, low, high):
+    value = request.get(name)
+    # JSON 的 true/false 解析为 bool，它是 int 的子类，需要单独排除
+    if not isinstance(value, int) or isinstance(value, bool) or not low <= value <= high:
+        raise ProtocolError(f"{name} 需要是 {low}~{high} 的整数")
+    return value
+
+
+def _str(request, name):
+    """取字符串字段，不是字符串时返回 None（用作字典键之前检查，避免列表等不可哈希的值）"""
+    value = request.get(name)
+    return value if isinstance(value, str) else None
+
+
+class GameServer:
+    """会话表与请求处理；网络部分见 serve()"""
+
+    def __init__(self, idle_timeout=IDLE_TIMEOUT, seed=None):
+        self.idle_timeout = idle_timeout
+        # 会话编号 -> (会话, 最后使用时间)，按最后使用排序
+        self.sessions = OrderedDict()
+        self.next_id = 0
+        self.seeds = SplitMix64(seed if seed is not None else int.from_bytes(os.urandom(8), 'little'))
+        # 按尺寸共享的 2048 引擎
+        self.engines = {}
+        self.requests = 0
+        self.expired = 0
+        self.handlers = {
+            'new': self.op_new,
+            'move': self.op_move,
+            'reveal': self.op_reveal,
+            'flag': self.op_flag,
+            'state': self.op_state,
+            'close': self.op_close,
+            'ping': lambda request: {},
+            'stats': self.op_stats,
+        }
+
+    # ------------------------------------------------------------ 会话
+
+    def _session(self, request, game=None):
+        sid = _str(request, 'session')
+        entry = self.sessions.get(sid)
+        if entry is None:
+            raise ProtocolError("会话不存在或已过期")
+        session = entry[0]
+        if game is not None and session.game != game:
+            raise ProtocolError(f"会话不是 {game}")
+        self.sessions[sid] = (session, time.monotonic())
+        self.sessions.move_to_end(sid)
+        return session
+
+    def expire(self, now=None):
+        """清理空闲超时的会话，返回清理的个数"""
+        deadline = (now if now is not None else time.monotonic()) - self.idle_timeout
+        count = 0
+        sessions = self.sessions
+        while sessions:
+            sid, (_session, used) = next(iter(sessions.items()))
+            if used > deadline:
+                break
+            del sessions[sid]
+            count += 1
+        self.expired += count
+        return count
+
+    def _engine(self, session):
+        engine = self.engines.get(session.size)
+        if engine is None:
+            engine = self.engines[session.size] = Engine2048(session.size)
+        engine.rng = session.rng
+        engine.board = session.board
+        engine.score = session.score
+        engine.largestnum = session.largestnum
+        return engine
+
+    # ------------------------------------------------------------ 请求
+
+    def handle(self, request):
+        """处理一个已解析的请求，返回响应对象"""
+        self.requests += 1
+        rid = request.get('id') if isinstance(request, dict) else None
+        try:
+            if not isinstance(request, dict):
+                raise ProtocolError("请求需要是 JSON 对象")
+            handler = self.handlers.get(_str(request, 'op'))
+            if handler is None:
+                raise ProtocolError(f"未知的操作 {request.get('op')!r}")
+            response = handler(request)
+        except (ProtocolError, ValueError) as error:
+            return {'id': rid, 'ok': False, 'error': str(error)}
+        except Exception as error:
+            # 处理某个请求时的意外错误只让这个请求失败，不影响连接上的其他请求
+            return {'id': rid, 'ok': False, 'error': f"内部错误: {error!r}"}
+        response['id'] = rid
+        response['ok'] = True
+        return response
+
+    def op_new(self, request):
+        game = request.get('game')
+        seed = request.get('seed')
+        if seed is None:
+            seed = self.seeds.next()
+        elif not isinstance(seed, int) or isinstance(seed, bool):
+            raise ProtocolError("seed 需要是整数")
+        if game == '2048':
+            session = Session2048()
+            session.size = _int(request, 'size', 2, DENSE_MAX_SIZE) if 'size' in request else 4
+            session.rng = SplitMix64(seed)
+            session.board = session.score = session.largestnum = 0
+            engine = self._engine(session)
+            engine.reset()
+            self._save_2048(session, engine)
+        elif game == 'minesweeper':
+            session = SessionMines()
+            session.size = _int(request, 'size', 2, MAX_MINES_SIZE) if 'size' in request else 16
+            # 第一次翻开的格子周围 3x3 不放地雷
+            session.mines = _int(request, 'mines', 0, max(0, session.size * session.size - 9))
+            session.board = MineBoard(session.size)
+            session.rng = SplitMix64(seed)
+            session.started = False
+            session.over = None
+            session.revealed_safe = session.wrong_flags = session.flags_used = 0
+        else:
+            raise ProtocolError("game 需要是 '2048' 或 'minesweeper'")
+        self.next_id += 1
+        sid = format(self.next_id, 'x')
+        self.sessions[sid] = (session, time.monotonic())
+        response = self._describe(session)
+        response['session'] = sid
+        return response
+
+    @staticmethod
+    def _save_2048(session, engine):
+        session.board = engine.board
+        session.score = engine.score
+        session.largestnum = engine.largestnum
+
+    def _describe(self, session):
+        if session.game == '2048':
+            engine = self._engine(session)
+            return {'game': '2048', 'size': session.size, 'board': format(session.board, 'x'),
+                    'score': session.score, 'state': engine.check_game_state()}
+        size = session.size
+        grid = session.board.grid
+        revealed = [[x, y, grid[x][y]] for x, y in
+                    (divmod(int(k), size) for k in session.board.revealed_cells())]
+        flagged = [list(divmod(int(k), size)) for k in session.board.flagged_cells()]
+        return {'game': 'minesweeper', 'size': session.size, 'mines': session.mines,
+                'revealed': revealed, 'flagged': flagged, 'state': session.over}
+
+    def op_move(self, request):
+        session = self._session(request, '2048')
+        direction = DIRECTIONS.get(_str(request, 'direction'))
+        if direction is None:
+            raise ProtocolError("direction 需要是 Up、Down、Left 或 Right")
+        engine = self._engine(session)
+        gained, changed = engine.move(direction)
+        spawn = engine.add_new_tile() if changed else None
+        self._save_2048(session, engine)
+        return {'changed': changed, 'gained': gained, 'score': session.score,
+                'board': format(session.board, 'x'),
+                'spawn': [spawn[0][0], spawn[0][1], spawn[1]] if spawn else None,
+                'state': engine.check_game_state()}
+
+    def _cell(self, request, session):
+        x = _int(request, 'x', 0, session.size - 1)
+        y = _int(request, 'y', 0, session.size - 1)
+        return x * session.size + y
+
+    def op_reveal(self, request):
+        """规则与 minesweeper.Minesweeper 相同：第一次翻开时才布雷，周围 3x3 没有地雷"""
+        session = self._session(request, 'minesweeper')
+        k = self._cell(request, session)
+        board = session.board
+        size = session.size
+        if session.over or board.is_revealed(k) or board.is_flagged(k):
+            return {'opened': [], 'state': session.over}
+        if not session.started:
+            mines = place_mines(size, session.mines, k // size, k % size, session.rng)
+            board.load(mines)
+            session.started = True
+            session.wrong_flags = session.flags_used - sum(1 for m in mines if board.is_flagged(int(m)))
+        if board.is_mine(k):
+            board.set_revealed(k)
+            session.over = 'loss'
+            return {'opened': [[k // size, k % size, -1]], 'state': 'loss'}
+        opened = board.flood(k)
+        session.revealed_safe += len(opened)
+        if session.revealed_safe == size * size - session.mines and not session.wrong_flags:
+            session.over = 'victory'
+        count = board.count
+        return {'opened': [[n // size, n % size, count(n)] for n in opened], 'state': session.over}
+
+    def op_flag(self, request):
+        session = self._session(request, 'minesweeper')
+        k = self._cell(request, session)
+        board = session.board
+        if session.over or board.is_revealed(k):
+            return {'flagged': board.is_flagged(k), 'state': session.over}
+        flagged = board.toggle_flag(k)
+        change = 1 if flagged else -1
+        session.flags_used += change
+        if not session.started or not board.is_mine(k):
+            session.wrong_flags += change
+        if (session.started and not session.wrong_flags
+                and session.revealed_safe == session.size * session.size - session.mines):
+            session.over = 'victory'
+        return {'flagged': flagged, 'state': session.over}
+
+    def op_state(self, request):
+        return self._describe(self._session(request))
+
+    def op_close(self, request):
+        self._session(request)
+        del self.sessions[_str(request, 'session')]
+        return {}
+
+    def op_stats(self, request):
+        return {'sessions': len(self.sessions), 'requests': self.requests,
+                'expired': self.expired}
+
+    def _line_too_long(self):
+        self.requests += 1
+        return _encode({'id': None, 'ok': False, 'error': f"请求超过 {MAX_LINE} 字节"}).encode() + b'\n'
+
+    def handle_line(self, line):
+        """处理一行请求，返回编码好的响应行；任何一行都不会让连接断开"""
+        if len(line) > MAX_LINE:
+            return self._line_too_long()
+        try:
+            request = json.loads(line)
+        except (ValueError, RecursionError):
+            # 嵌套过深的 JSON 解析时抛出 RecursionError
+            self.requests += 1
+            response = {'id': None, 'ok': False, 'error': "无法解析的 JSON"}
+        else:
+            response = self.handle(request)
+        try:
+            return _encode(response).encode() + b'\n'
+        except (ValueError, RecursionError):
+            # id 原样返回，嵌套过深时编码会失败
+            return _encode({'id': None, 'ok': False, 'error': "无法编码的 id"}).encode() + b'\n'
+
+    # ------------------------------------------------------------ 网络
+
+    async def on_connection(self, reader, writer):
+        pending = b''
+        # 正在丢弃的超长行：不再缓存它的内容，读到行尾时回复一个错误
+        skipping = False
+        try:
+            while True:
+                data = await reader.read(65536)
+                if not data:
+                    break
+                if b'\n' not in data:
+                    if not skipping:
+                        pending += data
+                        if len(pending) > MAX_LINE:
+                            pending = b''
+                            skipping = True
+                    continue
+                lines = (pending + data).split(b'\n')
+                pending = lines.pop()
+                responses = []
+                if skipping:
+                    # 第一段是超长行的末尾
+                    del lines[0]
+                    responses.append(self._line_too_long())
+                    skipping = False
+                responses.extend(self.handle_line(line) for line in lines if line.strip())
+                # 这一批请求的响应合并成一次写入
+                writer.write(b''.join(responses))
+                await writer.drain()
+                if len(pending) > MAX_LINE:
+                    pending = b''
+                    skipping = True
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def expire_loop(self):
+        while True:
+            await asyncio.sleep(max(1.0, self.idle_timeout / 4))
+            self.expire()
+
+    async def serve(self, host='127.0.0.1', port=DEFAULT_PORT, unix=None, ready=None):
+        """开始监听并一直运行；ready 为可选的 asyncio.Event，监听开始后设置"""
+        if unix:
+            server = await asyncio.start_unix_server(self.on_connection, path=unix, limit=MAX_LINE)
+        else:
+            server = await asyncio.start_server(self.on_connection, host, port, limit=MAX_LINE)
+        expiry = asyncio.ensure_future(self.expire_loop())
+        if ready is not None:
+            ready.set()
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            expiry.cancel()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="2048 与扫雷的多会话服务器")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--unix', default=None, help="监听 Unix 套接字而不是 TCP")
+    parser.add_argument('--idle', type=float, default=IDLE_TIMEOUT, help="会话空闲多少秒后清理")
+    args = parser.parse_args(argv)
+    server = GameServer(idle_timeout=args.idle)
+    try:
+        asyncio.run(server.serve(args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""2048 的撤销/重做历史
+
+历史记录保存的是引擎 snapshot() 返回的局面。Engine2048 的棋盘是不可变的
+整数，快照直接引用引擎当时的棋盘对象，每一步只多出一个 (棋盘, 得分,
+largestnum) 元组，不复制格子列表；SparseEngine2048 的快照共享各行的列表。
+历史没有长度限制，也可以传入 limit 只保留最近的若干步。
+"""
+from collections import deque
+
+
+class History:
+    """撤销/重做栈
+
+    每次有效移动之前调用 push(engine.snapshot())；undo()/redo() 直接把
+    engine 恢复到相应的局面。push 新局面会清空重做栈。
+    """
+
+    def __init__(self, limit=None):
+        self.undo_stack = deque(maxlen=limit)
+        self.redo_stack = []
+
+    def push(self, state):
+        self.undo_stack.append(state)
+        self.redo_stack.clear()
+
+    def clear(self):
+        self.undo_stack.clear()
+        self.redo_stack.clear()
+
+    @property
+    def can_undo(self):
+        return bool(self.undo_stack)
+
+    @property
+    def can_redo(self):
+        return bool(self.redo_stack)
+
+    def undo(self, engine):
+        """撤销一步，返回是否成功"""
+        if not self.undo_stack:
+            return False
+        self.redo_stack.append(engine.snapshot())
+        engine.restore(self.undo_stack.pop())
+        return True
+
+    def redo(self, engine):
+        """重做一步，返回是否成功"""
+        if not self.redo_stack:
+            return False
+        self.undo_stack.append(engine.snapshot())
+        engine.restore(self.redo_stack.pop())
+        return True
+
+    def __len__(self):
+        return len(self.undo_stack)
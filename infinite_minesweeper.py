@@ -0,0 +1,119 @@
+"""无边界扫雷的界面
+
+棋盘是 world_minesweeper.MineWorld，由 viewport_minesweeper.MineViewport
+显示其中 view_count x view_count 的一块：方向键（或 WASD）、中键拖动平移，
+M 键切换缩略图。没有胜利，踩到地雷时结束，得分为翻开的格子数。世界坐标
+(0, 0) 在开局时位于窗口中央。
+"""
+import tkinter as tk
+from tkinter import messagebox
+import random
+import time
+
+from viewport_minesweeper import MineViewport
+from world_minesweeper import MineWorld
+
+
+class InfiniteMinesweeper:
+    def __init__(self, root, seed=None, density=0.18, view_count=30, stats=None):
+        self.root = root
+        # 每局世界的种子由它产生，传入固定的 seed 可以复现
+        self.rng = random.Random(seed)
+        self.density = density
+        self.stats = stats
+        self.root.title("扫雷（无边界）")
+        self.root.resizable(False, False)
+        self.font = ('SimHei', 15, 'bold')
+        self.GRID_SIZE = max(8, min(30, 900 // view_count))
+        self.cell_font = ('SimHei', max(6, self.GRID_SIZE // 2), 'bold')
+        self.VIEW_COUNT = view_count
+
+        self.world = MineWorld(self.rng.getrandbits(64), density)
+        self.first_click = True
+        self.game_over = False
+        self.revealed_count = 0
+        self.start_time = None
+
+        self.create_widgets()
+        self.reset_game()
+
+    def create_widgets(self):
+        self.top_frame = tk.Frame(self.root)
+        self.top_frame.pack(fill=tk.X, padx=10, pady=10)
+        self.score_label = tk.Label(self.top_frame, text="", font=self.font)
+        self.score_label.pack(side=tk.LEFT)
+        self.reset_button = tk.Button(self.top_frame, text="重置", font=self.font, command=self.reset_game)
+        self.reset_button.pack(side=tk.RIGHT)
+
+        self.game_frame = tk.Frame(self.root)
+        self.game_frame.pack(padx=10, pady=10)
+        # 只有窗口覆盖到的区块会被生成
+        self.view = MineViewport(self.game_frame, self.world, self.VIEW_COUNT, self.VIEW_COUNT,
+                                 self.GRID_SIZE, self.cell_font)
+        self.view.canvas.pack()
+        self.view.canvas.bind('<Button-1>', lambda event: self.on_canvas_event(event, self.on_left_click))
+        self.view.canvas.bind('<Button-3>', lambda event: self.on_canvas_event(event, self.on_right_click))
+        self.view.canvas.bind('<Motion>', self.on_motion)
+        self.view.canvas.bind('<Leave>', lambda event: self.view.set_hover(None))
+        self.view.bind_keys(self.root)
+
+    def reset_game(self):
+        self.world = MineWorld(self.rng.getrandbits(64), self.density)
+        self.view.source = self.world
+        self.first_click = True
+        self.game_over = False
+        self.revealed_count = 0
+        self.start_time = None
+        self.view.set_zoom(False)
+        self.view.center_on(0, 0)
+        self.view.clear()
+        self.update_label()
+
+    def update_label(self):
+        self.score_label.config(text=f"已翻开: {self.revealed_count}")
+
+    def on_canvas_event(self, event, handler):
+        cell = self.view.cell_at(event.x, event.y)
+        if cell is not None:
+            handler(*cell)
+
+    def on_motion(self, event):
+        cell = self.view.cell_at(event.x, event.y)
+        if cell is not None and (self.game_over or self.world.is_revealed(*cell)):
+            cell = None
+        self.view.set_hover(cell)
+
+    def on_left_click(self, x, y):
+        if self.game_over:
+            return
+        world = self.world
+        if self.first_click:
+            self.first_click = False
+            self.start_time = time.time()
+            world.start(x, y)
+            self.view.refresh()
+        if world.is_revealed(x, y) or world.is_flagged(x, y):
+            return
+        if world.is_mine(x, y):
+            self.game_over = True
+            self.save_stats()
+            self.view.draw_mine(x, y)
+            messagebox.showinfo("游戏结束", f"你踩到地雷了! 共翻开 {self.revealed_count} 格")
+            return
+        opened = world.flood(x, y)
+        self.revealed_count += len(opened)
+        self.view.draw_revealed(opened, None)
+        self.update_label()
+
+    def on_right_click(self, x, y):
+        if self.game_over:
+            return
+        if self.world.is_revealed(x, y):
+            return
+        self.view.draw_flag(x, y, self.world.toggle_flag(x, y))
+
+    def save_stats(self):
+        if self.stats is None or self.start_time is None:
+            return
+        self.stats.record('minesweeper_infinite', 0, 'loss', score=self.revealed_count,
+                          duration=time.time() - self.start_time)
@@ -0,0 +1,270 @@
+"""可选的性能埋点
+
+默认关闭，关闭时不替换任何函数，没有额外开销。设置环境变量
+TINY_GAME_PROFILE=结果.json（或 2048 的 --profile 参数）后开启：
+
+- 热点方法（2048 的 move、add_new_tile、update_grid_cells、check_game_state，
+  扫雷的 generate_mines、reveal_cell、check_victory）每次调用的耗时记入直方图；
+- 每个界面事件（按键、点击）期间的 Tk 调用次数记入直方图；
+- 按 F11 记录一次 tracemalloc 快照（第一次按下时开始跟踪，避免平时拖慢计时），
+  与上一次快照对比得出分配增长最多的代码行；
+- 按 F12 显示/隐藏游戏内的统计浮层；
+- 退出时（以及按 F10 时）把全部结果写成 JSON。
+
+直方图按 2 的幂分桶，耗时单位为微秒，Tk 调用次数单位为次。
+"""
+import atexit
+import functools
+import json
+import os
+import time
+import tracemalloc
+
+ENV_VAR = 'TINY_GAME_PROFILE'
+
+HOT_PATHS_2048 = ('move', 'add_new_tile', 'check_game_state')
+HOT_PATHS_2048_GUI = ('update_grid_cells', 'check_game_state')
+HOT_PATHS_MINESWEEPER = ('generate_mines', 'reveal_cell', 'check_victory')
+
+# 浮层的刷新间隔（毫秒）
+OVERLAY_MS = 500
+
+
+class Histogram:
+    """按 2 的幂分桶的直方图：第 k 个桶统计 [2^(k-1), 2^k) 内的值"""
+
+    def __init__(self):
+        self.buckets = {}
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = 0
+
+    def add(self, value):
+        value = int(value)
+        bucket = value.bit_length()
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, fraction):
+        """近似分位数，返回所在桶的上界"""
+        target = fraction * self.count
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= target:
+                return min(self.max, (1 << bucket) - 1)
+        return self.max
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'total': self.total,
+            'mean': self.total / self.count if self.count else 0,
+            'min': self.min or 0,
+            'max': self.max,
+            'p50': self.percentile(0.5),
+            'p90': self.percentile(0.9),
+            'p99': self.percentile(0.99),
+            'buckets': {str((1 << bucket) - 1): count
+                        for bucket, count in sorted(self.buckets.items())},
+        }
+
+
+class _CountingTk:
+    """包在 Tk 解释器外面，统计 call() 的次数"""
+
+    def __init__(self, tk, profiler):
+        self._tk = tk
+        self._profiler = profiler
+
+    def call(self, *args):
+        self._profiler.tk_calls += 1
+        return self._tk.call(*args)
+
+    def __getattr__(self, name):
+        return getattr(self._tk, name)
+
+
+class Profiler:
+    """埋点数据：timings 为各方法的耗时直方图，tk_calls_per_event 为各事件的 Tk 调用次数"""
+
+    def __init__(self, path=None):
+        self.path = path
+        self.timings = {}
+        self.tk_calls_per_event = {}
+        self.tk_calls = 0
+        self.memory = []
+        self.last_snapshot = None
+        self.started = time.time()
+
+    def histogram(self, table, name):
+        histogram = table.get(name)
+        if histogram is None:
+            histogram = table[name] = Histogram()
+        return histogram
+
+    def timed(self, name, func):
+        """返回记录耗时的包装函数"""
+        histogram = self.histogram(self.timings, name)
+        clock = time.perf_counter_ns
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = clock()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                histogram.add((clock() - start) // 1000)
+        return wrapper
+
+    def event(self, name, func):
+        """返回记录耗时和期间 Tk 调用次数的包装函数，用于界面事件的回调"""
+        timed = self.timed(name, func)
+        calls = self.histogram(self.tk_calls_per_event, name)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            before = self.tk_calls
+            try:
+                return timed(*args, **kwargs)
+            finally:
+                calls.add(self.tk_calls - before)
+        return wrapper
+
+    def patch(self, cls, names, prefix=None, event=False):
+        """把类上的方法替换为埋点版本，对之后和已有的实例都生效"""
+        prefix = prefix or cls.__name__
+        wrap = self.event if event else self.timed
+        for name in names:
+            setattr(cls, name, wrap(f"{prefix}.{name}", getattr(cls, name)))
+
+    def install_tk(self, root):
+        """统计 Tk 调用次数；必须在创建其他控件之前调用，控件会复制 root.tk"""
+        if not isinstance(root.tk, _CountingTk):
+            root.tk = _CountingTk(root.tk, self)
+
+    def memory_snapshot(self, limit=15):
+        """记录一次 tracemalloc 快照，返回与上一次相比增长最多的代码行"""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+        ))
+        if self.last_snapshot is None:
+            stats = snapshot.statistics('lineno')
+        else:
+            stats = snapshot.compare_to(self.last_snapshot, 'lineno')
+        self.last_snapshot = snapshot
+        current, peak = tracemalloc.get_traced_memory()
+        entry = {
+            'time': time.time() - self.started,
+            'current': current,
+            'peak': peak,
+            'top': [{'where': str(stat.traceback[0]),
+                     'size': stat.size,
+                     'size_diff': getattr(stat, 'size_diff', stat.size),
+                     'count': stat.count}
+                    for stat in stats[:limit]],
+        }
+        self.memory.append(entry)
+        return entry
+
+    def to_dict(self):
+        return {
+            'duration': time.time() - self.started,
+            'timings_us': {name: h.to_dict() for name, h in sorted(self.timings.items())},
+            'tk_calls_per_event': {name: h.to_dict()
+                                   for name, h in sorted(self.tk_calls_per_event.items())},
+            'tk_calls': self.tk_calls,
+            'memory': self.memory,
+        }
+
+    def dump(self, path=None):
+        path = path or self.path
+        if not path:
+            return
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2, ensure_ascii=False)
+
+    def summary_lines(self):
+        lines = []
+        for name, histogram in sorted(self.timings.items()):
+            if histogram.count:
+                lines.append(f"{name:<32} {histogram.count:>7} 次  均 {histogram.total / histogram.count:>8.1f}us"
+                             f"  p99 {histogram.percentile(0.99):>7}us")
+        for name, histogram in sorted(self.tk_calls_per_event.items()):
+            if histogram.count:
+                lines.append(f"Tk/{name:<28} 均 {histogram.total / histogram.count:>6.1f}  最多 {histogram.max}")
+        return lines
+
+
+class Overlay:
+    """游戏窗口内的统计浮层，F12 显示/隐藏"""
+
+    def __init__(self, root, profiler):
+        import tkinter as tk
+        self.root = root
+        self.profiler = profiler
+        self.label = tk.Label(root, text="", justify=tk.LEFT, anchor='nw',
+                              font=('Courier', 9), bg='#000000', fg='#00ff00')
+        self.visible = False
+        self.after_id = None
+
+    def toggle(self, event=None):
+        self.visible = not self.visible
+        if self.visible:
+            self.label.place(x=0, y=0)
+            self.refresh()
+        else:
+            self.label.place_forget()
+            if self.after_id is not None:
+                self.root.after_cancel(self.after_id)
+                self.after_id = None
+
+    def refresh(self):
+        self.label.config(text="\n".join(self.profiler.summary_lines()) or "暂无数据")
+        self.label.lift()
+        self.after_id = self.root.after(OVERLAY_MS, self.refresh)
+
+
+def from_env(path=None):
+    """按参数或环境变量开启埋点，未开启时返回 None"""
+    path = path or os.environ.get(ENV_VAR)
+    if not path:
+        return None
+    profiler = Profiler(path)
+    atexit.register(profiler.dump)
+    return profiler
+
+
+def instrument_2048(profiler, game_cls):
+    """给 2048 的引擎与界面类装上埋点；需在创建游戏对象之前调用"""
+    from engine_2048 import Engine2048
+    from sparse_2048 import SparseEngine2048
+    for engine_cls in (Engine2048, SparseEngine2048):
+        profiler.patch(engine_cls, HOT_PATHS_2048)
+    profiler.patch(game_cls, HOT_PATHS_2048_GUI, prefix='game_2048')
+    profiler.patch(game_cls, ('key_press', 'process_input', 'reset_game'),
+                   prefix='game_2048', event=True)
+
+
+def instrument_minesweeper(profiler, game_cls):
+    """给扫雷类装上埋点；需在创建游戏对象之前调用"""
+    profiler.patch(game_cls, HOT_PATHS_MINESWEEPER)
+    profiler.patch(game_cls, ('on_left_click', 'on_right_click', 'reset_game'), event=True)
+
+
+def attach(root, profiler):
+    """在游戏窗口上绑定 F10（写出 JSON）、F11（内存快照）和 F12（浮层）"""
+    overlay = Overlay(root, profiler)
+    root.bind('<F10>', lambda event: profiler.dump(), add='+')
+    root.bind('<F11>', lambda event: profiler.memory_snapshot(), add='+')
+    root.bind('<F12>', overlay.toggle, add='+')
+    return overlay
@@ -0,0 +1,91 @@
+"""扫雷的地雷布局
+
+格子按 x 优先编号：k = x * size + y，与 Minesweeper.grid[x][y] 一致。
+有 NumPy 时抽样和邻居计数都是整体的数组运算；没有时退回纯 Python 实现，
+开销与地雷数成正比，结果的分布相同（具体布局不同）。
+"""
+import bisect
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def excluded_cells(size, x, y):
+    """(x, y) 周围 3x3 区域（含自身）的格子编号，已排序"""
+    return [nx * size + ny
+            for nx in range(max(0, x - 1), min(size, x + 2))
+            for ny in range(max(0, y - 1), min(size, y + 2))]
+
+
+def place_mines(size, count, exclude_x, exclude_y, rng):
+    """随机选出恰好 count 个地雷位置，避开 (exclude_x, exclude_y) 周围的 3x3 区域
+
+    先在去掉排除区域后的 [0, 可用格子数) 中无放回抽样，再把抽到的序号映射
+    回格子编号：序号每越过一个排除格子就加一。rng 为 random.Random 或 random
+    模块，NumPy 的生成器由它派生种子，所以同一个 rng 状态得到同一个布局。
+    返回格子编号的序列（NumPy 数组或列表）。
+    """
+    excluded = excluded_cells(size, exclude_x, exclude_y)
+    available = size * size - len(excluded)
+    if not 0 <= count <= available:
+        raise ValueError(f"{size}x{size} 的棋盘最多放 {available} 个地雷")
+    # 第 i 个排除格子对应的序号边界
+    bounds = [k - i for i, k in enumerate(excluded)]
+    if np is not None:
+        generator = np.random.default_rng(rng.getrandbits(64))
+        picks = generator.choice(available, size=count, replace=False)
+        return picks + np.searchsorted(np.array(bounds), picks, side='right')
+    if count * 2 <= available:
+        chosen = set()
+        while len(chosen) < count:
+            chosen.add(rng.randrange(available))
+    else:
+        # 地雷比空格多时抽空格
+        skipped = set()
+        while len(skipped) < available - count:
+            skipped.add(rng.randrange(available))
+        chosen = [pick for pick in range(available) if pick not in skipped]
+    return [pick + bisect.bisect_right(bounds, pick) for pick in chosen]
+
+
+def neighbor_count_array(mines, size):
+    """有 NumPy 时的整体邻居计数
+
+    返回 (field, counts) 两个 size x size 的 uint8 数组：field 标记地雷，
+    counts 为每个格子周围 8 格的地雷数（地雷格子也计算，不含自身）。
+    """
+    field = np.zeros(size * size, dtype=np.uint8)
+    field[np.asarray(mines, dtype=np.intp)] = 1
+    field = field.reshape(size, size)
+    padded = np.pad(field, 1)
+    counts = sum(padded[dx:dx + size, dy:dy + size]
+                 for dx in range(3) for dy in range(3)) - field
+    return field, counts
+
+
+def neighbor_count_list(mines, size):
+    """没有 NumPy 时的邻居计数，返回按格子编号排列的列表，含义同 neighbor_count_array 的 counts"""
+    counts = [0] * (size * size)
+    for k in mines:
+        x, y = divmod(k, size)
+        for nx in range(max(0, x - 1), min(size, x + 2)):
+            base = nx * size
+            for ny in range(max(0, y - 1), min(size, y + 2)):
+                if base + ny != k:
+                    counts[base + ny] += 1
+    return counts
+
+
+def neighbor_counts(mines, size):
+    """返回 grid[x][y]：地雷为 -1，其他格子为周围 8 格的地雷数"""
+    if np is not None:
+        field, counts = neighbor_count_array(mines, size)
+        counts = counts.astype(np.int8)
+        counts[field == 1] = -1
+        return counts.tolist()
+    counts = neighbor_count_list(mines, size)
+    for k in mines:
+        counts[k] = -1
+    return [counts[x * size:(x + 1) * size] for x in range(size)]
@@ -1,26 +1,65 @@
 import tkinter as tk
 from tkinter import messagebox
 import random
+import time
+
+from board_minesweeper import MineBoard
+from minefield import place_mines
+from render_minesweeper import MineCanvas
+from viewport_minesweeper import MineViewport
+from solver_minesweeper import MineSolver
+
+# 边长超过这个值的棋盘不再整盘显示，改用可平移的视口
+VIEWPORT_THRESHOLD = 64
+# 视口显示的格子数和格子边长
+VIEWPORT_COUNT = 40
+VIEWPORT_CELL_SIZE = 20
 
 class Minesweeper:
-    def __init__(self, root):
+    def __init__(self, root, rng=None, grid_count=15, mine_count=40, stats=None, board_pool=None):
         self.root = root
+        # 随机数生成器，可传入带种子的 random.Random 以复现地雷布局
+        self.rng = rng if rng is not None else random
+        # 成绩记录（stats_store.StatsStore），为 None 时不保存
+        self.stats = stats
+        # 不需要猜测的棋盘缓存（noguess_minesweeper.BoardPool），为 None 时使用普通的随机布局
+        self.board_pool = board_pool
+        self.no_guess = False
         self.root.title("扫雷")
         self.root.resizable(False, False)
         
         # 确保中文显示正常
         self.font = ('SimHei', 15, 'bold')
         
-        # 游戏常量
-        self.GRID_SIZE = 30
-        self.GRID_COUNT = 15
-        self.MINE_COUNT = 40
+        # 游戏常量（格子边长随棋盘尺寸缩小，棋盘不超过 900 像素；大棋盘用视口，格子边长固定）
+        self.use_viewport = grid_count > VIEWPORT_THRESHOLD
+        if self.use_viewport:
+            self.GRID_SIZE = VIEWPORT_CELL_SIZE
+        else:
+            self.GRID_SIZE = max(8, min(30, 900 // grid_count))
+        self.cell_font = ('SimHei', max(6, self.GRID_SIZE // 2), 'bold')
+        self.GRID_COUNT = grid_count
+        self.MINE_COUNT = mine_count
         
         # 游戏变量
         self.first_click = True
         self.game_over = False
         self.victory = False
         self.flags_used = 0
+        self.start_time = None
+        # 胜利判定用的计数：已翻开的安全格子数、插在安全格子上的旗子数；
+        # 安全格子总数在生成地雷后才确定
+        self.revealed_safe = 0
+        self.wrong_flags = 0
+        self.safe_total = None
+        # 地雷、数字、翻开和旗子状态，每个格子一个字节，重置时原地清空
+        self.board = MineBoard(grid_count)
+        # 地雷概率分析（提示与自动翻开），只在翻开格子后失效
+        self.solver = MineSolver(grid_count, mine_count)
+        self.analysis = None
+        # 翻开后还没交给分析器的格子（每次翻开的一批），要提示或自动翻开时才处理
+        self.unsolved = []
+        self.auto_id = None
         
         # 创建界面
         self.create_widgets()
@@ -36,6 +75,11 @@ class Minesweeper:
         self.mines_label = tk.Label(self.top_frame, text=f"剩余地雷: {self.MINE_COUNT}", font=self.font)
         self.mines_label.pack(side=tk.LEFT)
         
+        # 使用棋盘缓存时显示本局是否保证不需要猜测
+        self.mode_label = tk.Label(self.top_frame, text="", font=self.font)
+        if self.board_pool is not None:
+            self.mode_label.pack(side=tk.LEFT, padx=(10, 0))
+        
 
 
         ###----------------
@@ -52,30 +96,29 @@ class Minesweeper:
         self.reset_button = tk.Button(self.top_frame, text="重置", font=self.font, command=self.reset_game)
         self.reset_button.pack(side=tk.RIGHT,padx=(0, 80))
         
+        # 提示：标出一个安全的（没有时是地雷概率最低的）格子；自动：连续翻开必然安全的格子
+        self.auto_button = tk.Button(self.top_frame, text="自动", font=self.font, command=self.auto_play)
+        self.auto_button.pack(side=tk.RIGHT, padx=(0, 10))
+        self.hint_button = tk.Button(self.top_frame, text="提示", font=self.font, command=self.show_hint)
+        self.hint_button.pack(side=tk.RIGHT, padx=(0, 10))
+        
         # 游戏区域
         self.game_frame = tk.Frame(self.root)
         self.game_frame.pack(padx=10, pady=10)
         
-        # 创建网格按钮
-        self.buttons = []
-        for y in range(self.GRID_COUNT):
-            row = []
-            for x in range(self.GRID_COUNT):
-                btn = tk.Button(
-                    self.game_frame, 
-                    #text="⬜",
-                    width=2, 
-                    height=1, 
-                    font=self.font,
-                    relief=tk.RAISED
-                )
-                btn.grid(row=y, column=x, padx=1, pady=1)
-                btn.bind('<Button-1>', lambda event, x=x, y=y: self.on_left_click(x, y))
-                btn.bind('<Button-3>', lambda event, x=x, y=y: self.on_right_click(x, y))
-                btn.bind('<Enter>', lambda e, b=btn: b.config(bg='lightblue'))
-                btn.bind('<Leave>', lambda e, b=btn: b.config(bg='SystemButtonFace'))
-                row.append(btn)
-            self.buttons.append(row)
+        # 整个棋盘画在一个画布上，点击和悬停按像素坐标换算成格子；大棋盘只画
+        # 视口内的格子，方向键（或 WASD）、中键拖动平移，M 键切换缩略图
+        if self.use_viewport:
+            self.view = MineViewport(self.game_frame, self.board, VIEWPORT_COUNT, VIEWPORT_COUNT,
+                                     self.GRID_SIZE, self.cell_font, size=self.GRID_COUNT)
+            self.view.bind_keys(self.root)
+        else:
+            self.view = MineCanvas(self.game_frame, self.GRID_COUNT, self.GRID_SIZE, self.cell_font)
+        self.view.canvas.pack()
+        self.view.canvas.bind('<Button-1>', lambda event: self.on_canvas_event(event, self.on_left_click))
+        self.view.canvas.bind('<Button-3>', lambda event: self.on_canvas_event(event, self.on_right_click))
+        self.view.canvas.bind('<Motion>', self.on_motion)
+        self.view.canvas.bind('<Leave>', lambda event: self.view.set_hover(None))
     
     def reset_game(self):
         """重置游戏状态"""
@@ -83,238 +126,171 @@ class Minesweeper:
         self.game_over = False
         self.victory = False
         self.flags_used = 0
+        self.start_time = None
+        self.revealed_safe = 0
+        self.wrong_flags = 0
+        self.safe_total = None
+        self.solver.reset()
+        self.analysis = None
+        self.unsolved = []
+        self.stop_auto()
+        self.no_guess = False
+        if self.board_pool is not None:
+            # 提前为下一局补充缓存，第一次点击时直接取用
+            self.board_pool.request(self.GRID_COUNT, self.MINE_COUNT)
+            self.mode_label.config(text="")
         
         # 更新剩余地雷数
         self.mines_label.config(text=f"剩余地雷: {self.MINE_COUNT}")
         
-        # 创建空白网格
-        self.grid = [[0 for _ in range(self.GRID_COUNT)] for _ in range(self.GRID_COUNT)]
-        self.revealed = [[False for _ in range(self.GRID_COUNT)] for _ in range(self.GRID_COUNT)]
-        self.flagged = [[False for _ in range(self.GRID_COUNT)] for _ in range(self.GRID_COUNT)]
+        # 清空网格
+        self.board.reset()
         
-        # 重置按钮外观
-        for y in range(self.GRID_COUNT):
-            for x in range(self.GRID_COUNT):
-                self.buttons[y][x].config(
-                    text="", 
-                    bg="SystemButtonFace", 
-                    relief=tk.RAISED,
-                    state=tk.NORMAL
-                )
+        # 清空画布上的格子
+        self.view.clear()
     
     def generate_mines(self, exclude_x, exclude_y):
-        
-        # 计算3x3区域边界
-        min_x = max(0, exclude_x - 1)
-        max_x = min(self.GRID_COUNT - 1, exclude_x + 1)
-        min_y = max(0, exclude_y - 1)
-        max_y = min(self.GRID_COUNT - 1, exclude_y + 1)
-        
-        # 初始化候选空格列表（周围8个方向无地雷的格子）
-        safe_candidates = []
-        
-        # 收集所有可能的位置（排除3x3区域）
-        possible_cells = []
-        
-        for x in range(self.GRID_COUNT):
-            for y in range(self.GRID_COUNT):
-                # 排除3x3区域内的格子
-                if min_x <= x <= max_x and min_y <= y <= max_y:
-                    continue
-                    
-                possible_cells.append((x, y))
-        
-        # 找出3x3区域内可以作为空格的候选位置
-        for x in range(min_x, max_x + 1):
-            for y in range(min_y, max_y + 1):
-                # 检查周围8个方向是否都在3x3区域外
-                is_safe = True
-                for dx in [-1, 0, 1]:
-                    for dy in [-1, 0, 1]:
-                        if dx == 0 and dy == 0:
-                            continue
-                            
-                        nx, ny = x + dx, y + dy
-                        # 如果周围格子不在3x3区域内，标记为不安全
-                        if not (min_x <= nx <= max_x and min_y <= ny <= max_y):
-                            is_safe = False
-                            break
-                    if not is_safe:
-                        break
-                        
-                if is_safe:
-                    safe_candidates.append((x, y))
-        
-        # 确保候选空格包含点击位置本身
-        if (exclude_x, exclude_y) not in safe_candidates:
-            safe_candidates.append((exclude_x, exclude_y))
-        
-        # 从候选空格中选择至少3个（包括点击位置）
-        if len(safe_candidates) >= 3:
-            safe_spots = random.sample(safe_candidates, 3)
-            # 确保点击位置在选择中
-            if (exclude_x, exclude_y) not in safe_spots:
-                safe_spots[0] = (exclude_x, exclude_y)
-        else:
-            # 如果候选不足，添加点击位置并补充其他位置
-            safe_spots = [(exclude_x, exclude_y)]
-            # 补充其他位置（按距离排序）
-            remaining = [
-                (x, y) for x in range(min_x, max_x + 1)
-                for y in range(min_y, max_y + 1)
-                if (x, y) != (exclude_x, exclude_y)
-            ]
-            # 按距离排序
-            remaining.sort(key=lambda p: (p[0] - exclude_x)**2 + (p[1] - exclude_y)**2)
-            safe_spots.extend(remaining[:2])  # 取最近的两个
-        
-        # 计算3x3区域内需要填充的地雷数
-        mines_in_3x3_area = min(
-            3,  # 限制3x3区域内最多3个地雷，确保有足够空格
-            len([(x, y) for x in range(min_x, max_x + 1) 
-                for y in range(min_y, max_y + 1) 
-                if (x, y) not in safe_spots])
-        )
-        
-        # 选择3x3区域内的地雷位置（排除安全空格）
-        possible_mines_in_3x3 = [
-            (x, y) for x in range(min_x, max_x + 1)
-            for y in range(min_y, max_y + 1)
-            if (x, y) not in safe_spots
-        ]
-        
-        mines_in_3x3 = []
-        if possible_mines_in_3x3 and mines_in_3x3_area > 0:
-            mines_in_3x3 = random.sample(possible_mines_in_3x3, mines_in_3x3_area)
-        
-        # 计算还需要放置的地雷数
-        remaining_mines = self.MINE_COUNT - len(mines_in_3x3)
-        
-        # 随机选择3x3区域外的地雷位置
-        outside_mines = random.sample(possible_cells, remaining_mines)
-        
-        # 设置地雷
-        mine_positions = mines_in_3x3 + outside_mines
-        
-        # 确保所有安全空格周围8个方向无地雷
-        for x, y in safe_spots:
-            for dx in [-1, 0, 1]:
-                for dy in [-1, 0, 1]:
-                    if dx == 0 and dy == 0:
-                        continue
-                        
-                    nx, ny = x + dx, y + dy
-                    if 0 <= nx < self.GRID_COUNT and 0 <= ny < self.GRID_COUNT:
-                        if (nx, ny) in mine_positions:
-                            mine_positions.remove((nx, ny))
-        
-        # 最终设置所有地雷位置
-        for x, y in mine_positions:
-            self.grid[x][y] = -1
-        
-        # 计算每个格子周围的地雷数
-        self.calculate_neighbor_mines()
-        
+        """随机放置恰好 MINE_COUNT 个地雷
+
+        点击处周围 3x3 区域内没有地雷，所以第一次点击必然翻开一片空白区域。
+        抽样与邻居计数的开销与地雷数成正比（有 NumPy 时为整体的数组运算）。
+        有棋盘缓存时优先使用缓存中从这里开局不需要猜测的布局，缓存里没有
+        合适的就立即退回随机布局并在界面上标明，从不在界面线程上生成或等待。
+        """
+        mines = None
+        board = self.board
+        if self.board_pool is not None:
+            mines = self.board_pool.take(self.GRID_COUNT, self.MINE_COUNT, exclude_x, exclude_y)
+            self.no_guess = mines is not None
+            self.mode_label.config(text="无需猜测" if self.no_guess else "可能需要猜测")
+        if mines is None:
+            mines = place_mines(self.GRID_COUNT, self.MINE_COUNT, exclude_x, exclude_y, self.rng)
+        board.load(mines)
+        
+        # 生成前插的旗子都算在安全格子上，现在扣除恰好插在地雷上的
+        self.safe_total = self.GRID_COUNT * self.GRID_COUNT - self.MINE_COUNT
+        self.wrong_flags = self.flags_used
+        if self.flags_used:
+            self.wrong_flags -= sum(1 for k in mines if board.is_flagged(k))
+    
+    @property
+    def grid(self):
+        """grid[x][y]：地雷为 -1，其他格子为周围的地雷数（只读视图）"""
+        return self.board.grid
+    
+    @property
+    def revealed(self):
+        return self.board.revealed
+    
+    @property
+    def flagged(self):
+        return self.board.flagged
     
     def calculate_neighbor_mines(self):
-        """计算每个格子周围的地雷数"""
-        for x in range(self.GRID_COUNT):
-            for y in range(self.GRID_COUNT):
-                if self.grid[x][y] == -1:
-                    continue
-                
-                count = 0
-                # 检查周围的8个方向
-                for dx in [-1, 0, 1]:
-                    for dy in [-1, 0, 1]:
-                        if dx == 0 and dy == 0:
-                            continue
-                        
-                        nx, ny = x + dx, y + dy
-                        if 0 <= nx < self.GRID_COUNT and 0 <= ny < self.GRID_COUNT:
-                            if self.grid[nx][ny] == -1:
-                                count += 1
-                
-                self.grid[x][y] = count
+        """按已放置的地雷重新计算每个格子周围的地雷数"""
+        self.board.load(self.board.mine_cells())
     
     def reveal_cell(self, x, y, is_first_click=False):
-        """翻开格子"""
+        """翻开格子
+
+        空白格子（周围没有地雷）会连锁翻开相邻格子。先用显式栈算出整片要翻开的
+        格子，再统一更新按钮，最后只检查一次胜利，大片区域不会递归过深。
+        第一次点击时点击处必然是空白格子，连锁翻开已经覆盖周围 3x3 区域，
+        is_first_click 只为兼容保留。
+        """
+        board = self.board
+        k = x * self.GRID_COUNT + y
         # 如果已经翻开或标记，不做处理
-        if self.revealed[x][y] or self.flagged[x][y]:
+        if board.is_revealed(k) or board.is_flagged(k):
             return
         
-        # 翻开格子
-        self.revealed[x][y] = True
-        
         # 如果是地雷，游戏结束
-        if self.grid[x][y] == -1:
+        if board.is_mine(k):
+            board.set_revealed(k)
             self.game_over = True
+            self.save_stats('loss')
             self.show_all_mines()
-            messagebox.showinfo("游戏结束", "你踩到地雷了!")
+            self.show_message("游戏结束", "你踩到地雷了!")
             return
         
-        # 更新按钮外观
-        if self.grid[x][y] == 0:
-            self.buttons[y][x].config(
-                text="", 
-                bg="lightgray", 
-                relief=tk.SUNKEN,
-                state=tk.DISABLED
-            )
-            
-            # 如果是第一次点击，自动翻开周围的空格子
-            if is_first_click:
-                # 计算3x3区域
-                min_x = max(0, x - 1)
-                max_x = min(self.GRID_COUNT - 1, x + 1)
-                min_y = max(0, y - 1)
-                max_y = min(self.GRID_COUNT - 1, y + 1)
-                
-                # 翻开3x3区域内的所有格子
-                for nx in range(min_x, max_x + 1):
-                    for ny in range(min_y, max_y + 1):
-                        self.reveal_cell(nx, ny)
-            else:
-                # 递归翻开周围的空格子
-                for dx in [-1, 0, 1]:
-                    for dy in [-1, 0, 1]:
-                        if dx == 0 and dy == 0:
-                            continue
-                        
-                        nx, ny = x + dx, y + dy
-                        if 0 <= nx < self.GRID_COUNT and 0 <= ny < self.GRID_COUNT:
-                            self.reveal_cell(nx, ny)
-
-        else:
-            # 根据数字设置不同颜色
-            colors = ["black", "blue", "green", "red", 
-                     "purple", "maroon", "cyan", "navy"]
-            self.buttons[y][x].config(
-                text=str(self.grid[x][y]), 
-                fg=colors[self.grid[x][y] - 1],
-                bg="lightgray", 
-                relief=tk.SUNKEN,
-                state=tk.DISABLED
-            )
+        opened = self.flood_fill(x, y)
+        self.revealed_safe += len(opened)
+        self.unsolved.append(opened)
+        self.analysis = None
+        self.update_revealed(opened)
         
         # 检查是否胜利
         self.check_victory()
     
+    def flood_fill(self, x, y):
+        """把 (x, y) 及连锁翻开的格子标记为已翻开，返回这些格子的列表"""
+        count = self.GRID_COUNT
+        return [divmod(k, count) for k in self.board.flood(x * count + y)]
+    
+    def update_revealed(self, cells):
+        """批量画出已翻开的格子"""
+        self.view.draw_revealed(cells, self.grid)
+    
+    def analyze(self):
+        """当前局面的地雷概率（solver_minesweeper.Analysis），翻开格子前重复调用不重新计算
+
+        旗子是玩家的猜测，不影响分析结果，所以插旗不会让它失效。
+        """
+        if self.analysis is None:
+            for cells in self.unsolved:
+                self.solver.reveal_board(cells, self.board)
+            self.unsolved = []
+            self.analysis = self.solver.analyze()
+        return self.analysis
+    
+    def show_hint(self):
+        """在棋盘上标出建议翻开的格子"""
+        if self.game_over or self.victory:
+            return
+        if self.first_click:
+            # 第一次点击必然安全，点中间
+            cell, probability = (self.GRID_COUNT // 2, self.GRID_COUNT // 2), 0.0
+        else:
+            cell, probability = self.solver.suggest(self.analyze())
+        self.view.set_hint(cell, probability == 0)
+    
+    def auto_play(self):
+        """每帧翻开一批必然安全的格子，直到没有可以确定的格子"""
+        self.stop_auto()
+        if self.game_over or self.victory:
+            return
+        if self.first_click:
+            self.on_left_click(self.GRID_COUNT // 2, self.GRID_COUNT // 2)
+        else:
+            safe = [cell for cell in self.analyze().safe if not self.flagged[cell[0]][cell[1]]]
+            if not safe:
+                return
+            for x, y in safe:
+                if not self.revealed[x][y]:
+                    self.reveal_cell(x, y)
+                if self.game_over or self.victory:
+                    return
+        self.auto_id = self.root.after(16, self.auto_play)
+    
+    def stop_auto(self):
+        if self.auto_id is not None:
+            self.root.after_cancel(self.auto_id)
+            self.auto_id = None
+    
     def toggle_flag(self, x, y):
         """切换标记状态"""
+        board = self.board
+        k = x * self.GRID_COUNT + y
         # 如果已经翻开，不做处理
-        if self.revealed[x][y]:
+        if board.is_revealed(k):
             return
         
         # 切换标记状态
-        self.flagged[x][y] = not self.flagged[x][y]
-        
-        if self.flagged[x][y]:
-            self.buttons[y][x].config(text="🚩", bg="yellow")
-            self.flags_used += 1
-        else:
-            self.buttons[y][x].config(text="", bg="SystemButtonFace")
-            self.flags_used -= 1
+        change = 1 if board.toggle_flag(k) else -1
+        self.view.draw_flag(x, y, change > 0)
+        self.flags_used += change
+        if not board.is_mine(k):
+            self.wrong_flags += change
         
         # 更新剩余地雷数
         self.mines_label.config(text=f"剩余地雷: {self.MINE_COUNT - self.flags_used}")
@@ -324,36 +300,59 @@ class Minesweeper:
     
     def show_all_mines(self):
         """显示所有地雷"""
-        for x in range(self.GRID_COUNT):
-            for y in range(self.GRID_COUNT):
-                if self.grid[x][y] == -1:
-                    self.buttons[y][x].config(text="💣", bg="red")
+        for k in self.board.mine_cells():
+            self.view.draw_mine(*divmod(k, self.GRID_COUNT))
     
     def check_victory(self):
-        """检查是否胜利"""
-        for x in range(self.GRID_COUNT):
-            for y in range(self.GRID_COUNT):
-                # 如果有未翻开的非地雷格子，游戏未胜利
-                if not self.revealed[x][y] and self.grid[x][y] != -1:
-                    return False
-                # 如果有标记错误的格子，游戏未胜利
-                if self.flagged[x][y] and self.grid[x][y] != -1:
-                    return False
+        """检查是否胜利，只比较计数，与棋盘大小无关"""
+        # 还没有生成地雷，或有未翻开的非地雷格子，游戏未胜利
+        if self.safe_total is None or self.revealed_safe < self.safe_total:
+            return False
+        # 如果有标记错误的格子，游戏未胜利
+        if self.wrong_flags:
+            return False
         
         # 所有非地雷格子都已翻开，游戏胜利
+        if not self.victory:
+            self.save_stats('victory')
         self.victory = True
         self.show_all_mines()
-        messagebox.showinfo("恭喜", "你赢了!")
+        self.show_message("恭喜", "你赢了!")
         return True
     
+    def show_message(self, title, message):
+        """在当前事件处理完后弹出对话框，等待玩家关闭的时间不计入 reveal_cell 等的埋点耗时"""
+        self.root.after_idle(lambda: messagebox.showinfo(title, message))
+    
+    def save_stats(self, result):
+        """记录本局结果（只放入后台写入队列）"""
+        if self.stats is None or self.start_time is None:
+            return
+        self.stats.record('minesweeper', self.GRID_COUNT, result,
+                          duration=time.time() - self.start_time)
+    
+    def on_canvas_event(self, event, handler):
+        cell = self.view.cell_at(event.x, event.y)
+        if cell is not None:
+            handler(*cell)
+    
+    def on_motion(self, event):
+        """鼠标所在的未翻开格子高亮显示"""
+        cell = self.view.cell_at(event.x, event.y)
+        if cell is not None and (self.revealed[cell[0]][cell[1]] or self.game_over or self.victory):
+            cell = None
+        self.view.set_hover(cell)
+    
     def on_left_click(self, x, y):
         """处理左键点击"""
         if self.game_over or self.victory:
             return
+        self.view.set_hint(None)
         
         # 第一次点击不会踩到地雷
         if self.first_click:
             self.first_click = False
+            self.start_time = time.time()
             self.generate_mines(x, y)
             # 第一次点击时传入特殊标记
             self.reveal_cell(x, y, True)
@@ -368,6 +367,37 @@ class Minesweeper:
         self.toggle_flag(x, y)
 
 if __name__ == "__main__":
+    import argparse
+    import instrument
+    from noguess_minesweeper import BoardPool
+    from stats_store import StatsStore
+    parser = argparse.ArgumentParser(description="扫雷")
+    parser.add_argument('--size', type=int, default=15, help="棋盘边长")
+    parser.add_argument('--mines', type=int, default=40, help="地雷数")
+    parser.add_argument('--no-guess', action='store_true',
+                        help="使用后台预先生成的、不需要猜测的棋盘")
+    parser.add_argument('--infinite', action='store_true',
+                        help="无边界的棋盘（--size 为窗口显示的格子数）")
+    parser.add_argument('--density', type=float, default=0.18, help="无边界棋盘的地雷密度")
+    parser.add_argument('--seed', type=int, default=None, help="无边界棋盘的种子")
+    args = parser.parse_args()
+    # 设置环境变量 TINY_GAME_PROFILE=结果.json 开启性能埋点
+    profiler = instrument.from_env()
+    if profiler:
+        instrument.instrument_minesweeper(profiler, Minesweeper)
     root = tk.Tk()
-    game = Minesweeper(root)
-    root.mainloop()    
\ No newline at end of file
+    if profiler:
+        profiler.install_tk(root)
+    pool = BoardPool() if args.no_guess and not args.infinite else None
+    if args.infinite:
+        from infinite_minesweeper import InfiniteMinesweeper
+        game = InfiniteMinesweeper(root, seed=args.seed, density=args.density,
+                                   view_count=args.size, stats=StatsStore())
+    else:
+        game = Minesweeper(root, grid_count=args.size, mine_count=args.mines,
+                           stats=StatsStore(), board_pool=pool)
+    if profiler:
+        instrument.attach(root, profiler)
+    root.mainloop()
+    if pool is not None:
+        pool.close()    
\ No newline at end of file
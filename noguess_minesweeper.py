@@ -0,0 +1,246 @@
+"""不需要猜测的扫雷棋盘
+
+generate_board() 生成从指定格子开局、只靠推理就能翻开全部安全格子的布局：
+先按普通规则随机放雷，再用 solver_minesweeper.MineSolver 模拟玩家推理；
+卡住时把一个前沿上的地雷挪到还看不到的内部区域（修补），然后从头重新
+验证，修补次数过多就换一个新的随机布局。
+
+这个搜索比普通放雷慢得多，所以由 BoardPool 在后台进程池中提前生成，按
+(尺寸, 地雷数) 分别缓存。一个棋盘可以服务它开局空白区域中的任何一个格子
+（点在这片区域的空白格子上翻开的是同一片区域），再加上正方形棋盘的 8 种
+旋转、翻转，缓存中的几个棋盘通常就能覆盖大部分点击位置。第一次点击时只
+在缓存里查找，找不到就返回 None，由调用方决定当场生成还是退回普通的随机
+布局。
+"""
+import os
+import random
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+from minefield import excluded_cells, place_mines, neighbor_counts
+from solver_minesweeper import MineSolver
+
+# 一个随机布局最多修补的次数
+MAX_REPAIRS = 200
+# 后台一批生成失败后，隔多久再试（秒），连续失败时加倍，直到上限
+RETRY_DELAY = 5.0
+MAX_RETRY_DELAY = 300.0
+
+
+def _flood(grid, revealed, size, x, y):
+    """翻开 (x, y) 及连锁翻开的格子，返回这些格子的列表（规则同 Minesweeper.flood_fill）"""
+    revealed[x][y] = True
+    opened = [(x, y)]
+    stack = [(x, y)] if grid[x][y] == 0 else []
+    while stack:
+        cx, cy = stack.pop()
+        for nx in range(max(0, cx - 1), min(size, cx + 2)):
+            for ny in range(max(0, cy - 1), min(size, cy + 2)):
+                if not revealed[nx][ny]:
+                    revealed[nx][ny] = True
+                    opened.append((nx, ny))
+                    if grid[nx][ny] == 0:
+                        stack.append((nx, ny))
+    return opened
+
+
+def solve(grid, size, mine_count, x, y, solver=None):
+    """从 (x, y) 开局只做必然安全的翻开
+
+    返回 (是否翻开了全部安全格子, revealed, 最后一次分析)。
+    """
+    solver = solver or MineSolver(size, mine_count)
+    solver.reset()
+    revealed = [[False] * size for _ in range(size)]
+    remaining = size * size - mine_count
+    remaining -= len(_flood_and_record(solver, grid, revealed, size, x, y))
+    analysis = None
+    while remaining:
+        analysis = solver.analyze()
+        safe = analysis.safe
+        if (not safe and analysis.exact and analysis.interior == 0
+                and solver.unrevealed > len(analysis.probabilities)):
+            # 剩下的地雷都在前沿上，内部格子全部安全
+            frontier = analysis.probabilities
+            safe = [(cx, cy) for cx in range(size) for cy in range(size)
+                    if not revealed[cx][cy] and (cx, cy) not in frontier]
+        if not safe:
+            return False, revealed, analysis
+        for cx, cy in safe:
+            if not revealed[cx][cy]:
+                remaining -= len(_flood_and_record(solver, grid, revealed, size, cx, cy))
+    return True, revealed, analysis
+
+
+def _flood_and_record(solver, grid, revealed, size, x, y):
+    opened = _flood(grid, revealed, size, x, y)
+    solver.reveal(opened, grid)
+    return opened
+
+
+def generate_board(size, mine_count, x, y, rng, max_candidates=100):
+    """生成从 (x, y) 开局不需要猜测的布局，返回排好序的地雷格子编号列表
+
+    max_candidates 个随机布局都修补失败时返回 None。
+    """
+    excluded = set(excluded_cells(size, x, y))
+    solver = MineSolver(size, mine_count)
+    for _ in range(max_candidates):
+        mines = set(int(k) for k in place_mines(size, mine_count, x, y, rng))
+        for _ in range(MAX_REPAIRS):
+            grid = neighbor_counts(sorted(mines), size)
+            solved, revealed, analysis = solve(grid, size, mine_count, x, y, solver)
+            if solved:
+                return sorted(mines)
+            # 修补：把前沿上的一个地雷挪到内部（没有任何已翻开的邻居）
+            frontier = [cx * size + cy for cx, cy in analysis.probabilities
+                        if cx * size + cy in mines]
+            interior = [k for k in range(size * size)
+                        if k not in mines and k not in excluded
+                        and not revealed[k // size][k % size]
+                        and divmod(k, size) not in analysis.probabilities]
+            if not frontier or not interior:
+                break
+            mines.remove(rng.choice(frontier))
+            mines.add(rng.choice(interior))
+    return None
+
+
+def opening_cells(mines, size, x, y):
+    """从 (x, y) 开局时翻开的空白格子编号（点在其中任何一个上都翻开同一片区域）"""
+    grid = neighbor_counts(mines, size)
+    revealed = [[False] * size for _ in range(size)]
+    return [cx * size + cy for cx, cy in _flood(grid, revealed, size, x, y) if grid[cx][cy] == 0]
+
+
+def transform(k, size, symmetry):
+    """正方形棋盘的 8 种旋转、翻转之一，symmetry 取 0~7"""
+    x, y = divmod(k, size)
+    if symmetry & 1:
+        x = size - 1 - x
+    if symmetry & 2:
+        y = size - 1 - y
+    if symmetry & 4:
+        x, y = y, x
+    return x * size + y
+
+
+def _generate_task(task):
+    size, mine_count, seed = task
+    rng = random.Random(seed)
+    x = rng.randrange(size)
+    y = rng.randrange(size)
+    mines = generate_board(size, mine_count, x, y, rng)
+    if mines is None:
+        return None
+    opening = opening_cells(mines, size, x, y)
+    # 推理结果不随旋转、翻转变化，但枚举预算与格子顺序有关，所以逐个验证
+    symmetries = [0]
+    solver = MineSolver(size, mine_count)
+    for symmetry in range(1, 8):
+        grid = neighbor_counts([transform(k, size, symmetry) for k in mines], size)
+        start = divmod(transform(opening[0], size, symmetry), size)
+        if solve(grid, size, mine_count, *start, solver)[0]:
+            symmetries.append(symmetry)
+    return mines, opening, symmetries
+
+
+class BoardPool:
+    """在后台进程池中预先生成不需要猜测的棋盘
+
+    每个 (尺寸, 地雷数) 最多缓存 per_key 个棋盘，最多保留 max_keys 种组合
+    （最久没用的先丢弃）。request() 开始为一种组合补充缓存，take() 只查找
+    缓存、从不等待。某种组合生成失败后暂停补充，RETRY_DELAY 秒后再试，
+    连续失败时间隔加倍。
+    """
+
+    def __init__(self, workers=None, per_key=8, max_keys=4, seed=None):
+        self.workers = workers or max(1, (os.cpu_count() or 2) - 1)
+        self.per_key = per_key
+        self.max_keys = max_keys
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        # (尺寸, 地雷数) -> [(地雷列表, {点击格子: 变换编号}), ...]
+        self.boards = OrderedDict()
+        self.pending = {}
+        # (尺寸, 地雷数) -> (下次可以重试的时间, 下次失败后的间隔)
+        self.failed = {}
+        self.executor = None
+        self.closed = False
+
+    def request(self, size, mine_count):
+        """为这种组合补充缓存（立即返回）"""
+        key = (size, mine_count)
+        with self.lock:
+            if self.closed:
+                return
+            retry = self.failed.get(key)
+            if retry is not None and time.monotonic() < retry[0]:
+                return
+            self.boards.setdefault(key, [])
+            self.boards.move_to_end(key)
+            while len(self.boards) > self.max_keys:
+                self.boards.popitem(last=False)
+            missing = self.per_key - len(self.boards[key]) - self.pending.get(key, 0)
+            if missing <= 0:
+                return
+            if self.executor is None:
+                self.executor = ProcessPoolExecutor(max_workers=self.workers)
+            self.pending[key] = self.pending.get(key, 0) + missing
+            seeds = [self.rng.getrandbits(64) for _ in range(missing)]
+        for seed in seeds:
+            future = self.executor.submit(_generate_task, (size, mine_count, seed))
+            future.add_done_callback(lambda future, key=key: self._finished(key, future))
+
+    def _finished(self, key, future):
+        with self.lock:
+            self.pending[key] -= 1
+            if future.cancelled() or future.exception() is not None:
+                return
+            result = future.result()
+            if result is None:
+                # 这个密度可能很难生成，推迟一段时间再试
+                delay = self.failed.get(key, (0, RETRY_DELAY))[1]
+                self.failed[key] = (time.monotonic() + delay, min(delay * 2, MAX_RETRY_DELAY))
+                return
+            self.failed.pop(key, None)
+            boards = self.boards.get(key)
+            if boards is None or len(boards) >= self.per_key:
+                return
+            mines, opening, symmetries = result
+            size = key[0]
+            coverage = {}
+            for symmetry in symmetries:
+                for k in opening:
+                    coverage.setdefault(transform(k, size, symmetry), symmetry)
+            boards.append((mines, coverage))
+
+    def take(self, size, mine_count, x, y):
+        """取出一个从 (x, y) 开局不需要猜测的布局（地雷格子编号列表），没有时返回 None"""
+        key = (size, mine_count)
+        k = x * size + y
+        with self.lock:
+            boards = self.boards.get(key, ())
+            for index, (mines, coverage) in enumerate(boards):
+                symmetry = coverage.get(k)
+                if symmetry is not None:
+                    del boards[index]
+                    break
+            else:
+                return None
+        self.request(size, mine_count)
+        return sorted(transform(mine, size, symmetry) for mine in mines)
+
+    def ready(self, size, mine_count):
+        """已经缓存的棋盘数"""
+        with self.lock:
+            return len(self.boards.get((size, mine_count), ()))
+
+    def close(self):
+        with self.lock:
+            self.closed = True
+            executor, self.executor = self.executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
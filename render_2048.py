@@ -0,0 +1,119 @@
+"""2048 画布的增量渲染
+
+BoardRenderer 记住上一次画出的打包棋盘，渲染新棋盘时只对发生变化的格子
+调用 itemconfig；LabelBatch 把分数等标签的更新合并到每帧一次。在远程 X/VNC
+上每次 Tk 调用都是一次往返，减少调用次数就是减少延迟。
+"""
+
+# 不同数字的颜色
+COLORS = {
+    0: "#cdc1b4",
+    2: "#eee4da",
+    4: "#ede0c8",
+    8: "#f2b179",
+    16: "#f59563",
+    32: "#f67c5f",
+    64: "#f65e3b",
+    128: "#edcf72",
+    256: "#edcc61",
+    512: "#edc850",
+    1024: "#edc53f",
+    2048: "#edc22e",
+    4096: "#3c3a32",
+    8192: "#3c3a32"
+}
+DEFAULT_COLOR = "#3c3a32"
+
+# 一帧的时长（毫秒）
+FRAME_MS = 16
+
+
+def tile_style(exponent):
+    """返回指数对应的 (背景色, 文本, 文本颜色)"""
+    value = 1 << exponent if exponent else 0
+    text = "" if value == 0 else str(value)
+    return COLORS.get(value, DEFAULT_COLOR), text, "#776e65" if value <= 4 else "white"
+
+
+# 按指数预先算好每种格子的样式
+TILE_STYLES = [tile_style(exponent) for exponent in range(16)]
+
+
+def _style(exponent):
+    # 稀疏大棋盘的指数可以超过 15
+    return TILE_STYLES[exponent] if exponent < 16 else tile_style(exponent)
+
+
+class BoardRenderer:
+    """只重绘变化格子的棋盘渲染器
+
+    cells 和 labels 是按行排列的画布对象编号（二维列表）。
+    """
+
+    def __init__(self, canvas, cells, labels, size):
+        self.canvas = canvas
+        self.size = size
+        self.cells = [item for row in cells for item in row]
+        self.labels = [item for row in labels for item in row]
+        self.shown = None
+
+    def invalidate(self):
+        """下次渲染时重绘全部格子"""
+        self.shown = None
+
+    def render(self, board):
+        """把打包棋盘画到画布上，返回重绘的格子数"""
+        if self.shown is None:
+            changed = range(self.size * self.size)
+        else:
+            changed = []
+            diff = self.shown ^ board
+            while diff:
+                low = diff & -diff
+                k = (low.bit_length() - 1) >> 2
+                changed.append(k)
+                diff &= ~(0xF << (4 * k))
+
+        itemconfig = self.canvas.itemconfig
+        for k in changed:
+            fill, text, text_fill = TILE_STYLES[(board >> (4 * k)) & 0xF]
+            itemconfig(self.cells[k], fill=fill)
+            itemconfig(self.labels[k], text=text, fill=text_fill)
+        self.shown = board
+        return len(changed)
+
+    def render_changes(self, changes):
+        """按 [(格子编号, 指数), ...] 重绘格子，用于稀疏引擎的 take_dirty()"""
+        itemconfig = self.canvas.itemconfig
+        for k, exponent in changes:
+            fill, text, text_fill = _style(exponent)
+            itemconfig(self.cells[k], fill=fill)
+            itemconfig(self.labels[k], text=text, fill=text_fill)
+        return len(changes)
+
+
+class LabelBatch:
+    """把标签文本的更新合并到每帧最多一次
+
+    set() 只记录最新的文本，到下一帧时统一写入；文本与已显示的相同则跳过。
+    """
+
+    def __init__(self, root, frame_ms=FRAME_MS):
+        self.root = root
+        self.frame_ms = frame_ms
+        self.pending = {}
+        self.shown = {}
+        self.after_id = None
+
+    def set(self, label, text):
+        self.pending[label] = text
+        if self.after_id is None:
+            self.after_id = self.root.after(self.frame_ms, self.flush)
+
+    def flush(self):
+        self.after_id = None
+        pending, self.pending = self.pending, {}
+        for label, text in pending.items():
+            if self.shown.get(label) != text:
+                label.config(text=text)
+                self.shown[label] = text
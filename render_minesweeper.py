@@ -0,0 +1,127 @@
+"""扫雷的单画布渲染
+
+整个棋盘画在一个 Canvas 上：开局时只有一块未翻开颜色的底板和网格线，格子
+被翻开、插旗或显示地雷时才为它创建矩形和文字（之后复用，只改配置），
+重置时按标签一次删除。点击与悬停各只有一个绑定，由像素坐标换算出格子，
+因此开局的开销与棋盘边长成正比，而不是与格子数成正比。
+"""
+import tkinter as tk
+
+HIDDEN_COLOR = "#c0c0c0"
+REVEALED_COLOR = "lightgray"
+GRID_LINE_COLOR = "#808080"
+FLAG_COLOR = "yellow"
+MINE_COLOR = "red"
+HOVER_COLOR = "lightblue"
+# 提示框：必然安全 / 只是概率最低
+HINT_SAFE_COLOR = "green"
+HINT_GUESS_COLOR = "orange"
+# 数字 1~8 的颜色
+NUMBER_COLORS = ["black", "blue", "green", "red", "purple", "maroon", "cyan", "navy"]
+
+
+class MineCanvas:
+    """扫雷棋盘画布；格子坐标与 Minesweeper 一致，x 为列、y 为行"""
+
+    def __init__(self, parent, size, cell_size, font):
+        self.size = size
+        self.cell_size = cell_size
+        self.font = font
+        side = size * cell_size
+        self.canvas = tk.Canvas(parent, width=side, height=side, bg=HIDDEN_COLOR,
+                                highlightthickness=0)
+        for k in range(size + 1):
+            offset = k * cell_size
+            self.canvas.create_line(0, offset, side, offset, fill=GRID_LINE_COLOR)
+            self.canvas.create_line(offset, 0, offset, side, fill=GRID_LINE_COLOR)
+        # 悬停高亮只有一个对象，随鼠标移动
+        self.hover = self.canvas.create_rectangle(0, 0, cell_size, cell_size, outline="",
+                                                  fill=HOVER_COLOR, state='hidden')
+        self.hovered = None
+        # 提示同样只有一个边框对象
+        self.hint = self.canvas.create_rectangle(0, 0, cell_size, cell_size, width=3,
+                                                 outline=HINT_SAFE_COLOR, state='hidden')
+        # 格子编号 x * size + y -> (矩形, 文字)
+        self.items = {}
+
+    def cell_at(self, px, py):
+        """像素坐标对应的格子 (x, y)，在棋盘外返回 None"""
+        x = int(px // self.cell_size)
+        y = int(py // self.cell_size)
+        if 0 <= x < self.size and 0 <= y < self.size:
+            return x, y
+        return None
+
+    def _cell(self, x, y):
+        k = x * self.size + y
+        item = self.items.get(k)
+        if item is None:
+            x1 = x * self.cell_size
+            y1 = y * self.cell_size
+            rect = self.canvas.create_rectangle(x1, y1, x1 + self.cell_size, y1 + self.cell_size,
+                                                outline=GRID_LINE_COLOR, tags='cell')
+            text = self.canvas.create_text(x1 + self.cell_size / 2, y1 + self.cell_size / 2,
+                                           text="", font=self.font, tags='cell')
+            item = self.items[k] = (rect, text)
+        return item
+
+    def _draw(self, x, y, fill, text="", text_fill="black"):
+        rect, label = self._cell(x, y)
+        self.canvas.itemconfig(rect, fill=fill, state='normal')
+        self.canvas.itemconfig(label, text=text, fill=text_fill, state='normal')
+
+    def clear(self):
+        """回到全部未翻开的状态"""
+        self.canvas.delete('cell')
+        self.items.clear()
+        self.set_hover(None)
+        self.set_hint(None)
+
+    def draw_revealed(self, cells, grid):
+        """画出已翻开的格子；grid[x][y] 为周围地雷数"""
+        for x, y in cells:
+            self.draw_number(x, y, grid[x][y])
+
+    def draw_number(self, x, y, value):
+        """画出一个已翻开的格子，value 为周围地雷数"""
+        if value > 0:
+            self._draw(x, y, REVEALED_COLOR, str(value), NUMBER_COLORS[value - 1])
+        else:
+            self._draw(x, y, REVEALED_COLOR)
+
+    def draw_flag(self, x, y, flagged):
+        if flagged:
+            self._draw(x, y, FLAG_COLOR, "🚩")
+        else:
+            # 取消旗子：隐藏这一格的对象，露出底板
+            rect, label = self._cell(x, y)
+            self.canvas.itemconfig(rect, state='hidden')
+            self.canvas.itemconfig(label, state='hidden')
+
+    def draw_mine(self, x, y):
+        self._draw(x, y, MINE_COLOR, "💣")
+
+    def set_hover(self, cell):
+        """高亮悬停的未翻开格子，None 表示取消高亮"""
+        if cell == self.hovered:
+            return
+        self.hovered = cell
+        if cell is None:
+            self.canvas.itemconfig(self.hover, state='hidden')
+            return
+        x1 = cell[0] * self.cell_size
+        y1 = cell[1] * self.cell_size
+        self.canvas.coords(self.hover, x1, y1, x1 + self.cell_size, y1 + self.cell_size)
+        self.canvas.itemconfig(self.hover, state='normal')
+
+    def set_hint(self, cell, safe=True):
+        """用边框标出提示的格子，None 表示取消"""
+        if cell is None:
+            self.canvas.itemconfig(self.hint, state='hidden')
+            return
+        x1 = cell[0] * self.cell_size
+        y1 = cell[1] * self.cell_size
+        self.canvas.coords(self.hint, x1, y1, x1 + self.cell_size, y1 + self.cell_size)
+        self.canvas.itemconfig(self.hint, outline=HINT_SAFE_COLOR if safe else HINT_GUESS_COLOR,
+                               state='normal')
+        self.canvas.tag_raise(self.hint)
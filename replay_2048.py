@@ -0,0 +1,366 @@
+"""2048 对局录像
+
+一局录像 = 种子 + 每步 2 位的方向流 + 定期的局面快照。对局使用 CompactRandom
+（状态只有一个 64 位整数的随机数生成器），所以快照可以连同随机数状态一起
+保存，回放时可以直接跳到第 N 步，而不必从头重新模拟。
+
+单局二进制格式（小端序）：
+    头部    magic 'R2K' | 版本 u8 | 尺寸 u8 | 种子 u64 | 步数 u32 |
+            快照间隔 u16 | 快照数 u32 | 最终得分 u64 | 最终棋盘
+    快照    步数 u32 | 棋盘 | 得分 u64 | largestnum 指数 u8 | 随机数状态 u64 |
+            空格数 u16 | 空格编号（尺寸² 不超过 256 时每个 u8，否则 u16）
+    方向流  每字节 4 步，低位在前
+棋盘按 engine_2048 的打包格式保存为 ceil(尺寸² / 2) 字节。快照中保存空格
+集合的内部顺序，因为新数字的位置是按这个顺序抽取的。
+
+录像档案是若干条“长度 u32 + 单局数据”的顺序拼接，可以流式读取。
+
+用法：python replay_2048.py verify games.r2k
+      python replay_2048.py show games.r2k --game 0 --move 100
+"""
+import argparse
+import array
+import hashlib
+import os
+import random
+import struct
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from engine_2048 import Engine2048, board_to_grid
+
+MAGIC = b'R2K'
+VERSION = 1
+SNAPSHOT_INTERVAL = 64
+
+_MASK64 = (1 << 64) - 1
+_HEADER = struct.Struct('<3sBBQIHIQ')
+_SNAPSHOT_TAIL = struct.Struct('<QBQ')
+_U32 = struct.Struct('<I')
+_U16 = struct.Struct('<H')
+
+
+class CompactRandom(random.Random):
+    """SplitMix64 随机数生成器，全部状态是一个 64 位整数，便于写入快照"""
+
+    def seed(self, a=None, version=2):
+        if a is None:
+            a = int.from_bytes(os.urandom(8), 'little')
+        elif not isinstance(a, int):
+            # 不用 hash()，字符串的哈希值每次启动都不同
+            a = int.from_bytes(hashlib.sha256(str(a).encode()).digest()[:8], 'little')
+        self.state = a & _MASK64
+        self.gauss_next = None
+
+    def next64(self):
+        self.state = z = (self.state + 0x9E3779B97F4A7C15) & _MASK64
+        z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+        z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & _MASK64
+        return z ^ (z >> 31)
+
+    def random(self):
+        return (self.next64() >> 11) * (1.0 / (1 << 53))
+
+    def getrandbits(self, k):
+        result = 0
+        filled = 0
+        while filled < k:
+            result |= self.next64() << filled
+            filled += 64
+        return result & ((1 << k) - 1)
+
+    def getstate(self):
+        return self.state
+
+    def setstate(self, state):
+        self.state = state
+
+
+def _board_bytes(size):
+    return (size * size + 1) // 2
+
+
+def _cell_typecode(size):
+    return 'B' if size * size <= 256 else 'H'
+
+
+class Replay:
+    """一局录像
+
+    moves 为打包的方向流（每字节 4 步），snapshots 为
+    [(步数, 棋盘, 得分, largestnum 指数, 随机数状态, 空格顺序), ...]，按步数递增。
+    """
+
+    def __init__(self, size, seed, moves=None, count=0, snapshots=None,
+                 final_score=0, final_board=0, interval=SNAPSHOT_INTERVAL):
+        self.size = size
+        self.seed = seed
+        self.moves = moves if moves is not None else bytearray()
+        self.count = count
+        self.snapshots = snapshots if snapshots is not None else []
+        self.final_score = final_score
+        self.final_board = final_board
+        self.interval = interval
+
+    def __len__(self):
+        return self.count
+
+    def direction(self, index):
+        return (self.moves[index >> 2] >> (2 * (index & 3))) & 3
+
+    def directions(self):
+        for index in range(self.count):
+            yield self.direction(index)
+
+    def append(self, direction):
+        if self.count & 3 == 0:
+            self.moves.append(0)
+        self.moves[-1] |= direction << (2 * (self.count & 3))
+        self.count += 1
+
+    def new_engine(self):
+        """返回一局刚开局的引擎（已生成两个初始数字）"""
+        engine = Engine2048(self.size, CompactRandom(self.seed))
+        engine.reset()
+        return engine
+
+    def seek(self, index):
+        """返回第 index 步之后的局面，从最近的快照开始模拟"""
+        if not 0 <= index <= self.count:
+            raise IndexError(index)
+        start = 0
+        engine = None
+        for snapshot in self.snapshots:
+            if snapshot[0] > index:
+                break
+            start = snapshot[0]
+            engine = self._restore(snapshot)
+        if engine is None:
+            engine = self.new_engine()
+        for position in range(start, index):
+            engine.step(self.direction(position))
+        return engine
+
+    def _restore(self, snapshot):
+        _index, board, score, largest_exp, state, free = snapshot
+        engine = Engine2048(self.size, CompactRandom())
+        engine.board = board
+        engine.free.restore(free)
+        engine.score = score
+        engine.largestnum = 1 << largest_exp if largest_exp else 0
+        engine.rng.setstate(state)
+        return engine
+
+    def replay(self):
+        """从头回放，逐步产出 (步数, 引擎)；引擎对象在各步之间复用"""
+        engine = self.new_engine()
+        yield 0, engine
+        for index in range(self.count):
+            engine.step(self.direction(index))
+            yield index + 1, engine
+
+    def verify(self):
+        """重新模拟整局，检查每步都有效且最终得分与棋盘一致"""
+        engine = self.new_engine()
+        for index in range(self.count):
+            _gained, changed = engine.step(self.direction(index))
+            if not changed:
+                return False
+        return engine.score == self.final_score and engine.board == self.final_board
+
+    def to_bytes(self):
+        board_bytes = _board_bytes(self.size)
+        parts = [_HEADER.pack(MAGIC, VERSION, self.size, self.seed & _MASK64,
+                              self.count, self.interval, len(self.snapshots),
+                              self.final_score),
+                 self.final_board.to_bytes(board_bytes, 'little')]
+        typecode = _cell_typecode(self.size)
+        for index, board, score, largest_exp, state, free in self.snapshots:
+            parts.append(_U32.pack(index))
+            parts.append(board.to_bytes(board_bytes, 'little'))
+            parts.append(_SNAPSHOT_TAIL.pack(score, largest_exp, state))
+            parts.append(_U16.pack(len(free)))
+            cells = array.array(typecode, free)
+            if cells.itemsize > 1 and sys.byteorder != 'little':
+                cells.byteswap()
+            parts.append(cells.tobytes())
+        parts.append(bytes(self.moves))
+        return b''.join(parts)
+
+    @classmethod
+    def from_bytes(cls, data):
+        data = memoryview(data)
+        (magic, version, size, seed, count, interval, snapshot_count,
+         final_score) = _HEADER.unpack_from(data, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("不是 2048 录像数据")
+        board_bytes = _board_bytes(size)
+        typecode = _cell_typecode(size)
+        offset = _HEADER.size
+        final_board = int.from_bytes(data[offset:offset + board_bytes], 'little')
+        offset += board_bytes
+        snapshots = []
+        for _ in range(snapshot_count):
+            index, = _U32.unpack_from(data, offset)
+            offset += _U32.size
+            board = int.from_bytes(data[offset:offset + board_bytes], 'little')
+            offset += board_bytes
+            score, largest_exp, state = _SNAPSHOT_TAIL.unpack_from(data, offset)
+            offset += _SNAPSHOT_TAIL.size
+            free_count, = _U16.unpack_from(data, offset)
+            offset += _U16.size
+            cells = array.array(typecode)
+            cells.frombytes(data[offset:offset + free_count * cells.itemsize])
+            if cells.itemsize > 1 and sys.byteorder != 'little':
+                cells.byteswap()
+            offset += free_count * cells.itemsize
+            snapshots.append((index, board, score, largest_exp, state, cells.tolist()))
+        moves = bytearray(data[offset:offset + (count + 3) // 4])
+        return cls(size, seed, moves, count, snapshots, final_score, final_board,
+                   interval)
+
+
+class GameRecorder:
+    """边下边录：通过 step() 下棋，只记录有效的移动"""
+
+    def __init__(self, size=6, seed=None, interval=SNAPSHOT_INTERVAL):
+        if seed is None:
+            seed = int.from_bytes(os.urandom(8), 'little')
+        self.replay = Replay(size, seed, interval=interval)
+        self.engine = self.replay.new_engine()
+
+    def step(self, direction):
+        gained, changed = self.engine.step(direction)
+        if changed:
+            self.record(direction)
+        return gained, changed
+
+    def record(self, direction):
+        """记录一步已经在 self.engine 上完成的有效移动（含新数字的生成）"""
+        replay = self.replay
+        replay.append(direction)
+        if replay.count % replay.interval == 0:
+            engine = self.engine
+            replay.snapshots.append((replay.count, engine.board, engine.score,
+                                     engine.largestnum.bit_length() - 1 if engine.largestnum else 0,
+                                     engine.rng.getstate(), list(engine.free.cells)))
+
+    def finish(self):
+        self.replay.final_score = self.engine.score
+        self.replay.final_board = self.engine.board
+        return self.replay
+
+
+def append_archive(path, replays):
+    """把录像追加到档案文件末尾"""
+    with open(path, 'ab') as f:
+        for replay in replays:
+            data = replay.to_bytes()
+            f.write(_U32.pack(len(data)))
+            f.write(data)
+
+
+def iter_archive_bytes(path):
+    with open(path, 'rb') as f:
+        while True:
+            head = f.read(_U32.size)
+            if len(head) < _U32.size:
+                return
+            length, = _U32.unpack(head)
+            yield f.read(length)
+
+
+def read_archive(path):
+    """流式读取档案中的录像"""
+    for data in iter_archive_bytes(path):
+        yield Replay.from_bytes(data)
+
+
+def _verify_chunk(chunk):
+    return [Replay.from_bytes(data).verify() for data in chunk]
+
+
+def _chunks(items, chunk_size):
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _bounded_map(pool, func, items, limit):
+    """按顺序返回 pool 上 func(item) 的结果，最多同时提交 limit 个，不预先读完 items"""
+    futures = deque()
+    for item in items:
+        futures.append(pool.submit(func, item))
+        if len(futures) >= limit:
+            yield futures.popleft().result()
+    while futures:
+        yield futures.popleft().result()
+
+
+def verify_archive(path, workers=None, chunk_size=256):
+    """批量校验档案中的全部录像，返回 (录像总数, 校验失败的录像编号列表)
+
+    边读边校验，同时在内存中的只有进程池正在处理的几批录像。
+    """
+    workers = workers or os.cpu_count() or 1
+    chunks = _chunks(iter_archive_bytes(path), chunk_size)
+    if workers == 1:
+        results = map(_verify_chunk, chunks)
+    else:
+        pool = ProcessPoolExecutor(max_workers=workers)
+        results = _bounded_map(pool, _verify_chunk, chunks, workers * 2)
+    failures = []
+    index = 0
+    try:
+        for chunk_results in results:
+            for ok in chunk_results:
+                if not ok:
+                    failures.append(index)
+                index += 1
+    finally:
+        if workers != 1:
+            pool.shutdown(cancel_futures=True)
+    return index, failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="2048 对局录像工具")
+    sub = parser.add_subparsers(dest='command', required=True)
+    verify = sub.add_parser('verify', help="校验档案中的全部录像")
+    verify.add_argument('path')
+    verify.add_argument('--workers', type=int, default=None)
+    show = sub.add_parser('show', help="显示某局某一步之后的棋盘")
+    show.add_argument('path')
+    show.add_argument('--game', type=int, default=0)
+    show.add_argument('--move', type=int, default=None)
+    args = parser.parse_args(argv)
+
+    if args.command == 'verify':
+        total, failures = verify_archive(args.path, args.workers)
+        print(f"共 {total} 局，校验失败 {len(failures)} 局")
+        for index in failures:
+            print(f"  第 {index} 局")
+        return 1 if failures else 0
+
+    # 只解析要显示的那一局
+    for number, data in enumerate(iter_archive_bytes(args.path)):
+        if number == args.game:
+            replay = Replay.from_bytes(data)
+            move = replay.count if args.move is None else args.move
+            engine = replay.seek(move)
+            print(f"第 {number} 局 第 {move}/{replay.count} 步 得分 {engine.score}")
+            for row in board_to_grid(engine.board, replay.size):
+                print(' '.join(f"{value:5d}" for value in row))
+            return 0
+    print("档案中没有这一局")
+    return 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
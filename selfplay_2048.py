@@ -0,0 +1,206 @@
+"""2048 多进程自我对局
+
+每局使用由总种子和对局编号派生的独立随机数流，因此无论进程数多少、对局
+被分到哪个进程，同一个种子得到的结果都完全相同。策略是可替换的：
+内置策略按名字注册在 POLICIES 中，也可以传入任意可 pickle 的工厂函数，
+工厂返回 policy(engine) -> direction。
+
+用法：python selfplay_2048.py --games 1000 --seed 1 --policy expectimax
+"""
+import argparse
+import json
+import os
+import random
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from engine_2048 import Engine2048, UP, DOWN, LEFT, RIGHT, move_board
+from ai_2048 import Expectimax2048
+
+ALL_DIRECTIONS = (UP, DOWN, LEFT, RIGHT)
+# 策略连续给出这么多次不能移动的方向时判定策略出错（四个方向都试过也够了）
+MAX_NOOP_MOVES = 4
+
+
+def game_rng(seed, index):
+    """第 index 局的随机数流，只取决于总种子和对局编号"""
+    return random.Random(f"{seed}:{index}")
+
+
+def random_policy(size, rng):
+    """在可移动的方向中随机选择"""
+    def policy(engine):
+        return rng.choice(engine.legal_directions() or ALL_DIRECTIONS)
+    return policy
+
+
+def greedy_policy(size, rng):
+    """选择本步得分最高的有效方向，得分相同时随机选择"""
+    def policy(engine):
+        best = []
+        best_gain = -1
+        for direction in engine.legal_directions():
+            _moved, gained = move_board(engine.board, direction, size)
+            if gained > best_gain:
+                best, best_gain = [direction], gained
+            elif gained == best_gain:
+                best.append(direction)
+        return rng.choice(best) if best else UP
+    return policy
+
+
+def expectimax_policy(size, rng, max_depth=1, time_budget=0):
+    """expectimax 策略；默认不限时、固定深度，保证结果可以复现"""
+    ai = Expectimax2048(size, max_depth=max_depth, time_budget=time_budget)
+
+    def policy(engine):
+        direction = ai.search(engine.board).direction
+        return UP if direction is None else direction
+    return policy
+
+
+POLICIES = {
+    'random': random_policy,
+    'greedy': greedy_policy,
+    'expectimax': expectimax_policy,
+}
+
+
+def play_game(policy, engine, max_moves=None, stop_at_victory=True):
+    """用 policy 下完一局，返回结果字典
+
+    policy 连续 MAX_NOOP_MOVES 次返回不能移动的方向时抛出 RuntimeError，
+    否则 max_moves 为 None 时会一直循环下去。
+    """
+    engine.reset()
+    moves = 0
+    noop_moves = 0
+    victory = False
+    while max_moves is None or moves < max_moves:
+        state = engine.check_game_state()
+        if state == 'victory':
+            victory = True
+            if stop_at_victory:
+                break
+        elif state == 'game_over':
+            break
+        direction = policy(engine)
+        _gained, changed = engine.step(direction)
+        if changed:
+            moves += 1
+            noop_moves = 0
+        else:
+            noop_moves += 1
+            if noop_moves >= MAX_NOOP_MOVES:
+                raise RuntimeError(f"策略连续 {noop_moves} 次返回不能移动的方向"
+                                   f"（最后一次为 {direction!r}，已走 {moves} 步）")
+    victory = victory or engine.is_victory()
+    return {
+        'score': engine.score,
+        'max_tile': 1 << engine.max_exp,
+        'moves': moves,
+        'victory': victory,
+    }
+
+
+def _resolve_policy(policy):
+    return POLICIES[policy] if isinstance(policy, str) else policy
+
+
+def _play_range(args):
+    """进程池中的工作函数：下完 [start, stop) 范围内的对局"""
+    seed, start, stop, size, policy, policy_kwargs, max_moves, stop_at_victory = args
+    factory = _resolve_policy(policy)
+    results = []
+    for index in range(start, stop):
+        # 策略与引擎共用这一局自己的随机数流
+        rng = game_rng(seed, index)
+        engine = Engine2048(size, rng)
+        result = play_game(factory(size, rng, **policy_kwargs), engine,
+                           max_moves, stop_at_victory)
+        result['index'] = index
+        results.append(result)
+    return results
+
+
+def _percentile(ordered, fraction):
+    if not ordered:
+        return 0
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def _summary(values):
+    ordered = sorted(values)
+    return {
+        'mean': sum(ordered) / len(ordered) if ordered else 0,
+        'min': ordered[0] if ordered else 0,
+        'p50': _percentile(ordered, 0.5),
+        'p90': _percentile(ordered, 0.9),
+        'max': ordered[-1] if ordered else 0,
+    }
+
+
+def aggregate(results):
+    """把每局结果汇总成最大数字分布、得分与步数统计以及 2048 达成率"""
+    results = sorted(results, key=lambda r: r['index'])
+    games = len(results)
+    victories = sum(r['victory'] for r in results)
+    return {
+        'games': games,
+        'max_tile': {str(tile): count for tile, count in
+                     sorted(Counter(r['max_tile'] for r in results).items())},
+        'score': _summary([r['score'] for r in results]),
+        'moves': _summary([r['moves'] for r in results]),
+        'victories': victories,
+        'victory_rate': victories / games if games else 0.0,
+    }
+
+
+def run(games, seed=0, policy='random', size=6, workers=None, chunk_size=None,
+        max_moves=None, stop_at_victory=True, **policy_kwargs):
+    """并行下 games 局并返回汇总结果
+
+    workers 默认为 CPU 核数；workers 为 1 时在当前进程中运行。对局按编号分块
+    分发，结果按编号排序后再汇总，所以与进程数和分块大小无关。
+    """
+    workers = workers or os.cpu_count() or 1
+    if chunk_size is None:
+        chunk_size = max(1, min(64, games // (workers * 4) or 1))
+    tasks = [(seed, start, min(start + chunk_size, games), size, policy,
+              policy_kwargs, max_moves, stop_at_victory)
+             for start in range(0, games, chunk_size)]
+    results = []
+    if workers == 1:
+        for task in tasks:
+            results.extend(_play_range(task))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for chunk in pool.map(_play_range, tasks):
+                results.extend(chunk)
+    return aggregate(results)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="2048 多进程自我对局")
+    parser.add_argument('--games', type=int, default=100)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--policy', choices=sorted(POLICIES), default='random')
+    parser.add_argument('--size', type=int, default=6)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--max-moves', type=int, default=None)
+    parser.add_argument('--depth', type=int, default=None, help="expectimax 搜索深度")
+    parser.add_argument('--play-past-victory', action='store_true',
+                        help="合成 2048 后继续下到无路可走")
+    args = parser.parse_args(argv)
+
+    policy_kwargs = {}
+    if args.depth is not None:
+        policy_kwargs['max_depth'] = args.depth
+    summary = run(args.games, args.seed, args.policy, args.size, args.workers,
+                  max_moves=args.max_moves,
+                  stop_at_victory=not args.play_past_victory, **policy_kwargs)
+    print(json.dumps(summary, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
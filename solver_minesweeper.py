@@ -0,0 +1,380 @@
+"""扫雷的地雷概率分析（提示与自动翻开）
+
+只使用玩家能看到的信息：已翻开格子上的数字和地雷总数。旗子是玩家的猜测，
+不参与推理。
+
+已翻开的数字格子中，周围还有未翻开格子的构成约束“这些格子里恰好有 N 个
+地雷”。先用简单规则确定一部分格子并从约束中去掉，剩下的约束涉及的未翻开
+格子（前沿）按约束相连分成互不相关的分量，每个分量单独枚举所有满足约束
+的布局，按地雷数统计方案数与每个格子是地雷的方案数。各分量的结果再按地雷总数组合：前沿之外的格子（内部）放剩下的
+地雷，方案数为组合数。概率用整数精确计算，所以“必然安全”和“必然是雷”
+的判断没有浮点误差。
+
+分析器自己记录哪些格子已翻开，每个约束记住它周围还没翻开的格子，
+reveal() 只处理新翻开的格子和受影响的约束，不扫描整个棋盘。analyze() 每次
+把全部约束重新分组（与约束数成正比），但化简和枚举的结果都按分量的约束
+内容缓存：翻开格子后只有发生变化的分量需要重新化简和枚举。
+"""
+from collections import OrderedDict, namedtuple
+from math import comb
+
+from board_minesweeper import COUNT_MASK
+
+# probabilities: {(x, y): 是地雷的概率}（仅前沿格子）；interior: 内部每个格子是
+# 地雷的概率；safe / mines: 必然安全 / 必然是雷的前沿格子；exact: 是否所有分量
+# 都完整枚举（超出枚举预算的分量按内部格子处理）
+Analysis = namedtuple('Analysis', 'probabilities interior safe mines exact')
+
+
+class _Budget(Exception):
+    pass
+
+
+def _enumerate(cells, constraints, max_nodes):
+    """枚举一个分量的全部布局
+
+    cells 为格子编号列表，constraints 为 [(格子下标元组, 地雷数), ...]。
+    返回 {地雷数: [方案数, [每个格子是地雷的方案数, ...]]}。
+    """
+    count = len(cells)
+    touching = [[] for _ in range(count)]
+    for c, (members, _value) in enumerate(constraints):
+        for index in members:
+            touching[index].append(c)
+    need = [value for _members, value in constraints]
+    free = [len(members) for members, _value in constraints]
+    assignment = [0] * count
+    result = {}
+    nodes = [0]
+
+    def search(index, mines):
+        nodes[0] += 1
+        if nodes[0] > max_nodes:
+            raise _Budget
+        if index == count:
+            entry = result.get(mines)
+            if entry is None:
+                entry = result[mines] = [0, [0] * count]
+            entry[0] += 1
+            per_cell = entry[1]
+            for k in range(count):
+                if assignment[k]:
+                    per_cell[k] += 1
+            return
+        related = touching[index]
+        for value in (0, 1):
+            ok = True
+            for c in related:
+                free[c] -= 1
+                need[c] -= value
+            for c in related:
+                if need[c] < 0 or need[c] > free[c]:
+                    ok = False
+                    break
+            if ok:
+                assignment[index] = value
+                search(index + 1, mines + value)
+            for c in related:
+                free[c] += 1
+                need[c] += value
+        assignment[index] = 0
+
+    search(0, 0)
+    return result
+
+
+def _convolve(a, b):
+    result = {}
+    for m1, w1 in a.items():
+        for m2, w2 in b.items():
+            result[m1 + m2] = result.get(m1 + m2, 0) + w1 * w2
+    return result
+
+
+class MineSolver:
+    """增量维护约束、按分量缓存枚举结果的地雷概率分析器
+
+    格子坐标与 Minesweeper 相同，使用 (x, y)，内部编号为 x * size + y。
+    """
+
+    def __init__(self, size, mine_count, cache_size=4096, max_nodes=200000):
+        self.size = size
+        self.mine_count = mine_count
+        self.cache_size = cache_size
+        self.max_nodes = max_nodes
+        self.cache = OrderedDict()
+        self.reset()
+
+    def reset(self):
+        # 已翻开的格子（按编号）
+        self.opened = bytearray(self.size * self.size)
+        # 数字格子编号 -> (数字, 周围未翻开格子的 frozenset)，只保留周围还有未翻开格子的
+        self.constraints = {}
+        # 未翻开的格子 -> 周围包含它的约束（数字格子编号）集合
+        self.watch = {}
+        # 上一次分析时各分量的化简结果：分量的约束 frozenset -> (确定的格子, 化简后的子分量)
+        self.propagated = {}
+        self.unrevealed = self.size * self.size
+
+    def _neighbors(self, k):
+        size = self.size
+        x, y = divmod(k, size)
+        return [nx * size + ny
+                for nx in range(max(0, x - 1), min(size, x + 2))
+                for ny in range(max(0, y - 1), min(size, y + 2))
+                if nx != x or ny != y]
+
+    def _record(self, items):
+        """记录新翻开的格子，items 为 (格子编号, 数字) 的可迭代对象"""
+        opened = self.opened
+        watch = self.watch
+        constraints = self.constraints
+        numbers = []
+        count = 0
+        for k, value in items:
+            if opened[k]:
+                continue
+            opened[k] = 1
+            count += 1
+            # 包含 k 的约束少了一个未翻开的格子，全部翻开的不再构成约束
+            for c in watch.pop(k, ()):
+                number, hidden = constraints[c]
+                hidden = hidden.difference((k,))
+                if hidden:
+                    constraints[c] = (number, hidden)
+                else:
+                    del constraints[c]
+            if value:
+                numbers.append((k, value))
+        self.unrevealed -= count
+        for k, value in numbers:
+            hidden = frozenset(n for n in self._neighbors(k) if not opened[n])
+            if hidden:
+                constraints[k] = (value, hidden)
+                for n in hidden:
+                    watch.setdefault(n, set()).add(k)
+
+    def reveal(self, cells, grid):
+        """记录新翻开的格子 [(x, y), ...]，grid[x][y] 为格子上的数字"""
+        size = self.size
+        self._record((x * size + y, grid[x][y]) for x, y in cells)
+
+    def reveal_board(self, cells, board):
+        """同 reveal()，数字直接从 board_minesweeper.MineBoard 的状态字节读取"""
+        size = self.size
+        data = board.cells
+        self._record((x * size + y, data[x * size + y] & COUNT_MASK) for x, y in cells)
+
+    @staticmethod
+    def _propagate(rows):
+        """先用简单规则确定一个分量中的一部分格子
+
+        rows 为 {格子 frozenset: 地雷数}，返回 ({格子编号: 0 或 1}, 化简后的约束)。
+        规则：约束的数字为 0 则其中全部安全，等于格子数则全部是雷；一个约束的
+        格子是另一个的子集时，差集中的地雷数为两者之差。确定的格子从约束中
+        去掉，剩下的分量更小，枚举的开销也随之大幅下降。
+        """
+        known = {}
+        changed = True
+        while changed:
+            changed = False
+            reduced = {}
+            for cells, value in rows.items():
+                fixed = [cell for cell in cells if cell in known]
+                if fixed:
+                    value -= sum(known[cell] for cell in fixed)
+                    cells = cells.difference(fixed)
+                if cells:
+                    reduced[cells] = value
+            rows = reduced
+            for cells, value in rows.items():
+                if value == 0 or value == len(cells):
+                    for cell in cells:
+                        known[cell] = 1 if value else 0
+                    changed = True
+            if changed:
+                continue
+            sharing = {}
+            for cells in rows:
+                for cell in cells:
+                    sharing.setdefault(cell, []).append(cells)
+            for small, value in rows.items():
+                others = set()
+                for cell in small:
+                    others.update(sharing[cell])
+                for large in others:
+                    if len(large) <= len(small) or not small < large:
+                        continue
+                    rest = large - small
+                    mines = rows[large] - value
+                    if mines == 0 or mines == len(rest):
+                        for cell in rest:
+                            known[cell] = 1 if mines else 0
+                        changed = True
+        return known, [(tuple(sorted(cells)), value) for cells, value in rows.items()]
+
+    @staticmethod
+    def _components(rows):
+        """把约束按共享的格子分组，返回 [[(格子集合, 数字), ...], ...]
+
+        格子集合为元组或 frozenset。
+        """
+        parent = {}
+
+        def find(k):
+            while parent[k] != k:
+                parent[k] = parent[parent[k]]
+                k = parent[k]
+            return k
+
+        for hidden, _value in rows:
+            cells = iter(hidden)
+            root = next(cells)
+            parent.setdefault(root, root)
+            root = find(root)
+            for cell in cells:
+                other = find(parent.setdefault(cell, cell))
+                if other != root:
+                    parent[other] = root
+        groups = {}
+        for hidden, value in rows:
+            groups.setdefault(find(next(iter(hidden))), []).append((hidden, value))
+        return list(groups.values())
+
+    def _solve_component(self, rows):
+        """返回 (格子列表, 枚举结果)；超出预算时枚举结果为 None"""
+        key = tuple(sorted(rows))
+        cached = self.cache.get(key)
+        if cached is not None:
+            self.cache.move_to_end(key)
+            return cached
+        # 沿着前沿（约束之间共享格子的关系）广度优先排列格子，使约束尽早完整、
+        # 尽早剪枝；按编号排列时一条斜向或竖向的前沿会让搜索宽度变成整条边长
+        sharing = {}
+        for c, (hidden, _value) in enumerate(key):
+            for cell in hidden:
+                sharing.setdefault(cell, []).append(c)
+        cells = []
+        index = {}
+        queued = [False] * len(key)
+        queued[0] = True
+        order = [0]
+        for c in order:
+            for cell in key[c][0]:
+                if cell in index:
+                    continue
+                index[cell] = len(cells)
+                cells.append(cell)
+                for other in sharing[cell]:
+                    if not queued[other]:
+                        queued[other] = True
+                        order.append(other)
+        constraints = [(tuple(index[cell] for cell in hidden), value) for hidden, value in key]
+        try:
+            result = _enumerate(cells, constraints, self.max_nodes)
+        except _Budget:
+            result = None
+        cached = (cells, result)
+        self.cache[key] = cached
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return cached
+
+    def _reduce(self):
+        """把约束分成分量并化简，返回 (确定的格子, 化简后的分量列表)；没有变化的分量直接复用上次的结果"""
+        rows = {}
+        for value, hidden in self.constraints.values():
+            rows[hidden] = value
+        previous = self.propagated
+        current = {}
+        known = {}
+        components = []
+        for component in self._components(rows.items()):
+            key = frozenset(component)
+            entry = previous.get(key)
+            if entry is None:
+                fixed, reduced = self._propagate(dict(component))
+                entry = (fixed, self._components(reduced) if reduced else [])
+            current[key] = entry
+            known.update(entry[0])
+            components.extend(entry[1])
+        self.propagated = current
+        return known, components
+
+    def analyze(self):
+        """计算当前局面下每个未翻开格子是地雷的概率"""
+        size = self.size
+        known, components = self._reduce()
+        solved = []
+        exact = True
+        frontier = len(known)
+        for component in components:
+            cells, result = self._solve_component(component)
+            if result is None:
+                exact = False
+                continue
+            solved.append((cells, result))
+            frontier += len(cells)
+        interior = self.unrevealed - frontier
+        remaining = self.mine_count - sum(known.values())
+
+        totals = [{m: entry[0] for m, entry in result.items()} for _cells, result in solved]
+        # others[i]：除第 i 个分量外所有分量的地雷数分布
+        prefix = [{0: 1}]
+        for distribution in totals:
+            prefix.append(_convolve(prefix[-1], distribution))
+        suffix = [{0: 1}]
+        for distribution in reversed(totals):
+            suffix.append(_convolve(suffix[-1], distribution))
+        suffix.reverse()
+
+        def ways(mines):
+            return comb(interior, remaining - mines) if 0 <= remaining - mines <= interior else 0
+
+        weight = sum(w * ways(m) for m, w in prefix[-1].items())
+        probabilities = {}
+        safe = []
+        mines = []
+        if weight == 0:
+            # 数字之间互相矛盾（不会在正常对局中出现）
+            return Analysis(probabilities, 0.0, safe, mines, False)
+        for cell, mine in known.items():
+            position = divmod(cell, size)
+            probabilities[position] = float(mine)
+            (mines if mine else safe).append(position)
+        for i, (cells, result) in enumerate(solved):
+            others = _convolve(prefix[i], suffix[i + 1])
+            scale = {m: sum(w * ways(m + m2) for m2, w in others.items()) for m in result}
+            for j, cell in enumerate(cells):
+                numerator = sum(entry[1][j] * scale[m] for m, entry in result.items())
+                position = divmod(cell, size)
+                probabilities[position] = numerator / weight
+                if numerator == 0:
+                    safe.append(position)
+                elif numerator == weight:
+                    mines.append(position)
+        if interior:
+            expected = sum(w * ways(m) * (remaining - m) for m, w in prefix[-1].items())
+            interior_probability = expected / (weight * interior)
+        else:
+            interior_probability = 0.0
+        return Analysis(probabilities, interior_probability, safe, mines, exact)
+
+    def suggest(self, analysis=None):
+        """返回 (建议翻开的格子, 它是地雷的概率)；没有未翻开的格子时返回 (None, 1.0)"""
+        analysis = analysis or self.analyze()
+        if analysis.safe:
+            return analysis.safe[0], 0.0
+        best = None
+        best_probability = 1.0
+        for cell, probability in analysis.probabilities.items():
+            if probability < best_probability:
+                best, best_probability = cell, probability
+        if self.unrevealed > len(analysis.probabilities) and (
+                best is None or analysis.interior < best_probability):
+            # 内部格子之间没有区别，取第一个未翻开且不在前沿上的
+            frontier = analysis.probabilities
+            for k, opened in enumerate(self.opened):
+                if not opened and divmod(k, self.size) not in frontier:
+                    return divmod(k, self.size), analysis.interior
+        return best, best_probability
@@ -0,0 +1,271 @@
+"""大棋盘 2048（稀疏存储）
+
+棋盘最大 64x64。每一行只保存有数字的格子，按列号排序的 (列号, 指数) 列表；
+移动时只处理这些格子，所以一次移动的开销取决于数字的个数而不是棋盘面积。
+每行的列表创建后不再原地修改，局面快照只需保存各行列表的引用。
+上下移动先按行号顺序把各行拆成列，移动后再按列号顺序拼回各行，两次都是
+顺序追加，不需要排序。
+
+与 engine_2048 不同，指数不受 4 位限制；合并规则（包括连续合并）与新方块的
+分布和 Engine2048 相同。
+"""
+import random
+
+from engine_2048 import (UP, DOWN, LEFT, RIGHT, VICTORY_EXPONENT, Engine2048,
+                         FreeCells, spawn_alias, sample_alias)
+
+MAX_SIZE = 64
+# 不超过这个尺寸时使用打包的 Engine2048
+DENSE_MAX_SIZE = 8
+
+
+def _merge(exponents):
+    """把已经压紧的一串指数向前合并，返回 (新的一串, 得分)"""
+    out = []
+    score = 0
+    for exponent in exponents:
+        if out and out[-1] == exponent:
+            out[-1] += 1
+            score += 1 << out[-1]
+        else:
+            out.append(exponent)
+    return out, score
+
+
+class SparseEngine2048:
+    """稀疏存储的 2048 引擎，接口与 Engine2048 一致
+
+    rows[i] 为第 i 行按列号排序的 [(列号, 指数), ...]。dirty 记录自上次
+    take_dirty() 以来内容变化过的格子编号 i*size + j，供界面只重绘这些格子。
+    """
+
+    def __init__(self, size=16, rng=None):
+        if not 2 <= size <= MAX_SIZE:
+            raise ValueError(f"棋盘尺寸必须在 2 到 {MAX_SIZE} 之间")
+        self.size = size
+        self.rng = rng if rng is not None else random
+        self.rows = [[] for _ in range(size)]
+        self.free = FreeCells(size * size)
+        self.dirty = set()
+        self.tile_count = 0
+        self.max_exp = 0
+        self.score = 0
+        self.largestnum = 0
+
+    def reset(self):
+        size = self.size
+        for i, row in enumerate(self.rows):
+            self.dirty.update(i * size + j for j, _ in row)
+        self.rows = [[] for _ in range(size)]
+        self.free.restore(range(size * size))
+        self.tile_count = 0
+        self.max_exp = 0
+        self.score = 0
+        self.largestnum = 0
+        # 随机生成两个初始数字
+        self.add_new_tile()
+        self.add_new_tile()
+
+    def _columns(self):
+        columns = [[] for _ in range(self.size)]
+        for i, row in enumerate(self.rows):
+            for j, exponent in row:
+                columns[j].append((i, exponent))
+        return columns
+
+    def _rows_from(self, columns):
+        rows = [[] for _ in range(self.size)]
+        for j, column in enumerate(columns):
+            for i, exponent in column:
+                rows[i].append((j, exponent))
+        return rows
+
+    def _move_lines(self, lines, toward_end):
+        """移动每条线，返回 (新的线列表, 得分, 变化的线编号)"""
+        size = self.size
+        new_lines = []
+        changed = []
+        score = 0
+        for index, line in enumerate(lines):
+            if not line:
+                new_lines.append(line)
+                continue
+            exponents = [exponent for _, exponent in line]
+            if toward_end:
+                merged, gained = _merge(exponents[::-1])
+                merged.reverse()
+                start = size - len(merged)
+            else:
+                merged, gained = _merge(exponents)
+                start = 0
+            new_line = [(start + k, exponent) for k, exponent in enumerate(merged)]
+            if new_line != line:
+                changed.append(index)
+                score += gained
+            new_lines.append(new_line)
+        return new_lines, score, changed
+
+    def _mark(self, old_line, new_line, line_index, horizontal):
+        """记录一条线上变化的格子，并同步空格集合"""
+        size = self.size
+        old = dict(old_line)
+        new = dict(new_line)
+        for position in old.keys() | new.keys():
+            exponent = new.get(position)
+            if old.get(position) == exponent:
+                continue
+            k = line_index * size + position if horizontal else position * size + line_index
+            self.dirty.add(k)
+            if exponent is None:
+                self.free.add(k)
+            else:
+                self.free.remove(k)
+                if exponent > self.max_exp:
+                    self.max_exp = exponent
+
+    def move(self, direction):
+        """执行一次移动，返回 (得分, 是否变化)；不生成新数字"""
+        horizontal = direction in (LEFT, RIGHT)
+        lines = self.rows if horizontal else self._columns()
+        new_lines, gained, changed = self._move_lines(lines, direction in (RIGHT, DOWN))
+        if not changed:
+            return 0, False
+        for index in changed:
+            old_count = len(lines[index])
+            self._mark(lines[index], new_lines[index], index, horizontal)
+            self.tile_count += len(new_lines[index]) - old_count
+        self.rows = new_lines if horizontal else self._rows_from(new_lines)
+        self.score += gained
+        self.largestnum = 1 << self.max_exp
+        return gained, True
+
+    def step(self, direction):
+        gained, changed = self.move(direction)
+        if changed:
+            self.add_new_tile()
+        return gained, changed
+
+    def spawn_value(self):
+        return sample_alias(spawn_alias(self.largestnum), self.rng.random())
+
+    def add_new_tile(self):
+        if not self.free:
+            return None
+        k = self.free.choice(self.rng)
+        value = self.spawn_value()
+        exponent = value.bit_length() - 1
+        i, j = divmod(k, self.size)
+        row = self.rows[i]
+        # 按列号插入，保持行内有序；生成新列表，不修改快照可能引用的旧列表
+        position = len(row)
+        while position > 0 and row[position - 1][0] > j:
+            position -= 1
+        self.rows[i] = row[:position] + [(j, exponent)] + row[position:]
+        self.free.remove(k)
+        self.dirty.add(k)
+        self.tile_count += 1
+        if exponent > self.max_exp:
+            self.max_exp = exponent
+        return (i, j), value
+
+    def snapshot(self):
+        """返回当前局面；各行列表与当前局面共享，开销与棋盘边长成正比"""
+        return tuple(self.rows), self.score, self.largestnum
+
+    def restore(self, state):
+        """恢复 snapshot() 返回的局面，只处理内容不同的行"""
+        rows, self.score, self.largestnum = state
+        for i, row in enumerate(rows):
+            if row is not self.rows[i]:
+                self._mark(self.rows[i], row, i, True)
+        self.rows = list(rows)
+        self.tile_count = sum(len(row) for row in rows)
+        self.max_exp = max((exponent for row in rows for _, exponent in row), default=0)
+
+    def take_dirty(self):
+        """返回并清空变化过的格子 [(编号, 指数), ...]，空格的指数为 0"""
+        size = self.size
+        result = []
+        for k in self.dirty:
+            i, j = divmod(k, size)
+            result.append((k, self.get_exponent(i, j)))
+        self.dirty.clear()
+        return result
+
+    def get_exponent(self, i, j):
+        for column, exponent in self.rows[i]:
+            if column == j:
+                return exponent
+        return 0
+
+    def get(self, i, j):
+        exponent = self.get_exponent(i, j)
+        return 1 << exponent if exponent else 0
+
+    @property
+    def grid(self):
+        grid = [[0] * self.size for _ in range(self.size)]
+        for i, row in enumerate(self.rows):
+            for j, exponent in row:
+                grid[i][j] = 1 << exponent
+        return grid
+
+    @property
+    def empty_count(self):
+        return len(self.free)
+
+    def _line_legal(self, line):
+        """返回一条线能否向两端移动：(向小端, 向大端)"""
+        count = len(line)
+        low = high = False
+        for k, (position, exponent) in enumerate(line):
+            if position != k:
+                low = True
+            if position != self.size - count + k:
+                high = True
+            if k and line[k - 1][1] == exponent:
+                return True, True
+        return low, high
+
+    def legal_directions(self):
+        """可移动的方向，开销与数字个数成正比"""
+        legal = set()
+        for lines, low, high in ((self.rows, LEFT, RIGHT), (self._columns(), UP, DOWN)):
+            for line in lines:
+                can_low, can_high = self._line_legal(line)
+                if can_low:
+                    legal.add(low)
+                if can_high:
+                    legal.add(high)
+                if len(legal) == 4:
+                    break
+        return [d for d in (UP, DOWN, LEFT, RIGHT) if d in legal]
+
+    @property
+    def legal_moves(self):
+        mask = 0
+        for direction in self.legal_directions():
+            mask |= 1 << direction
+        return mask
+
+    def is_victory(self):
+        return self.max_exp >= VICTORY_EXPONENT
+
+    def can_move(self):
+        # 有空格时一定有方向可以移动
+        return bool(self.free) or bool(self.legal_directions())
+
+    def check_game_state(self):
+        """返回 'victory'、'game_over' 或 None"""
+        if self.is_victory():
+            return 'victory'
+        if not self.can_move():
+            return 'game_over'
+        return None
+
+
+def create_engine(size, rng=None):
+    """按尺寸选择引擎：小棋盘用打包的 Engine2048，大棋盘用稀疏存储"""
+    if size <= DENSE_MAX_SIZE:
+        return Engine2048(size, rng)
+    return SparseEngine2048(size, rng)
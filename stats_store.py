@@ -0,0 +1,154 @@
+"""两个游戏的成绩记录
+
+每局结束时的结果（胜负、得分、用时）写入一个 SQLite 文件。写入由后台线程
+批量完成：record() 只把记录放进队列就返回，界面线程不做任何磁盘 I/O。
+启动时只读取需要的汇总值（各尺寸的最高分和最快胜利用时），不加载明细。
+
+默认文件为 ~/.tiny_game/stats.sqlite3，可以用环境变量 TINY_GAME_STATS 或
+构造参数指定其他路径。文件无法创建或读取时只在内存中记录本次运行的成绩；
+写入出错时丢弃这一批记录并在标准错误上报告，不影响游戏。
+"""
+import atexit
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
+
+DEFAULT_PATH = os.path.join(os.path.expanduser('~'), '.tiny_game', 'stats.sqlite3')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY,
+    game TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    result TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    duration REAL NOT NULL,
+    finished REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_game ON results (game, size, result);
+"""
+
+# 一次事务最多写入的记录数
+BATCH_SIZE = 256
+
+
+class StatsStore:
+    """成绩记录，写入在后台线程中批量进行
+
+    best_scores[(游戏, 尺寸)] 为最高得分，best_times[(游戏, 尺寸)] 为最快
+    胜利用时（秒），两者在 record() 时立即更新。path 为 None 表示文件不可用，
+    只在内存中记录；error 为最近一次读写错误。
+    """
+
+    def __init__(self, path=None):
+        self.path = path or os.environ.get('TINY_GAME_STATS') or DEFAULT_PATH
+        self.best_scores = {}
+        self.best_times = {}
+        self.error = None
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._load()
+        except (OSError, sqlite3.Error) as error:
+            self._report(error)
+            self.best_scores.clear()
+            self.best_times.clear()
+            self.path = None
+        self.queue = queue.Queue()
+        self.closed = self.path is None
+        self.thread = None
+        if self.path is not None:
+            self.thread = threading.Thread(target=self._writer, name='stats-writer', daemon=True)
+            self.thread.start()
+            atexit.register(self.close)
+
+    def _report(self, error):
+        self.error = error
+        print(f"成绩记录 {self.path}: {error}", file=sys.stderr)
+
+    def _load(self):
+        connection = sqlite3.connect(self.path)
+        try:
+            connection.executescript(_SCHEMA)
+            for game, size, best in connection.execute(
+                    "SELECT game, size, MAX(score) FROM results GROUP BY game, size"):
+                self.best_scores[(game, size)] = best
+            for game, size, best in connection.execute(
+                    "SELECT game, size, MIN(duration) FROM results"
+                    " WHERE result = 'victory' GROUP BY game, size"):
+                self.best_times[(game, size)] = best
+        finally:
+            connection.close()
+
+    def best_score(self, game, size):
+        return self.best_scores.get((game, size), 0)
+
+    def best_time(self, game, size):
+        return self.best_times.get((game, size))
+
+    def record(self, game, size, result, score=0, duration=0.0):
+        """记录一局结果；result 为 'victory'、'game_over'、'loss' 或 'abandoned'"""
+        key = (game, size)
+        if score > self.best_scores.get(key, 0):
+            self.best_scores[key] = score
+        if result == 'victory' and (key not in self.best_times or duration < self.best_times[key]):
+            self.best_times[key] = duration
+        if not self.closed:
+            self.queue.put((game, size, result, score, duration, time.time()))
+
+    def _writer(self):
+        try:
+            connection = sqlite3.connect(self.path)
+        except sqlite3.Error as error:
+            # 连接失败时照常取走队列中的记录，flush() 和 close() 不会一直等下去
+            self._report(error)
+            connection = None
+        try:
+            while True:
+                item = self.queue.get()
+                batch = []
+                stop = item is None
+                if not stop:
+                    batch.append(item)
+                # 把队列中已有的记录合并到同一个事务
+                while not stop and len(batch) < BATCH_SIZE:
+                    try:
+                        item = self.queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is None:
+                        stop = True
+                    else:
+                        batch.append(item)
+                try:
+                    if batch and connection is not None:
+                        with connection:
+                            connection.executemany(
+                                "INSERT INTO results (game, size, result, score, duration, finished)"
+                                " VALUES (?, ?, ?, ?, ?, ?)", batch)
+                except Exception as error:
+                    # 丢弃这一批，后台线程继续处理后面的记录
+                    self._report(error)
+                finally:
+                    for _ in range(len(batch) + stop):
+                        self.queue.task_done()
+                if stop:
+                    return
+        finally:
+            if connection is not None:
+                connection.close()
+
+    def flush(self):
+        """等待已提交的记录全部写入"""
+        self.queue.join()
+
+    def close(self):
+        """写完剩余记录并结束后台线程"""
+        if self.closed:
+            return
+        self.closed = True
+        self.queue.put(None)
+        self.thread.join()
+        atexit.unregister(self.close)
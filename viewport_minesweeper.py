@@ -0,0 +1,303 @@
+"""大棋盘的扫雷视口
+
+画布上只有一组固定数量的格子对象（对象池，比窗口多一行一列），窗口移动时
+把移出窗口的对象挪到另一边、改为显示新进入窗口的格子：第 i 个对象始终显示
+列号除以池宽余 i 的那一列，所以平移一格只需要重新绑定一行或一列，整体的
+像素平移只是一次 canvas.move。画布对象的数量与棋盘大小无关。
+
+平移请求（方向键、中键拖动）先累加，由一个帧回调统一应用，按住方向键时
+也是每帧最多更新一次。缩略图模式下每个对象代表 ZOOM x ZOOM 个格子，颜色
+按其中已翻开的比例显示，有旗子的再加一个红点。
+
+source 为 board_minesweeper.MineBoard 或 world_minesweeper.MineWorld，
+需要提供 cell(x, y)（状态字节）和 block_summary(x0, y0, scale)。
+其他接口与 render_minesweeper.MineCanvas 相同，坐标都是棋盘坐标。
+"""
+import tkinter as tk
+
+from board_minesweeper import COUNT_MASK, MINE, REVEALED, FLAGGED
+from render_minesweeper import (HIDDEN_COLOR, REVEALED_COLOR, GRID_LINE_COLOR, FLAG_COLOR,
+                                MINE_COLOR, HOVER_COLOR, HINT_SAFE_COLOR, HINT_GUESS_COLOR,
+                                NUMBER_COLORS)
+
+FRAME_MS = 16
+# 方向键（或 WASD）每次平移的格子数；M 键切换缩略图
+PAN_STEP = 5
+PAN_KEYS = {'Left': (-1, 0), 'Right': (1, 0), 'Up': (0, -1), 'Down': (0, 1),
+            'a': (-1, 0), 'd': (1, 0), 'w': (0, -1), 's': (0, 1)}
+ZOOM_KEY = 'm'
+# 缩略图模式下一个格子对象代表的边长（需整除 world_minesweeper.CHUNK_SIZE）
+ZOOM = 8
+# 缩略图按翻开比例分档的颜色，从未探索到全部翻开
+ZOOM_COLORS = ["#909090", "#a8a8a8", "#c0c0c0", "#d8d8d8", "#f0f0f0"]
+
+_HIDDEN_STYLE = (HIDDEN_COLOR, "", "black")
+
+
+class MineViewport:
+    """只渲染窗口内格子的扫雷画布
+
+    size 为棋盘边长，窗口不会移出棋盘；为 None 时棋盘无边界。
+    """
+
+    def __init__(self, parent, source, cols, rows, cell_size, font, size=None):
+        self.source = source
+        self.cols = cols
+        self.rows = rows
+        self.cell_size = cell_size
+        self.size = size
+        self.canvas = tk.Canvas(parent, width=cols * cell_size, height=rows * cell_size,
+                                bg=HIDDEN_COLOR, highlightthickness=0)
+        # 对象池：pool_cols x pool_rows 组 (矩形, 文字)
+        self.pool_cols = cols + 1
+        self.pool_rows = rows + 1
+        self.slots = []
+        for _ in range(self.pool_cols * self.pool_rows):
+            rect = self.canvas.create_rectangle(0, 0, cell_size, cell_size, fill=HIDDEN_COLOR,
+                                                outline=GRID_LINE_COLOR, tags='pool')
+            text = self.canvas.create_text(cell_size / 2, cell_size / 2, text="", font=font,
+                                           tags='pool')
+            self.slots.append((rect, text))
+        # 每个对象当前显示的单位坐标和样式
+        self.bound = [None] * len(self.slots)
+        self.styles = [None] * len(self.slots)
+        self.hover = self.canvas.create_rectangle(0, 0, cell_size, cell_size, width=2,
+                                                  outline=HOVER_COLOR, state='hidden')
+        self.hint = self.canvas.create_rectangle(0, 0, cell_size, cell_size, width=3,
+                                                 outline=HINT_SAFE_COLOR, state='hidden')
+        self.hovered = None
+        self.hinted = None
+        self.show_mines = False
+        # 窗口左上角在“单位”像素坐标中的位置；单位为格子，缩略图模式下为 ZOOM x ZOOM 的块
+        self.scale = 1
+        self.px = 0
+        self.py = 0
+        # 上次布局时的窗口位置，对象池整体平移的基准；None 表示还没有布局
+        self.laid = None
+        self.pending = [0, 0]
+        self.frame_id = None
+        self.drag = None
+        self.canvas.bind('<ButtonPress-2>', self.on_drag_start)
+        self.canvas.bind('<B2-Motion>', self.on_drag)
+        # 缩略图中左键点击回到正常比例并以点击处为中心；用松开事件，游戏自己
+        # 的按下处理在缩略图中拿到的格子是 None，不会翻开格子
+        self.canvas.bind('<ButtonRelease-1>', self.on_zoom_click)
+        self.layout()
+
+    def bind_keys(self, widget):
+        """在 widget 上绑定平移和缩略图的按键"""
+        widget.bind('<Key>', self.on_key, add='+')
+
+    def on_key(self, event):
+        step = PAN_KEYS.get(event.keysym)
+        if step is not None:
+            distance = PAN_STEP * self.cell_size
+            self.pan_by(step[0] * distance, step[1] * distance)
+        elif event.keysym == ZOOM_KEY:
+            self.set_zoom(self.scale == 1)
+
+    def on_zoom_click(self, event):
+        if self.scale != 1:
+            x, y = self.block_at(event.x, event.y)
+            self.set_zoom(False)
+            self.center_on(x + ZOOM // 2, y + ZOOM // 2)
+
+    # ------------------------------------------------------------ 坐标
+
+    def center_on(self, x, y):
+        """让格子 (x, y) 位于窗口中央"""
+        unit = self.cell_size
+        self.px = (x // self.scale) * unit + unit // 2 - self.cols * unit // 2
+        self.py = (y // self.scale) * unit + unit // 2 - self.rows * unit // 2
+        self._clamp()
+        self.layout()
+
+    def center(self):
+        """窗口中央的格子坐标"""
+        unit = self.cell_size
+        x = (self.px + self.cols * unit // 2) // unit * self.scale
+        y = (self.py + self.rows * unit // 2) // unit * self.scale
+        return x, y
+
+    def _clamp(self):
+        if self.size is None:
+            return
+        units = -(-self.size // self.scale)
+        self.px = max(0, min(self.px, units * self.cell_size - self.cols * self.cell_size))
+        self.py = max(0, min(self.py, units * self.cell_size - self.rows * self.cell_size))
+
+    def cell_at(self, px, py):
+        """像素坐标对应的格子 (x, y)；缩略图模式下和在棋盘外返回 None"""
+        if self.scale != 1:
+            return None
+        x = int((self.px + px) // self.cell_size)
+        y = int((self.py + py) // self.cell_size)
+        if self.size is not None and not (0 <= x < self.size and 0 <= y < self.size):
+            return None
+        return x, y
+
+    def block_at(self, px, py):
+        """像素坐标对应的单位左上角的格子坐标"""
+        x = int((self.px + px) // self.cell_size) * self.scale
+        y = int((self.py + py) // self.cell_size) * self.scale
+        return x, y
+
+    # ------------------------------------------------------------ 平移
+
+    def pan_by(self, dx, dy):
+        """请求平移 (dx, dy) 像素，在下一帧统一应用"""
+        self.pending[0] += dx
+        self.pending[1] += dy
+        if self.frame_id is None:
+            self.frame_id = self.canvas.after(FRAME_MS, self._apply_pan)
+
+    def _apply_pan(self):
+        self.frame_id = None
+        dx, dy = self.pending
+        self.pending = [0, 0]
+        self.px += dx
+        self.py += dy
+        self._clamp()
+        self.layout()
+
+    def on_drag_start(self, event):
+        self.drag = (event.x, event.y)
+
+    def on_drag(self, event):
+        if self.drag is not None:
+            self.pan_by(self.drag[0] - event.x, self.drag[1] - event.y)
+            self.drag = (event.x, event.y)
+
+    def set_zoom(self, zoomed):
+        """切换缩略图模式，保持窗口中央的位置不变"""
+        scale = ZOOM if zoomed else 1
+        if scale == self.scale:
+            return
+        x, y = self.center()
+        self.scale = scale
+        # 单位变了，所有对象都要重新绑定
+        self.bound = [None] * len(self.slots)
+        self.styles = [None] * len(self.slots)
+        self.center_on(x, y)
+
+    # ------------------------------------------------------------ 绘制
+
+    def _style(self, ux, uy):
+        scale = self.scale
+        if self.size is not None and not (0 <= ux * scale < self.size and 0 <= uy * scale < self.size):
+            return _HIDDEN_STYLE
+        if scale != 1:
+            revealed, flagged = self.source.block_summary(ux * scale, uy * scale, scale)
+            fill = ZOOM_COLORS[revealed * (len(ZOOM_COLORS) - 1) // (scale * scale)]
+            return fill, "•" if flagged else "", FLAG_COLOR if flagged else "black"
+        state = self.source.cell(ux, uy)
+        if state & REVEALED:
+            if state & MINE:
+                return MINE_COLOR, "💣", "black"
+            value = state & COUNT_MASK
+            if value:
+                return REVEALED_COLOR, str(value), NUMBER_COLORS[value - 1]
+            return REVEALED_COLOR, "", "black"
+        if state & FLAGGED:
+            return FLAG_COLOR, "🚩", "black"
+        if self.show_mines and state & MINE:
+            return MINE_COLOR, "💣", "black"
+        return _HIDDEN_STYLE
+
+    def _paint(self, index, ux, uy):
+        style = self._style(ux, uy)
+        if style != self.styles[index]:
+            self.styles[index] = style
+            rect, text = self.slots[index]
+            fill, label, text_fill = style
+            self.canvas.itemconfig(rect, fill=fill)
+            self.canvas.itemconfig(text, text=label, fill=text_fill)
+
+    def layout(self):
+        """按当前窗口位置重新绑定对象：整体平移一次，只移动和重画绑定改变了的对象"""
+        unit = self.cell_size
+        ox, offset_x = divmod(self.px, unit)
+        oy, offset_y = divmod(self.py, unit)
+        # 绑定不变的对象只需跟着窗口整体平移
+        if self.laid is not None and self.laid != (self.px, self.py):
+            self.canvas.move('pool', self.laid[0] - self.px, self.laid[1] - self.py)
+        self.laid = (self.px, self.py)
+        coords = self.canvas.coords
+        pool_cols = self.pool_cols
+        pool_rows = self.pool_rows
+        for i in range(pool_cols):
+            ux = ox + (i - ox) % pool_cols
+            sx = (ux - ox) * unit - offset_x
+            for j in range(pool_rows):
+                uy = oy + (j - oy) % pool_rows
+                index = i * pool_rows + j
+                if self.bound[index] != (ux, uy):
+                    self.bound[index] = (ux, uy)
+                    sy = (uy - oy) * unit - offset_y
+                    rect, text = self.slots[index]
+                    coords(rect, sx, sy, sx + unit, sy + unit)
+                    coords(text, sx + unit / 2, sy + unit / 2)
+                    self._paint(index, ux, uy)
+                elif self.styles[index] is None:
+                    self._paint(index, ux, uy)
+        self._place(self.hover, self.hovered)
+        self._place(self.hint, self.hinted)
+
+    def refresh(self):
+        """按棋盘状态重画窗口内的全部对象（只改变样式变化了的）"""
+        for index, (ux, uy) in enumerate(self.bound):
+            self._paint(index, ux, uy)
+
+    def _update(self, x, y):
+        """格子 (x, y) 的状态变了，在窗口内时重画它"""
+        ux = x // self.scale
+        uy = y // self.scale
+        index = (ux % self.pool_cols) * self.pool_rows + uy % self.pool_rows
+        if self.bound[index] == (ux, uy):
+            self._paint(index, ux, uy)
+
+    def _place(self, item, cell):
+        if cell is None or self.scale != 1:
+            self.canvas.itemconfig(item, state='hidden')
+            return
+        x1 = cell[0] * self.cell_size - self.px
+        y1 = cell[1] * self.cell_size - self.py
+        self.canvas.coords(item, x1, y1, x1 + self.cell_size, y1 + self.cell_size)
+        self.canvas.itemconfig(item, state='normal')
+        self.canvas.tag_raise(item)
+
+    # ------------------------------------------------------------ 与 MineCanvas 相同的接口
+
+    def clear(self):
+        self.show_mines = False
+        self.hovered = None
+        self.hinted = None
+        self.refresh()
+        self._place(self.hover, None)
+        self._place(self.hint, None)
+
+    def draw_revealed(self, cells, grid):
+        for x, y in cells:
+            self._update(x, y)
+
+    def draw_number(self, x, y, value):
+        self._update(x, y)
+
+    def draw_flag(self, x, y, flagged):
+        self._update(x, y)
+
+    def draw_mine(self, x, y):
+        if not self.show_mines:
+            self.show_mines = True
+            self.refresh()
+
+    def set_hover(self, cell):
+        if cell == self.hovered:
+            return
+        self.hovered = cell
+        self._place(self.hover, cell)
+
+    def set_hint(self, cell, safe=True):
+        self.hinted = cell
+        self.canvas.itemconfig(self.hint, outline=HINT_SAFE_COLOR if safe else HINT_GUESS_COLOR)
+        self._place(self.hint, cell)
@@ -0,0 +1,217 @@
+"""无边界的扫雷世界
+
+世界按 CHUNK_SIZE x CHUNK_SIZE 的区块划分，坐标可以是任意整数（包括负数）。
+每个区块的地雷由世界种子和区块坐标的哈希决定：同一个种子、同一个区块
+永远得到同一个布局，所以区块不必一直留在内存里。
+
+区块在翻开格子或视口需要显示它时才生成，按最近使用的顺序缓存，格子状态
+与 board_minesweeper 相同，每格一个字节。超出缓存容量时丢弃最久没用的
+区块：没有被玩家动过的区块直接丢弃，需要时重新推导；翻开过或插过旗的
+区块只把翻开和旗子两位压缩后保存，重新载入时再推导地雷和数字。所以内存
+与探索过的面积成正比，与世界大小无关。
+"""
+import random
+import zlib
+from collections import OrderedDict
+
+from board_minesweeper import (COUNT_MASK, MINE, REVEALED, FLAGGED, REVEALED_TABLE,
+                               FLAGGED_TABLE)
+
+CHUNK_SIZE = 32
+# 地雷太稀时空白格子连成无限大的一片，翻开一格就会一直连锁下去；
+# 密度不低于这个值时空白格子（3x3 内没有地雷的概率约 0.32）不会无限连通
+MIN_DENSITY = 0.12
+# 压缩保存时只保留玩家状态
+_STATE_TABLE = bytes(value & (REVEALED | FLAGGED) for value in range(256))
+
+_MASK64 = (1 << 64) - 1
+
+
+def _mix(*values):
+    """把若干个整数混合成一个 64 位哈希（splitmix64），与 Python 版本和进程无关"""
+    h = 0x9E3779B97F4A7C15
+    for value in values:
+        h = (h ^ (value & _MASK64)) * 0xBF58476D1CE4E5B9 & _MASK64
+        h = (h ^ (h >> 27)) * 0x94D049BB133111EB & _MASK64
+        h ^= h >> 31
+    return h
+
+
+class MineWorld:
+    """按区块惰性生成的无边界扫雷棋盘
+
+    (x, y) 为世界坐标。第一次翻开前调用 start() 指定开局位置，它周围 3x3
+    区域内的地雷会被去掉。
+    """
+
+    def __init__(self, seed=0, density=0.18, chunk_size=CHUNK_SIZE, cache_chunks=1024):
+        if not MIN_DENSITY <= density < 1:
+            raise ValueError(f"地雷密度需要在 {MIN_DENSITY} 和 1 之间")
+        self.seed = seed
+        self.density = density
+        self.chunk_size = chunk_size
+        self.mines_per_chunk = round(density * chunk_size * chunk_size)
+        self.cache_chunks = cache_chunks
+        # (区块 x, 区块 y) -> bytearray，按最近使用排序
+        self.chunks = OrderedDict()
+        # 被换出的、玩家动过的区块：(区块 x, 区块 y) -> 压缩后的状态
+        self.saved = {}
+        # 玩家动过（翻开或插旗）的区块
+        self.touched = set()
+        self.safe_zone = None
+
+    def start(self, x, y):
+        """把开局位置 (x, y) 周围 3x3 区域设为安全，已经生成的区块按新规则重算"""
+        self.safe_zone = (x, y)
+        for key, cells in self.chunks.items():
+            self._build(key, cells)
+
+    def chunk_mines(self, cx, cy):
+        """区块内地雷的本地编号（lx * chunk_size + ly）集合"""
+        size = self.chunk_size
+        rng = random.Random(_mix(self.seed, cx, cy))
+        mines = set(rng.sample(range(size * size), self.mines_per_chunk))
+        if self.safe_zone is not None:
+            sx, sy = self.safe_zone
+            for x in range(sx - 1, sx + 2):
+                for y in range(sy - 1, sy + 2):
+                    if x // size == cx and y // size == cy:
+                        mines.discard((x % size) * size + y % size)
+        return mines
+
+    def _build(self, key, cells):
+        """按种子重新推导区块的地雷和数字，保留 cells 中的翻开和旗子状态"""
+        size = self.chunk_size
+        cx, cy = key
+        cells[:] = cells.translate(_STATE_TABLE)
+        x0 = cx * size
+        y0 = cy * size
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                for local in self.chunk_mines(cx + dx, cy + dy):
+                    mx = (cx + dx) * size + local // size - x0
+                    my = (cy + dy) * size + local % size - y0
+                    if dx == 0 and dy == 0:
+                        cells[mx * size + my] |= MINE
+                    for nx in range(max(0, mx - 1), min(size, mx + 2)):
+                        base = nx * size
+                        for ny in range(max(0, my - 1), min(size, my + 2)):
+                            if nx != mx or ny != my:
+                                cells[base + ny] += 1
+
+    def _chunk(self, key, evict=True):
+        cells = self.chunks.get(key)
+        if cells is not None:
+            self.chunks.move_to_end(key)
+            return cells
+        saved = self.saved.pop(key, None)
+        if saved is not None:
+            cells = bytearray(zlib.decompress(saved))
+        else:
+            cells = bytearray(self.chunk_size * self.chunk_size)
+        self._build(key, cells)
+        self.chunks[key] = cells
+        if evict:
+            self._evict()
+        return cells
+
+    def _evict(self):
+        while len(self.chunks) > self.cache_chunks:
+            key, cells = self.chunks.popitem(last=False)
+            if key in self.touched:
+                self.saved[key] = zlib.compress(bytes(cells.translate(_STATE_TABLE)), 1)
+
+    def cell(self, x, y):
+        """(x, y) 的状态字节（位的含义同 board_minesweeper）"""
+        size = self.chunk_size
+        return self._chunk((x // size, y // size))[(x % size) * size + y % size]
+
+    def is_mine(self, x, y):
+        return bool(self.cell(x, y) & MINE)
+
+    def count(self, x, y):
+        return self.cell(x, y) & COUNT_MASK
+
+    def is_revealed(self, x, y):
+        return bool(self.cell(x, y) & REVEALED)
+
+    def is_flagged(self, x, y):
+        return bool(self.cell(x, y) & FLAGGED)
+
+    def toggle_flag(self, x, y):
+        """切换旗子，返回切换后是否插着旗"""
+        size = self.chunk_size
+        key = (x // size, y // size)
+        cells = self._chunk(key)
+        k = (x % size) * size + y % size
+        cells[k] ^= FLAGGED
+        self.touched.add(key)
+        return bool(cells[k] & FLAGGED)
+
+    def flood(self, x, y):
+        """翻开 (x, y) 及连锁翻开的格子（跳过插旗的），返回这些格子的世界坐标列表
+
+        连锁翻开可以跨过区块边界。(x, y) 本身不检查是否为地雷或已翻开，由
+        调用方负责。翻开过程中用到的区块在结束前不会被换出；只是读过、没有
+        格子被翻开的区块不算玩家动过。
+        """
+        size = self.chunk_size
+        touched = self.touched
+        local = {}
+
+        def chunk(key):
+            cells = local.get(key)
+            if cells is None:
+                cells = local[key] = self._chunk(key, evict=False)
+            return cells
+
+        key = (x // size, y // size)
+        start = chunk(key)
+        touched.add(key)
+        k = (x % size) * size + y % size
+        start[k] |= REVEALED
+        opened = [(x, y)]
+        stack = [(x, y)] if not start[k] & (MINE | COUNT_MASK) else []
+        blocked = REVEALED | FLAGGED
+        while stack:
+            cx, cy = stack.pop()
+            for nx in range(cx - 1, cx + 2):
+                for ny in range(cy - 1, cy + 2):
+                    key = (nx // size, ny // size)
+                    cells = chunk(key)
+                    n = (nx % size) * size + ny % size
+                    value = cells[n]
+                    if not value & blocked:
+                        cells[n] = value | REVEALED
+                        touched.add(key)
+                        opened.append((nx, ny))
+                        if not value & COUNT_MASK:
+                            stack.append((nx, ny))
+        self._evict()
+        return opened
+
+    def block_summary(self, x0, y0, scale):
+        """从 (x0, y0) 开始 scale x scale 区域内 (已翻开的格子数, 插旗的格子数)
+
+        scale 需整除区块边长且区域与区块对齐。没有被玩家动过的区块直接返回
+        (0, 0)，不会因此生成区块。
+        """
+        size = self.chunk_size
+        key = (x0 // size, y0 // size)
+        if key not in self.touched:
+            return 0, 0
+        cells = self._chunk(key)
+        lx = x0 % size
+        ly = y0 % size
+        revealed = flagged = 0
+        for x in range(lx, lx + scale):
+            column = cells[x * size + ly:x * size + ly + scale]
+            revealed += column.translate(REVEALED_TABLE).count(1)
+            flagged += column.translate(FLAGGED_TABLE).count(1)
+        return revealed, flagged
+
+    def memory(self):
+        """(缓存中的区块数, 换出保存的区块数, 占用的字节数的估计)"""
+        cached = len(self.chunks) * self.chunk_size * self.chunk_size
+        saved = sum(len(data) for data in self.saved.values())
+        return len(self.chunks), len(self.saved), cached + saved